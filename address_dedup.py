@@ -0,0 +1,186 @@
+#!/usr/bin/env python3.11
+"""
+Address normalization and duplicate handling before dispatch
+
+Wallet files merged from several sources can list the same address more
+than once, in different case or with stray whitespace. Before a batch is
+dispatched:
+    - addresses are normalized (trimmed, lower case) and validated
+      (addr1 / addr_test1 prefix, plausible length, bech32 characters)
+    - a counting pass finds the addresses that occur more than once, using
+      an exact set, or a Bloom filter for inputs too large to hold in memory
+    - each duplicated address is fetched once, and its result is copied to
+      every other position it occupies, so the output still has one record
+      per input entry
+
+Invalid addresses are not sent. Each gets a failure record (error class
+`client`) in its position.
+"""
+import math
+import hashlib
+from retry_queue import failure_record, ERROR_CLIENT
+
+ADDRESS_PREFIXES = ('addr1', 'addr_test1')
+MIN_ADDRESS_LENGTH = 40
+MAX_ADDRESS_LENGTH = 120
+ADDRESS_CHARACTERS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789_')
+
+DEDUP_MODES = ('set', 'bloom')
+BLOOM_ERROR_RATE = 0.001
+
+
+def normalize_address(address):
+    """Canonical form of an address: surrounding whitespace removed, lower case (bech32 is case-insensitive)"""
+    return address.strip().lower()
+
+
+def address_error(address):
+    """Why a normalized address is invalid, or None if it looks like a valid addr1... address"""
+    if not address.startswith(ADDRESS_PREFIXES):
+        return f"Invalid address (expected prefix {' or '.join(ADDRESS_PREFIXES)})"
+    if not MIN_ADDRESS_LENGTH <= len(address) <= MAX_ADDRESS_LENGTH:
+        return f'Invalid address (length {len(address)})'
+    if not ADDRESS_CHARACTERS.issuperset(address):
+        return 'Invalid address (unexpected characters)'
+    return None
+
+
+def invalid_address_record(address):
+    """Failure record for an address that was not sent because it is invalid"""
+    return failure_record(address, address_error(address), ERROR_CLIENT)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings (no false negatives, tunable false positives)
+    """
+
+    def __init__(self, expected_items, error_rate=BLOOM_ERROR_RATE):
+        """
+        Args:
+            expected_items: Number of distinct items the filter is sized for
+            error_rate: Target false positive rate at that size
+        """
+        expected_items = max(1, expected_items)
+        self.size = max(8, int(-expected_items * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: two 64-bit halves of one digest give every probe position
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Add an item. Returns True if it was (probably) already present."""
+        present = True
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+
+def find_duplicates(make_addresses, mode='set', expected_items=None):
+    """
+    Counting pass: which normalized addresses occur more than once, and how often
+    Args:
+        make_addresses: Callable returning a fresh iterable of raw addresses (read once or twice)
+        mode: 'set' (exact, one pass, memory grows with the input) or
+              'bloom' (two passes, memory fixed by expected_items)
+        expected_items: Bloom filter sizing (number of addresses in the input)
+    Returns: dict of address -> occurrences, for addresses that occur at least twice
+    """
+    counts = {}
+
+    if mode == 'bloom':
+        # Pass 1: the filter flags every repeat (plus a few false positives)
+        bloom = BloomFilter(expected_items or 1_000_000)
+        candidates = set()
+        for raw in make_addresses():
+            address = normalize_address(raw)
+            if bloom.add(address):
+                candidates.add(address)
+        del bloom
+
+        # Pass 2: exact counts for the candidates only
+        for raw in make_addresses():
+            address = normalize_address(raw)
+            if address in candidates:
+                counts[address] = counts.get(address, 0) + 1
+    else:
+        seen = set()
+        for raw in make_addresses():
+            address = normalize_address(raw)
+            if address in seen:
+                counts[address] = counts.get(address, 1) + 1
+            else:
+                seen.add(address)
+        del seen
+
+    return {address: count for address, count in counts.items() if count > 1}
+
+
+class DuplicateTracker:
+    """
+    Per-run bookkeeping that lets each duplicated address be fetched once
+    The first occurrence is dispatched. Later occurrences take a copy of its final
+    result, immediately if it is known, or once it arrives (resolve). The stored
+    result is dropped after the last occurrence has taken its copy.
+    """
+
+    def __init__(self, duplicates):
+        """
+        Args:
+            duplicates: dict of address -> occurrences, from find_duplicates()
+        """
+        self.remaining = dict(duplicates)
+        self.dispatched = set()
+        self.results = {}
+        self.waiting = {}
+        self.saved = 0  # requests avoided
+
+    def __contains__(self, address):
+        return address in self.remaining
+
+    def first(self, address):
+        """True if this occurrence should be fetched (the first one)"""
+        if address in self.dispatched:
+            return False
+        self.dispatched.add(address)
+        self._consume(address)
+        return True
+
+    def take(self, address):
+        """
+        Claim the result for a later occurrence
+        Returns: a copy of the result, or None if it is still being fetched (resolve() returns it later)
+        """
+        self.saved += 1
+        self._consume(address)
+        stats = self.results.get(address)
+        if stats is None:
+            self.waiting[address] = self.waiting.get(address, 0) + 1
+            return None
+        if address not in self.remaining:
+            del self.results[address]
+        return dict(stats)
+
+    def resolve(self, stats):
+        """
+        Record the final result of a duplicated address
+        Returns: copies owed to occurrences that were waiting for it
+        """
+        address = stats['address']
+        copies = [dict(stats) for _ in range(self.waiting.pop(address, 0))]
+        if address in self.remaining:
+            self.results[address] = stats
+        return copies
+
+    def _consume(self, address):
+        self.remaining[address] -= 1
+        if self.remaining[address] == 0:
+            del self.remaining[address]
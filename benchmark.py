@@ -0,0 +1,85 @@
+#!/usr/bin/env python3.11
+"""
+Benchmark the direct fetcher against a local stub statistics server
+
+Compares the sequential fetch_wallet_stats() loop with the bounded-concurrency
+async engine at several concurrency levels. Nothing is sent to the real API.
+
+Usage:
+    python3.11 benchmark.py [num_wallets] [--latency SECONDS] [--concurrency 1,10,50]
+
+Example:
+    python3.11 benchmark.py 200 --latency 0.05 --concurrency 10,50
+"""
+import sys
+import time
+import asyncio
+from cli_options import split_options
+from stub_stats_server import start_stub_server
+from fetch_wallet_stats_direct import fetch_wallet_stats, fetch_all_wallet_stats, create_client
+
+
+def make_addresses(count):
+    """Synthetic addresses in the addr1... format"""
+    return [f'addr1{i:040d}' for i in range(count)]
+
+
+def bench_sequential(addresses, stats_url):
+    """Time the one-wallet-at-a-time loop on a pooled client"""
+    client = create_client(pool_size=1)
+    start = time.perf_counter()
+    results = [fetch_wallet_stats(address, stats_url, client) for address in addresses]
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed, results, client
+
+
+def bench_async(addresses, stats_url, concurrency):
+    """Time the async engine at a given concurrency"""
+    client = create_client(pool_size=concurrency)
+
+    async def run():
+        try:
+            return await fetch_all_wallet_stats(addresses, concurrency, stats_url, client)
+        finally:
+            await client.aclose()
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    return time.perf_counter() - start, results, client
+
+
+def report(label, elapsed, results, client, addresses):
+    """Print one benchmark line and check output order/shape"""
+    errors = sum(1 for r in results if 'error' in r)
+    in_order = [r['address'] for r in results] == addresses
+    connections = client.connection_stats()
+    print(f"  {label:<22} {elapsed:8.2f}s  {len(results) / elapsed:9.1f} wallets/s  "
+          f"errors={errors} ordered={in_order} "
+          f"connections={connections['connections_opened']} opened/{connections['connections_reused']} reused")
+
+
+def main():
+    args, options = split_options(sys.argv[1:])
+    num_wallets = int(args[0]) if args else 200
+    latency = float(options.get('latency', 0.05))
+    levels = [int(n) for n in options.get('concurrency', '10,50').split(',')]
+
+    server = start_stub_server(latency=latency)
+    addresses = make_addresses(num_wallets)
+
+    print(f"Benchmarking {num_wallets} wallets against {server.stats_url} (latency {latency}s)")
+    try:
+        elapsed, results, client = bench_sequential(addresses, server.stats_url)
+        report('sequential', elapsed, results, client, addresses)
+
+        for concurrency in levels:
+            elapsed, results, client = bench_async(addresses, server.stats_url, concurrency)
+            report(f'async concurrency={concurrency}', elapsed, results, client, addresses)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
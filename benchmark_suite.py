@@ -0,0 +1,314 @@
+#!/usr/bin/env python3.11
+"""
+Benchmark suite: the fetchers against a local stub statistics server
+
+Starts stub_stats_server.py with the requested latency distribution, 429
+injection and payload size, then runs each scenario in a fresh process:
+    - direct:  the direct fetcher's async engine (with its retry queue) at each
+               --concurrency level
+    - browser: the browser pool's batched in-page fetch() (one attempt per
+               wallet), skipped if Playwright is not installed
+Each scenario reports wallets/s, per-request latency percentiles (p50/p95/p99),
+peak RSS and CPU time. The results are written to a JSON report. Pass an earlier
+report as --baseline to fail (exit 1) when throughput drops or p95 latency
+rises by more than --tolerance.
+
+Usage:
+    python3.11 benchmark_suite.py [num_wallets] [options]
+
+Options:
+    --methods M             direct and/or browser, comma-separated (default: direct,browser)
+    --concurrency N,...     Direct method concurrency levels (default: 10,50)
+    --browsers N            Browser method: browsers in the pool (default: 2)
+    --pages-per-browser N   Browser method: concurrent pages per browser (default: 4)
+    --fetch-batch N         Browser method: wallets per in-page fetch() (default: 10)
+    --rate R                Request rate limit given to the fetchers (default: 1000/s)
+    --latency S             Stub server mean latency (default: 0.05)
+    --latency-dist D        fixed, uniform, exponential or lognormal (default: lognormal)
+    --throttle-rate P       Fraction of requests answered with 429 (default: 0)
+    --retry-after S         Retry-After sent with injected 429s (default: 1)
+    --payload-bytes N       Filler bytes per statistics response (default: 0)
+    --seed N                Stub server random seed (default: 1)
+    --report FILE           JSON report (default: benchmark_report.json)
+    --baseline FILE         Earlier report to compare against
+    --tolerance F           Allowed relative regression (default: 0.2)
+
+Example:
+    python3.11 benchmark_suite.py 2000 --methods direct --throttle-rate 0.01 --baseline last.json
+"""
+import sys
+import json
+import time
+import asyncio
+import platform
+import resource
+import tempfile
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from cli_options import split_options
+from stub_stats_server import start_stub_server, LATENCY_DISTRIBUTIONS
+from benchmark import make_addresses
+from result_writers import open_writer
+from rate_limiter import AdaptiveRateLimiter
+from retry_queue import RetryQueue, is_failure
+from fetch_wallet_stats_direct import create_client, _fetch_batch
+
+DEFAULT_REPORT = 'benchmark_report.json'
+DEFAULT_TOLERANCE = 0.2
+
+
+def percentile(values, q):
+    """q-th percentile (0-100) of a list of numbers, nearest-rank; None for an empty list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))  # ceil without floats
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies):
+    """p50/p95/p99/max request latency in milliseconds"""
+    summary = {f'p{q}': percentile(latencies, q) for q in (50, 95, 99)}
+    summary['max'] = max(latencies) if latencies else None
+    return {key: None if value is None else round(value * 1000, 2) for key, value in summary.items()}
+
+
+def _resource_usage():
+    """Peak RSS (MB) and CPU seconds of this process, and of the browser processes it started"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in KB on Linux
+    return {
+        'peak_rss_mb': round(own.ru_maxrss / 1024, 1),
+        'children_peak_rss_mb': round(children.ru_maxrss / 1024, 1),
+        'cpu_seconds': round(own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime, 3),
+    }
+
+
+def _run_direct(addresses, stats_url, concurrency, rate):
+    """Scenario body (runs in a fresh process): the direct engine with retries"""
+    latencies = []
+    client = create_client(pool_size=concurrency)
+    aget = client.aget
+
+    async def timed_aget(url, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await aget(url, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    client.aget = timed_aget
+    limiter = AdaptiveRateLimiter(rate=rate, max_rate=rate, name='statistics')
+    retries = RetryQueue()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = open_writer(f'{tmp}/results.jsonl', 'jsonl')
+        started = time.perf_counter()
+        totals = asyncio.run(_fetch_batch(addresses, client, concurrency, 0, len(addresses), sink, None, limiter,
+                                          retries, quiet=True, stats_url=stats_url))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'wallets': totals['processed'],
+        'errors': totals['failed'],
+        'elapsed_s': elapsed,
+        'latencies': latencies,
+        'retries': retries.metrics()['retries_scheduled'],
+        'throttles': limiter.metrics()['throttles'],
+    }
+
+
+def _run_browser(addresses, stats_url, browsers, pages_per_browser, fetch_batch, rate):
+    """Scenario body (runs in a fresh process): the browser pool's batched in-page fetch()"""
+    try:
+        from browser_api_client_async import AsyncBrowserPool
+        from fetch_wallet_stats import fetch_stats_on_page, _chunks
+    except ImportError as e:
+        return {'skipped': f'browser method unavailable ({e})'}
+
+    started = time.perf_counter()
+    pool = AsyncBrowserPool(num_browsers=browsers, headless=True, stats_rate=rate, stats_max_rate=rate,
+                            pages_per_browser=pages_per_browser)
+    startup = time.perf_counter() - started
+
+    latencies = []
+    timed_browsers = set()
+
+    def time_fetches(browser):
+        # Collect the per-request times measured inside the page
+        fetch_json_batch = browser.fetch_json_batch
+
+        async def timed_fetch_json_batch(page, urls, timeout_ms=15000):
+            results = await fetch_json_batch(page, urls, timeout_ms)
+            latencies.extend(result['elapsed_ms'] / 1000 for result in results)
+            return results
+
+        browser.fetch_json_batch = timed_fetch_json_batch
+        timed_browsers.add(id(browser))
+
+    async def job(browser, page, batch):
+        if id(browser) not in timed_browsers:
+            time_fetches(browser)
+        return await fetch_stats_on_page(pool, browser, page, batch, stats_url)
+
+    wallets = errors = 0
+    started = time.perf_counter()
+    try:
+        for batch, results, error in pool.map_as_completed(job, _chunks(addresses, fetch_batch), timeout=None):
+            wallets += len(batch)
+            errors += len(batch) if error is not None else sum(1 for stats in results if is_failure(stats))
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.close_all()
+
+    return {
+        'wallets': wallets,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'startup_s': round(startup, 2),
+        'latencies': latencies,
+        'throttles': pool.stats_rate_limiter.metrics()['throttles'],
+    }
+
+
+def _run_scenario(target, *args):
+    """Run a scenario body and add this process's resource usage"""
+    result = target(*args)
+    if 'skipped' not in result:
+        result.update(_resource_usage())
+    return result
+
+
+def run_scenario(server, name, target, *args):
+    """
+    Run one scenario in a fresh process (so RSS and CPU are its own) and summarize it
+    Returns: the scenario's report entry
+    """
+    before = server.counters()
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        result = executor.submit(_run_scenario, target, *args).result()
+    after = server.counters()
+
+    entry = {'name': name}
+    if 'skipped' in result:
+        entry['skipped'] = result['skipped']
+        return entry
+
+    latencies = result.pop('latencies')
+    elapsed = result['elapsed_s']
+    entry.update(result)
+    entry['elapsed_s'] = round(elapsed, 3)
+    entry['wallets_per_s'] = round(result['wallets'] / elapsed, 1) if elapsed > 0 else None
+    entry['requests'] = len(latencies)
+    entry['latency_ms'] = latency_summary(latencies)
+    entry['cpu_percent'] = round(result['cpu_seconds'] / elapsed * 100, 1) if elapsed > 0 else None
+    entry['server'] = {key: after[key] - before[key] for key in after}
+    return entry
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Find scenarios that got slower than in an earlier report
+    Returns: list of human-readable regression descriptions
+    """
+    previous = {entry['name']: entry for entry in baseline.get('results', []) if 'skipped' not in entry}
+    regressions = []
+    for entry in results:
+        before = previous.get(entry['name'])
+        if before is None or 'skipped' in entry:
+            continue
+        if entry['wallets_per_s'] < before['wallets_per_s'] * (1 - tolerance):
+            regressions.append(f"{entry['name']}: {entry['wallets_per_s']} wallets/s "
+                               f"(baseline {before['wallets_per_s']})")
+        p95, base_p95 = entry['latency_ms']['p95'], before['latency_ms']['p95']
+        if p95 is not None and base_p95 is not None and p95 > base_p95 * (1 + tolerance):
+            regressions.append(f"{entry['name']}: p95 latency {p95} ms (baseline {base_p95} ms)")
+    return regressions
+
+
+def print_results(results):
+    """One line per scenario"""
+    for entry in results:
+        if 'skipped' in entry:
+            print(f"  {entry['name']:<18} skipped: {entry['skipped']}")
+            continue
+        latency = entry['latency_ms']
+        print(f"  {entry['name']:<18} {entry['wallets_per_s']:9.1f} wallets/s  "
+              f"p50 {latency['p50']} / p95 {latency['p95']} / p99 {latency['p99']} ms  "
+              f"RSS {entry['peak_rss_mb']:.0f} MB  CPU {entry['cpu_percent']:.0f}%  "
+              f"errors={entry['errors']} 429s={entry['server']['throttled']}")
+
+
+def main():
+    args, options = split_options(sys.argv[1:])
+    num_wallets = int(args[0]) if args else 1000
+    methods = options.get('methods', 'direct,browser').split(',')
+    levels = [int(n) for n in options.get('concurrency', '10,50').split(',')]
+    browsers = int(options.get('browsers', 2))
+    pages_per_browser = int(options.get('pages_per_browser', 4))
+    fetch_batch = int(options.get('fetch_batch', 10))
+    rate = float(options.get('rate', 1000))
+    tolerance = float(options.get('tolerance', DEFAULT_TOLERANCE))
+    report_file = options.get('report', DEFAULT_REPORT)
+    stub_config = {
+        'latency': float(options.get('latency', 0.05)),
+        'latency_dist': options.get('latency_dist', 'lognormal'),
+        'throttle_rate': float(options.get('throttle_rate', 0)),
+        'retry_after': int(options.get('retry_after', 1)),
+        'payload_bytes': int(options.get('payload_bytes', 0)),
+        'seed': int(options.get('seed', 1)),
+    }
+    if stub_config['latency_dist'] not in LATENCY_DISTRIBUTIONS:
+        print(f"Error: Unknown latency distribution '{stub_config['latency_dist']}' "
+              f"(choose from {', '.join(LATENCY_DISTRIBUTIONS)})")
+        sys.exit(1)
+
+    server = start_stub_server(**stub_config)
+    addresses = make_addresses(num_wallets)
+    print(f"Benchmarking {num_wallets} wallets against {server.stats_url} "
+          f"({stub_config['latency']}s {stub_config['latency_dist']}, {stub_config['throttle_rate']:.0%} throttled)")
+
+    results = []
+    try:
+        if 'direct' in methods:
+            for concurrency in levels:
+                results.append(run_scenario(server, f'direct c={concurrency}', _run_direct, addresses,
+                                            server.stats_url, concurrency, rate))
+        if 'browser' in methods:
+            results.append(run_scenario(server, f'browser {browsers}x{pages_per_browser}', _run_browser, addresses,
+                                        server.stats_url, browsers, pages_per_browser, fetch_batch, rate))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print_results(results)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'wallets': num_wallets,
+        'rate': rate,
+        'stub': stub_config,
+        'results': results,
+    }
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report saved to {report_file}")
+
+    if 'baseline' in options:
+        with open(options['baseline'], encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), tolerance)
+        if regressions:
+            print(f"\n✗ Regressions against {options['baseline']} (tolerance {tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"  No regressions against {options['baseline']}")
+
+
+if __name__ == '__main__':
+    main()
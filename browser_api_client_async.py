@@ -6,10 +6,90 @@ Uses curl_cffi.requests for POST with Chrome TLS fingerprint impersonation
 """
 from playwright.async_api import async_playwright
 import json
+import time
 import asyncio
+import queue
 import threading
 from concurrent.futures import Future
 from curl_cffi import requests
+from rate_limiter import AdaptiveRateLimiter
+from run_log import get_logger, setup_logging
+
+log = get_logger('browser')
+
+# Resource types that always load: pages, and the API calls made from them
+ESSENTIAL_RESOURCE_TYPES = ('document', 'fetch', 'xhr')
+DEFAULT_BLOCKED_RESOURCE_TYPES = ('image', 'media', 'font', 'stylesheet', 'manifest')
+DEFAULT_BLOCKED_URL_PATTERNS = ('google-analytics.com', 'googletagmanager.com', '/_vercel/insights', '/_vercel/speed-insights')
+
+# Typical transfer sizes used to estimate bytes saved (an aborted request's real size is never known)
+TYPICAL_RESOURCE_BYTES = {
+    'image': 40_000,
+    'media': 250_000,
+    'font': 50_000,
+    'stylesheet': 25_000,
+    'script': 100_000,
+    'manifest': 1_000,
+}
+
+
+CHROMIUM_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+]
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+async def launch_chromium(playwright, headless=False):
+    """Launch a Chromium process with settings to avoid detection"""
+    return await playwright.chromium.launch(headless=headless, args=CHROMIUM_ARGS)
+
+
+async def new_browser_context(browser):
+    """Create an isolated context (own cookies and cache) with real browser settings"""
+    context = await browser.new_context(
+        viewport={'width': 1920, 'height': 1080},
+        user_agent=USER_AGENT,
+    )
+
+    # Hide webdriver property (anti-detection) - applies to every page in the context
+    await context.add_init_script("""
+        Object.defineProperty(navigator, 'webdriver', {
+            get: () => undefined
+        });
+    """)
+    return context
+
+
+class ResourceFilter:
+    """
+    Decides which browser requests are aborted
+    Either a blocklist of resource types, or an allowlist (everything else is blocked).
+    URLs matching a blocked pattern (analytics) are aborted either way.
+    """
+
+    def __init__(self, blocked_types=DEFAULT_BLOCKED_RESOURCE_TYPES, allowed_types=None,
+                 blocked_url_patterns=DEFAULT_BLOCKED_URL_PATTERNS):
+        """
+        Args:
+            blocked_types: Resource types to abort (ignored when allowed_types is given)
+            allowed_types: Only these resource types (plus the essential ones) may load
+            blocked_url_patterns: Substrings of URLs that are always aborted
+        """
+        self.blocked_types = set(blocked_types or ())
+        self.allowed_types = set(allowed_types) | set(ESSENTIAL_RESOURCE_TYPES) if allowed_types else None
+        self.blocked_url_patterns = tuple(blocked_url_patterns or ())
+
+    def allows(self, resource_type, url):
+        """True if a request should be sent"""
+        if any(pattern in url for pattern in self.blocked_url_patterns):
+            return False
+        if resource_type in ESSENTIAL_RESOURCE_TYPES:
+            return True
+        if self.allowed_types is not None:
+            return resource_type in self.allowed_types
+        return resource_type not in self.blocked_types
 
 
 class AsyncBrowserAPIClient:
@@ -17,19 +97,35 @@ class AsyncBrowserAPIClient:
     Async API client using real Chrome browser
     """
 
-    def __init__(self, playwright_instance, headless=False):
+    def __init__(self, playwright_instance, headless=False, max_pages=1, resource_filter=None, shared_browser=None):
         """
         Initialize browser (async)
         Args:
             playwright_instance: The async playwright instance
             headless: False = visible browser (better for bypassing detection)
+            max_pages: Extra pages (tabs) in the shared context for concurrent fetches
+            resource_filter: ResourceFilter to abort unneeded requests (None = load everything)
+            shared_browser: Chromium process shared with other clients - this client then
+                            only owns its context (None = launch a process of its own)
         """
         self.playwright = playwright_instance
         self.headless = headless
+        self.resource_filter = resource_filter
+        self.shared_browser = shared_browser
+        self.active_jobs = 0  # pool batch jobs running on this browser
+        self.last_used = time.monotonic()
+        self.route_stats = {'allowed': 0, 'blocked': 0, 'blocked_by_type': {}, 'bytes_saved_estimate': 0}
         self.browser = None
         self.context = None
         self.page = None
 
+        # Page pool for statistics fetches: pages are created on demand up to max_pages
+        # and checked out by one request at a time. self.page stays reserved for the
+        # session, challenge and submission calls.
+        self.max_pages = max_pages
+        self.idle_pages = None
+        self.pages_created = 0
+
         # Hybrid approach: browser for session, curl_cffi for POST with Chrome TLS
         # curl_cffi impersonates Chrome's TLS fingerprint to bypass Vercel detection
         self.session = requests.Session(impersonate="chrome120")  # Chrome 120 TLS fingerprint
@@ -71,46 +167,34 @@ class AsyncBrowserAPIClient:
                     # ALSO set as Cookie header for maximum compatibility
                     self.session.headers.update({'Cookie': cookie_string})
 
-                    print(f"  [Cookie Injection] ✓ Loaded cookies from {cookie_file}")
-                    print(f"  [Cookie Injection] ✓ Using REAL browser cookies - bot detection bypassed")
+                    log.info("[Cookie Injection] ✓ Loaded cookies from %s", cookie_file)
+                    log.info("[Cookie Injection] ✓ Using REAL browser cookies - bot detection bypassed")
                     return True
             except Exception as e:
-                print(f"  [Cookie Injection] ✗ Failed to load cookies: {e}")
+                log.warning("[Cookie Injection] ✗ Failed to load cookies: %s", e)
 
-        print(f"  [Cookie Injection] ℹ No cookie file found - will use browser cookies")
-        print(f"  [Cookie Injection] ℹ To bypass maximum protection:")
-        print(f"  [Cookie Injection] ℹ   1. Open https://sm.midnight.gd in browser")
-        print(f"  [Cookie Injection] ℹ   2. F12 → Console → Type: copy(document.cookie)")
-        print(f"  [Cookie Injection] ℹ   3. Paste into: {cookie_file}")
+        log.info("[Cookie Injection] ℹ No cookie file found - will use browser cookies")
+        log.info("[Cookie Injection] ℹ To bypass maximum protection:")
+        log.info("[Cookie Injection] ℹ   1. Open https://sm.midnight.gd in browser")
+        log.info("[Cookie Injection] ℹ   2. F12 → Console → Type: copy(document.cookie)")
+        log.info("[Cookie Injection] ℹ   3. Paste into: %s", cookie_file)
         return False
 
     async def start(self):
         """Start the browser"""
-        # Launch Chromium with settings to avoid detection
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-            ]
-        )
+        # Launch Chromium with settings to avoid detection (or use the pool's shared process)
+        self.browser = self.shared_browser or await launch_chromium(self.playwright, self.headless)
 
         # Create context with real browser settings
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        )
+        self.context = await new_browser_context(self.browser)
+
+        # Abort images, fonts, analytics etc. before the first navigation
+        if self.resource_filter is not None:
+            await self.context.route('**/*', self._route)
 
         # Create page
         self.page = await self.context.new_page()
-
-        # Hide webdriver property (anti-detection)
-        await self.page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-        """)
+        self.idle_pages = asyncio.Queue()
 
         # CRITICAL: Visit main site first to establish session with Vercel
         # This sets up cookies and browser fingerprint
@@ -128,6 +212,105 @@ class AsyncBrowserAPIClient:
 
         return self
 
+    async def _route(self, route):
+        """Request interception handler: continue or abort per the resource filter"""
+        request = route.request
+        if self.resource_filter.allows(request.resource_type, request.url):
+            self.route_stats['allowed'] += 1
+            await route.continue_()
+            return
+
+        resource_type = request.resource_type
+        self.route_stats['blocked'] += 1
+        blocked_by_type = self.route_stats['blocked_by_type']
+        blocked_by_type[resource_type] = blocked_by_type.get(resource_type, 0) + 1
+        self.route_stats['bytes_saved_estimate'] += TYPICAL_RESOURCE_BYTES.get(resource_type, 5_000)
+        await route.abort()
+
+    async def checkout_page(self):
+        """
+        Take a page from the pool for one request (async)
+        Opens a new page while fewer than max_pages exist, otherwise waits for one to be checked in.
+        """
+        if self.idle_pages.empty() and self.pages_created < self.max_pages:
+            self.pages_created += 1
+            try:
+                return await self.context.new_page()
+            except Exception:
+                self.pages_created -= 1
+                raise
+        return await self.idle_pages.get()
+
+    def checkin_page(self, page):
+        """Return a page to the pool (a page that was closed or crashed is dropped)"""
+        if page.is_closed():
+            self.pages_created -= 1
+        else:
+            self.idle_pages.put_nowait(page)
+
+    async def fetch_json_batch(self, page, urls, timeout_ms=15000):
+        """
+        GET several URLs at once with fetch() inside a page - one evaluate round-trip
+        The page must already be on the URLs' origin (see ensure_origin).
+        Returns: list of dicts (status, text, retry_after, ratelimit_remaining,
+                 ratelimit_reset, error, elapsed_ms) in the same order as urls
+        """
+        return await page.evaluate('''async ([urls, timeoutMs]) => {
+            return await Promise.all(urls.map(async (url) => {
+                const controller = new AbortController();
+                const timer = setTimeout(() => controller.abort(), timeoutMs);
+                const started = performance.now();
+                try {
+                    const response = await fetch(url, {
+                        headers: { 'Accept': 'application/json' },
+                        credentials: 'include',
+                        signal: controller.signal,
+                    });
+                    return {
+                        status: response.status,
+                        text: await response.text(),
+                        retry_after: response.headers.get('retry-after'),
+                        ratelimit_remaining: response.headers.get('x-ratelimit-remaining'),
+                        ratelimit_reset: response.headers.get('x-ratelimit-reset'),
+                        error: null,
+                        elapsed_ms: performance.now() - started,
+                    };
+                } catch (e) {
+                    return { status: 0, text: null, error: e.name === 'AbortError' ? 'timeout' : String(e),
+                             elapsed_ms: performance.now() - started };
+                } finally {
+                    clearTimeout(timer);
+                }
+            }));
+        }''', [urls, timeout_ms])
+
+    async def origin_cookies(self, origin, reload=False):
+        """
+        Cookie header for requests to `origin`, after visiting it in a pooled page (async)
+        Args:
+            origin: e.g. 'https://scavenger.prod.gd.midnighttge.io'
+            reload: Visit the origin again to renew the session even if a page is already on it
+        """
+        page = await self.checkout_page()
+        try:
+            if reload or not page.url.startswith(origin):
+                await page.goto(origin + '/', wait_until='domcontentloaded', timeout=30000)
+        finally:
+            self.checkin_page(page)
+
+        cookies = await self.context.cookies(origin + '/')
+        return '; '.join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+    async def ensure_origin(self, page, origin):
+        """
+        Load `origin` in a page once so in-page fetch() calls to it are same-origin
+        Returns: True if the page had to navigate
+        """
+        if page.url.startswith(origin):
+            return False
+        await page.goto(origin + '/', wait_until='domcontentloaded', timeout=30000)
+        return True
+
     async def _extract_cookies(self):
         """Extract cookies from browser context and copy to requests.Session"""
         try:
@@ -146,9 +329,9 @@ class AsyncBrowserAPIClient:
                     path=cookie.get('path', '/'),
                 )
 
-            print(f"  [Cookie Refresh] Extracted {len(cookies)} cookies from browser")
+            log.debug("[Cookie Refresh] Extracted %d cookies from browser", len(cookies))
         except Exception as e:
-            print(f"  [Cookie Refresh] Failed to extract cookies: {e}")
+            log.warning("[Cookie Refresh] Failed to extract cookies: %s", e)
 
     async def refresh_cookies(self):
         """Refresh browser session and cookies by revisiting main site"""
@@ -163,7 +346,7 @@ class AsyncBrowserAPIClient:
             self.last_cookie_refresh = time.time()
             self.submission_count = 0
         except Exception as e:
-            print(f"  [Cookie Refresh] Failed: {e}")
+            log.warning("[Cookie Refresh] Failed: %s", e)
 
     async def get_challenge(self):
         """
@@ -211,23 +394,6 @@ class AsyncBrowserAPIClient:
         except Exception:
             return None
 
-    def _wait_for_global_rate_limit(self):
-        """
-        Thread-safe global rate limiter - ensures minimum delay between ANY submissions from server
-        This runs synchronously in executor to properly handle threading locks
-        """
-        import time
-        with AsyncBrowserPool._global_submit_lock:
-            current_time = time.time()
-            time_since_last = current_time - AsyncBrowserPool._global_last_submit
-
-            if time_since_last < AsyncBrowserPool.GLOBAL_SUBMIT_DELAY:
-                wait_time = AsyncBrowserPool.GLOBAL_SUBMIT_DELAY - time_since_last
-                print(f"[Global Rate Limit] Waiting {wait_time:.1f}s before submission...")
-                time.sleep(wait_time)
-
-            AsyncBrowserPool._global_last_submit = time.time()
-
     async def submit_solution(self, address, challenge_id, nonce):
         """
         Submit solution to API using Playwright's page.request API
@@ -244,16 +410,9 @@ class AsyncBrowserAPIClient:
             if self.submission_count >= 50 or time_since_refresh >= 300:
                 await self.refresh_cookies()
 
-            # GLOBAL rate limiting: Ensure minimum delay between ANY submissions from entire server
-            # This prevents bursts of simultaneous submissions from triggering IP-based rate limits
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._wait_for_global_rate_limit)
-
-            # Per-browser rate limiting: ensure at least 10s between submissions per browser
-            # This prevents multiple workers on same browser from triggering 429s
-            time_since_last = current_time - self.last_submit_time
-            if time_since_last < 10.0:
-                await asyncio.sleep(10.0 - time_since_last)
+            # GLOBAL adaptive rate limiting shared by every browser and pool in this process
+            # Speeds up while submissions succeed, backs off on 429/504 and Retry-After
+            await AsyncBrowserPool.submit_rate_limiter.acquire()
 
             self.last_submit_time = time.time()
             self.submission_count += 1
@@ -273,6 +432,7 @@ class AsyncBrowserAPIClient:
                 });
 
                 const status = response.status;
+                const retry_after = response.headers.get('retry-after');
                 let data = null;
 
                 try {
@@ -284,10 +444,11 @@ class AsyncBrowserAPIClient:
                     // Non-JSON response, that's ok
                 }
 
-                return { status, data };
+                return { status, data, retry_after };
             }''', url)
 
             status = response_data['status']
+            AsyncBrowserPool.submit_rate_limiter.observe(status, {'retry-after': response_data.get('retry_after')})
 
             # Parse response based on status
             if status in [200, 201]:
@@ -313,7 +474,7 @@ class AsyncBrowserAPIClient:
                 await self.page.close()
             if self.context:
                 await self.context.close()
-            if self.browser:
+            if self.browser and self.browser is not self.shared_browser:
                 await self.browser.close()
         except:
             pass
@@ -326,22 +487,61 @@ class AsyncBrowserPool:
     """
 
     # GLOBAL rate limiter shared across ALL browser pool instances
-    _global_last_submit = 0
-    _global_submit_lock = threading.Lock()
-    GLOBAL_SUBMIT_DELAY = 10.0  # Minimum seconds between ANY submissions from this server (increased due to site-wide rate limiting)
-
-    def __init__(self, num_browsers=1, headless=False):
+    GLOBAL_SUBMIT_DELAY = 10.0  # Starting seconds between ANY submissions from this server (site-wide rate limiting)
+    GLOBAL_SUBMIT_MAX_RATE = 0.5  # Never more than one submission every 2 seconds
+    submit_rate_limiter = AdaptiveRateLimiter(
+        rate=1 / GLOBAL_SUBMIT_DELAY,
+        min_rate=1 / 60,
+        max_rate=GLOBAL_SUBMIT_MAX_RATE,
+        increase=0.01,
+        name='submit',
+    )
+
+    def __init__(self, num_browsers=1, headless=False, stats_rate=2.0, stats_max_rate=10.0, pages_per_browser=1,
+                 resource_filter=None, min_browsers=None, idle_timeout=300, startup_timeout=120,
+                 shared_browser=False):
         """
         Initialize async browser pool
         Args:
-            num_browsers: Number of browser instances
+            num_browsers: Maximum number of browser instances
             headless: Whether to run headless
+            stats_rate: Starting rate (req/s) for statistics fetches through this pool
+            stats_max_rate: Ceiling for the statistics fetch rate
+            pages_per_browser: Concurrent batch jobs per browser, each on its own page
+            resource_filter: ResourceFilter applied to every browser (None = load everything)
+            min_browsers: Browsers launched up front (default: num_browsers); more are
+                          added while batch jobs are waiting for a free page
+            idle_timeout: Seconds before an idle browser beyond min_browsers is closed (None = never)
+            startup_timeout: Seconds to wait for the first browser before giving up
+            shared_browser: Run every browser as an isolated context in one Chromium
+                            process instead of one process each
         """
         self.num_browsers = num_browsers
+        self.min_browsers = num_browsers if min_browsers is None else max(1, min(min_browsers, num_browsers))
+        self.idle_timeout = idle_timeout
         self.headless = headless
+        self.pages_per_browser = pages_per_browser
+        self.resource_filter = resource_filter
+        self.shared_browser = shared_browser
+        self.chromium = None  # the shared Chromium process (shared_browser mode)
+        self.chromium_lock = None
         self.browsers = []
+        self.launching = 0
         self.current_index = 0
         self.lock = asyncio.Lock()
+        self.idle_browsers = None  # asyncio.Queue with one entry per free page slot (created on the pool loop)
+        self.idle_reaper = None
+        # Interception counters of browsers the idle reaper has closed, added up
+        self.retired_route_stats = {'allowed': 0, 'blocked': 0, 'blocked_by_type': {}, 'bytes_saved_estimate': 0}
+
+        # Adaptive limiter for statistics page fetches (see fetch_wallet_stats.py)
+        self.stats_rate_limiter = AdaptiveRateLimiter(rate=stats_rate, max_rate=stats_max_rate, name='statistics')
+
+        # Startup timing
+        self.started_at = time.monotonic()
+        self.first_browser_seconds = None
+        self.first_result_seconds = None
+        self.startup_error = None
 
         # Event loop runs in dedicated thread
         self.loop = None
@@ -350,26 +550,30 @@ class AsyncBrowserPool:
         self.ready = threading.Event()
         self.shutdown = False
 
-        print(f"Initializing async browser pool with {num_browsers} browser(s)...")
+        if self.min_browsers < num_browsers:
+            log.info("Initializing async browser pool with %d browser(s), up to %d on demand...",
+                     self.min_browsers, num_browsers)
+        else:
+            log.info("Initializing async browser pool with %d browser(s)...", num_browsers)
 
         # Start event loop in dedicated thread
         self.thread = threading.Thread(target=self._run_event_loop, daemon=True)
         self.thread.start()
 
-        # Wait for initialization
-        self.ready.wait(timeout=30)
-        print(f"✓ Async browser pool ready")
+        # Serve as soon as the first browser is ready - the rest keep starting in the background
+        if not self.ready.wait(timeout=startup_timeout) or not self.browsers:
+            reason = self.startup_error or f'no browser ready after {startup_timeout}s'
+            self.close_all()
+            raise RuntimeError(f"Browser pool failed to start: {reason}")
+        log.info("✓ Async browser pool ready (first browser after %.1fs)", self.first_browser_seconds)
 
     def _run_event_loop(self):
         """Run event loop in dedicated thread"""
         self.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self.loop)
 
-        # Initialize browsers
-        self.loop.run_until_complete(self._initialize_browsers())
-
-        # Signal ready
-        self.ready.set()
+        # Browsers start in the background; ready is set when the first one is up
+        self.loop.create_task(self._initialize_browsers())
 
         # Keep loop running
         try:
@@ -378,22 +582,184 @@ class AsyncBrowserPool:
             self.loop.close()
 
     async def _initialize_browsers(self):
-        """Initialize all browser instances (async)"""
-        self.playwright = await async_playwright().start()
+        """Start playwright and launch the first min_browsers browsers concurrently (async)"""
+        self.idle_browsers = asyncio.Queue()
+        self.chromium_lock = asyncio.Lock()
+        try:
+            self.playwright = await async_playwright().start()
+        except Exception as e:
+            self.startup_error = e
+            self.ready.set()
+            return
+
+        if self.idle_timeout is not None and self.min_browsers < self.num_browsers:
+            self.idle_reaper = asyncio.ensure_future(self._reap_idle_browsers())
+
+        self.launching += self.min_browsers
+        await asyncio.gather(*(self._launch_browser() for _ in range(self.min_browsers)))
 
-        for i in range(self.num_browsers):
-            browser = AsyncBrowserAPIClient(self.playwright, headless=self.headless)
+        # Every launch failed - wake the constructor so it can report the error
+        self.ready.set()
+
+    async def _launch_browser(self):
+        """
+        Start one browser and add its page slots to the pool (async)
+        The caller has already counted it in self.launching.
+        """
+        try:
+            shared = await self._shared_chromium() if self.shared_browser else None
+            browser = AsyncBrowserAPIClient(self.playwright, headless=self.headless, max_pages=self.pages_per_browser,
+                                            resource_filter=self.resource_filter, shared_browser=shared)
             await browser.start()
-            self.browsers.append(browser)
-            print(f"  Browser {i+1}/{self.num_browsers} ready")
+        except Exception as e:
+            log.warning("Browser failed to start: %s", e)
+            self.startup_error = e
+            return None
+        finally:
+            self.launching -= 1
+
+        if self.shutdown:
+            await browser.close()
+            return None
+
+        self.browsers.append(browser)
+        for _ in range(self.pages_per_browser):
+            self.idle_browsers.put_nowait(browser)
+        log.info("Browser %d/%d ready", len(self.browsers), self.num_browsers)
+
+        if self.first_browser_seconds is None:
+            self.first_browser_seconds = time.monotonic() - self.started_at
+            self.ready.set()
+        return browser
+
+    async def _shared_chromium(self):
+        """Launch the shared Chromium process on first use (async)"""
+        async with self.chromium_lock:
+            if self.chromium is None:
+                self.chromium = await launch_chromium(self.playwright, self.headless)
+            return self.chromium
+
+    def _scale_up(self):
+        """Launch another browser in the background if the pool is below its maximum"""
+        if len(self.browsers) + self.launching < self.num_browsers:
+            self.launching += 1
+            asyncio.ensure_future(self._launch_browser())
+
+    async def _reap_idle_browsers(self):
+        """Close browsers beyond min_browsers that have been idle for idle_timeout (async)"""
+        while not self.shutdown:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+
+            now = time.monotonic()
+            for browser in list(self.browsers):
+                if len(self.browsers) <= self.min_browsers:
+                    break
+                if browser.active_jobs == 0 and now - browser.last_used >= self.idle_timeout:
+                    self.browsers.remove(browser)
+                    self._drop_idle_slots(browser)
+                    self._add_retired_route_stats(browser.route_stats)
+                    await browser.close()
+                    log.info("Closed idle browser (%d/%d running)", len(self.browsers), self.num_browsers)
+
+    def _drop_idle_slots(self, browser):
+        """Take a closing browser's page slots out of idle_browsers, so the queue only counts live capacity"""
+        slots = []
+        while not self.idle_browsers.empty():
+            slot = self.idle_browsers.get_nowait()
+            if slot is not browser:
+                slots.append(slot)
+        for slot in slots:
+            self.idle_browsers.put_nowait(slot)
+
+    def _add_retired_route_stats(self, route_stats):
+        """Fold a closing browser's interception counters into retired_route_stats"""
+        total = self.retired_route_stats
+        for key in ('allowed', 'blocked', 'bytes_saved_estimate'):
+            total[key] += route_stats[key]
+        for resource_type, count in route_stats['blocked_by_type'].items():
+            total['blocked_by_type'][resource_type] = total['blocked_by_type'].get(resource_type, 0) + count
 
     async def _get_next_browser(self):
         """Get next browser in round-robin (async, with lock)"""
         async with self.lock:
+            self.current_index %= len(self.browsers)
             browser = self.browsers[self.current_index]
-            self.current_index = (self.current_index + 1) % self.num_browsers
+            self.current_index = (self.current_index + 1) % len(self.browsers)
+            browser.last_used = time.monotonic()
             return browser
 
+    async def _checkout_page(self):
+        """Wait for a free page slot and check out a page from that browser (async)"""
+        if self.idle_browsers.empty():
+            self._scale_up()
+
+        browser = await self.idle_browsers.get()
+
+        browser.active_jobs += 1
+        try:
+            return browser, await browser.checkout_page()
+        except Exception:
+            self._checkin_page(browser, None)
+            raise
+
+    def _checkin_page(self, browser, page):
+        """Return a page and its slot"""
+        if page is not None:
+            browser.checkin_page(page)
+        browser.active_jobs -= 1
+        browser.last_used = time.monotonic()
+        self.idle_browsers.put_nowait(browser)
+
+    async def _run_job(self, job, item, timeout):
+        """Run one batch job on the next free page"""
+        browser, page = await self._checkout_page()
+        try:
+            result = await asyncio.wait_for(job(browser, page, item), timeout)
+        finally:
+            self._checkin_page(browser, page)
+
+        if self.first_result_seconds is None:
+            self.first_result_seconds = time.monotonic() - self.started_at
+            log.info("Time to first result: %.1fs", self.first_result_seconds)
+        return result
+
+    def map_as_completed(self, job, items, timeout=30, window=None):
+        """
+        Run `job` over many items at once, one in flight per pooled page
+        Jobs are scheduled on the pool's event loop; results come back in
+        completion order, not input order. Items are pulled from `items`
+        lazily, so it can be a generator over millions of wallets.
+        Args:
+            job: async function (browser, page, item) -> result
+            items: Iterable of job inputs
+            timeout: Seconds allowed per job (None = no limit)
+            window: Jobs scheduled ahead of the free pages (default: 2 per page)
+        Yields: (item, result, error) - error is the exception if the job raised, else None
+        """
+        window = window or self.num_browsers * self.pages_per_browser * 2
+        completed = queue.Queue()
+        in_flight = 0
+
+        def submit(item):
+            future = self._run_async(self._run_job(job, item, timeout))
+            future.add_done_callback(lambda f: completed.put((item, f)))
+
+        def collect():
+            item, future = completed.get()
+            error = future.exception()
+            return item, (None if error else future.result()), error
+
+        for item in items:
+            submit(item)
+            in_flight += 1
+            if in_flight >= window:
+                yield collect()
+                in_flight -= 1
+
+        while in_flight:
+            yield collect()
+            in_flight -= 1
+
     def _run_async(self, coro):
         """
         Run async coroutine from sync context
@@ -438,18 +804,51 @@ class AsyncBrowserPool:
             # Re-raise with more context
             raise Exception(f"{type(e).__name__}: {str(e) if str(e) else 'No error message'}")
 
+    def session_cookies(self, origin, reload=False):
+        """
+        Cookie header for `origin` from the next browser's session
+        Returns: concurrent.futures.Future (wrap with asyncio.wrap_future to await it)
+        """
+        async def _do_session_cookies():
+            browser = await self._get_next_browser()
+            return await browser.origin_cookies(origin, reload)
+
+        return self._run_async(_do_session_cookies())
+
+    def route_summary(self):
+        """
+        Request interception counters (empty if no resource filter is set)
+        Returns: list of (label, route_stats) - one per running browser, then one for
+                 the browsers closed by the idle reaper, if any
+        """
+        if self.resource_filter is None:
+            return []
+        summary = [(f'Browser {i + 1}', browser.route_stats) for i, browser in enumerate(self.browsers)]
+        if self.retired_route_stats['allowed'] or self.retired_route_stats['blocked']:
+            summary.append(('Closed idle browsers', self.retired_route_stats))
+        return summary
+
     def close_all(self):
         """Close all browsers (sync)"""
         if self.shutdown:
             return
 
         async def _do_close_all():
+            if self.idle_reaper is not None:
+                self.idle_reaper.cancel()
+
             for i, browser in enumerate(self.browsers):
                 try:
                     await browser.close()
-                    print(f"  Browser {i+1} closed")
+                    log.debug("Browser %d closed", i + 1)
                 except Exception as e:
-                    print(f"  Error closing browser {i+1}: {e}")
+                    log.warning("Error closing browser %d: %s", i + 1, e)
+
+            if self.chromium:
+                try:
+                    await self.chromium.close()
+                except Exception as e:
+                    log.warning("Error closing shared browser: %s", e)
 
             if self.playwright:
                 await self.playwright.stop()
@@ -466,12 +865,53 @@ class AsyncBrowserPool:
             self.loop.call_soon_threadsafe(self.loop.stop)
 
 
+class BrowserSession:
+    """
+    Browser-issued session for a plain HTTP client (hybrid mode)
+    A browser in the pool visits the API origin to obtain cookies. The cookies are
+    copied onto a PooledStatsClient, which does all the data fetching, and are
+    renewed every `refresh_interval` seconds.
+    """
+
+    def __init__(self, pool, client, origin, refresh_interval=300):
+        """
+        Args:
+            pool: AsyncBrowserPool that owns the session
+            client: PooledStatsClient that receives the cookies
+            origin: Origin of the API the client calls
+            refresh_interval: Seconds between session renewals
+        """
+        self.pool = pool
+        self.client = client
+        self.origin = origin
+        self.refresh_interval = refresh_interval
+        self.refreshes = 0
+
+    async def refresh(self, reload=True):
+        """Renew the browser session and copy its cookies onto the client"""
+        cookie_header = await asyncio.wrap_future(self.pool.session_cookies(self.origin, reload))
+        self.client.update_headers({'Cookie': cookie_header} if cookie_header else {})
+        self.refreshes += 1
+        return cookie_header
+
+    async def keep_fresh(self):
+        """Refresh forever on the interval (run as a task, cancel when done)"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.warning("[Session] Refresh failed, keeping current cookies: %s", e)
+
+
 def test():
     """Test the async browser pool"""
     print("="*80)
     print("Testing Async Browser Pool")
     print("="*80)
 
+    run_log = setup_logging({})
+
     # Create pool
     pool = AsyncBrowserPool(num_browsers=1, headless=False)
 
@@ -489,6 +929,7 @@ def test():
         print(f"   Response: {challenge}")
 
     pool.close_all()
+    run_log.close()
 
     print("\n" + "="*80)
     print("✓ Test complete - ready for production use")
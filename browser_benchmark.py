@@ -0,0 +1,130 @@
+#!/usr/bin/env python3.11
+"""
+Benchmark browser pool layouts: one Chromium per worker vs one shared Chromium
+
+For each worker count, starts the workers the way AsyncBrowserPool does
+(concurrently) and measures the time until every worker has a loaded page,
+then the memory of the Chromium process tree:
+    separate - one Chromium process per worker, each with its own context
+    shared   - one Chromium process, one isolated context per worker
+
+Memory is read from /proc (Linux only). RSS double-counts pages that the
+processes share. PSS splits shared pages between them, so it is the better
+estimate of the real total.
+
+Usage:
+    python3.11 browser_benchmark.py [--workers 1,4,16] [--url URL] [--headed]
+
+Example:
+    python3.11 browser_benchmark.py --workers 1,4,16
+"""
+import os
+import sys
+import time
+import asyncio
+from playwright.async_api import async_playwright
+from cli_options import split_options
+from browser_api_client_async import launch_chromium, new_browser_context
+
+DEFAULT_URL = 'data:text/html,<p>ready</p>'
+
+
+def _process_tree(root_pid):
+    """PIDs of every descendant of root_pid"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids = []
+    stack = [root_pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            pids.append(child)
+            stack.append(child)
+    return pids
+
+
+def chromium_memory():
+    """
+    Total RSS and PSS (bytes) of the Chromium processes started by this script
+    Returns: (rss, pss, process_count)
+    """
+    rss = pss = count = 0
+    for pid in _process_tree(os.getpid()):
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                command = f.read().split(b'\0')[0]
+            if b'chrom' not in command and b'headless_shell' not in command:
+                continue  # the Playwright driver (node) is the same in both layouts
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1]) * 1024
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+        count += 1
+    return rss, pss, count
+
+
+async def start_worker(playwright, headless, url, shared=None):
+    """Start one worker: its own process (or the shared one), a context and a loaded page"""
+    browser = shared or await launch_chromium(playwright, headless)
+    context = await new_browser_context(browser)
+    page = await context.new_page()
+    await page.goto(url)
+    return browser, context
+
+
+async def bench_layout(playwright, layout, workers, headless, url):
+    """Start `workers` workers in the given layout and measure startup time and memory"""
+    start = time.perf_counter()
+    shared = await launch_chromium(playwright, headless) if layout == 'shared' else None
+    started = await asyncio.gather(*(start_worker(playwright, headless, url, shared) for _ in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    rss, pss, processes = chromium_memory()
+
+    for browser, context in started:
+        await context.close()
+    for browser in {browser for browser, _ in started}:
+        await browser.close()
+
+    return elapsed, rss, pss, processes
+
+
+async def run(levels, headless, url):
+    async with async_playwright() as playwright:
+        print(f"  {'layout':<9} {'workers':>7} {'startup':>9} {'RSS':>10} {'PSS':>10} {'processes':>10}")
+        for workers in levels:
+            for layout in ('separate', 'shared'):
+                elapsed, rss, pss, processes = await bench_layout(playwright, layout, workers, headless, url)
+                print(f"  {layout:<9} {workers:>7} {elapsed:8.2f}s {rss / 2**20:8.0f}MB "
+                      f"{pss / 2**20:8.0f}MB {processes:>10}")
+
+
+def main():
+    args, options = split_options(sys.argv[1:], flags=('headed',))
+    levels = [int(n) for n in options.get('workers', '1,4,16').split(',')]
+    url = options.get('url', DEFAULT_URL)
+    headless = not options.get('headed', False)
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        print("Error: memory measurement needs Linux /proc (smaps_rollup)")
+        sys.exit(1)
+
+    print(f"Benchmarking browser layouts at {', '.join(map(str, levels))} workers ({url})")
+    asyncio.run(run(levels, headless, url))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3.11
+"""
+Durable result journal for resumable runs
+
+Completed wallet results are appended to a JSON Lines journal as they arrive.
+Writes are grouped into commits (every `commit_every` records or
+`commit_interval` seconds, whichever comes first), and each commit is
+fsync'ed. A crash loses at most one uncommitted group, not the whole batch.
+
+On restart, load() returns the addresses already in the journal so the run
+can skip them. Results that ended in an error are not counted as done, so
+they are fetched again.
+"""
+import os
+import json
+import time
+
+DEFAULT_COMMIT_EVERY = 100
+DEFAULT_COMMIT_INTERVAL = 5.0
+
+
+def iter_journal(path):
+    """Yield every complete record in a journal file (a torn final line is skipped)"""
+    if not os.path.exists(path):
+        return
+
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                return  # partially written last line from a crash
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class ResultJournal:
+    """
+    Append-only JSON Lines journal of wallet results with batched fsync
+    """
+
+    def __init__(self, path, commit_every=DEFAULT_COMMIT_EVERY, commit_interval=DEFAULT_COMMIT_INTERVAL):
+        """
+        Initialize journal
+        Args:
+            path: Journal file path (created if missing)
+            commit_every: Records per commit
+            commit_interval: Maximum seconds a record may wait before being committed
+        """
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+
+        self.file = None
+        self.pending = []
+        self.last_commit = time.monotonic()
+        self.committed = 0
+
+    def load(self):
+        """
+        Read the existing journal and open it for appending
+        Returns: set of addresses that already have a successful result
+        """
+        done = set()
+        for record in iter_journal(self.path):
+            if 'error' in record:
+                done.discard(record['address'])
+            else:
+                done.add(record['address'])
+
+        self._truncate_torn_tail()
+        self.file = open(self.path, 'ab')
+        return done
+
+    def _truncate_torn_tail(self):
+        """Drop a partially written last line so new records start on a fresh line"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+
+            # Walk back to the last newline
+            end = size
+            while end > 0:
+                step = min(4096, end)
+                f.seek(end - step)
+                chunk = f.read(step)
+                newline = chunk.rfind(b'\n')
+                if newline != -1:
+                    end = end - step + newline + 1
+                    break
+                end -= step
+
+            if end != size:
+                f.truncate(end)
+
+    def write(self, stats):
+        """Queue a result, committing when the batch or interval is reached"""
+        if self.file is None:
+            self.load()
+
+        self.pending.append(json.dumps(stats, separators=(',', ':')).encode() + b'\n')
+
+        if (len(self.pending) >= self.commit_every
+                or time.monotonic() - self.last_commit >= self.commit_interval):
+            self.commit()
+
+    def commit(self):
+        """Write queued results and fsync them to disk"""
+        if self.pending:
+            self.file.write(b''.join(self.pending))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.committed += len(self.pending)
+            self.pending = []
+        self.last_commit = time.monotonic()
+
+    def close(self):
+        """Commit anything pending and close the journal"""
+        if self.file is not None:
+            self.commit()
+            self.file.close()
+            self.file = None
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3.11
+"""
+Minimal command line option handling shared by the fetcher scripts
+
+The scripts keep their original positional arguments
+(<wallet_file> [start_index] [batch_size]) and accept extra options
+anywhere on the command line as `--name value`, `--name=value`, or bare
+`--flag` for switches that take no value.
+"""
+import sys
+import glob
+
+
+def split_options(argv, flags=()):
+    """
+    Split command line arguments into positionals and options
+    Args:
+        argv: Arguments without the program name (sys.argv[1:])
+        flags: Option names that take no value, with underscores (e.g. ('resume',))
+    Returns: (positional_args, options) where options maps name -> value
+             (option names use underscores, bare flags map to True)
+    """
+    args = []
+    options = {}
+
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('--') and len(arg) > 2:
+            name = arg[2:]
+            if '=' in name:
+                name, value = name.split('=', 1)
+            elif name.replace('-', '_') in flags:
+                value = True
+            elif i + 1 < len(argv):
+                i += 1
+                value = argv[i]
+            else:
+                print(f"Error: Option '--{name}' requires a value")
+                sys.exit(1)
+            options[name.replace('-', '_')] = value
+        else:
+            args.append(arg)
+        i += 1
+
+    return args, options
+
+
+def expand_paths(patterns):
+    """File paths from arguments, expanding quoted glob patterns (each pattern's matches sorted)"""
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+    return paths
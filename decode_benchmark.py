@@ -0,0 +1,120 @@
+#!/usr/bin/env python3.11
+"""
+Micro-benchmark of statistics response decoding
+
+Times StatsDecoder over recorded response bodies for every available JSON
+backend, with full decoding and with selective field extraction. Also checks
+that every variant gives the same records as a full stdlib decode.
+
+Fixtures come from one of:
+    --fixtures FILE     Response bodies, one per line (e.g. saved from the API)
+    --from-cache FILE   Raw payloads stored in a cache by a run with --keep-raw
+    (neither)           Synthetic bodies shaped like the API's, with a 'global'
+                        section of --global-entries leaderboard entries
+
+Usage:
+    python3.11 decode_benchmark.py [num_responses] [options]
+
+Options:
+    --global-entries N  Entries in the synthetic 'global' section (default: 50)
+    --repeat N          Timed passes per variant, the best one is reported (default: 5)
+
+Example:
+    python3.11 decode_benchmark.py 20000 --global-entries 200
+    python3.11 decode_benchmark.py --from-cache stats_cache.sqlite
+"""
+import sys
+import json
+import time
+import sqlite3
+from cli_options import split_options
+from stub_stats_server import stub_stats_payload
+from stats_decoder import StatsDecoder
+from benchmark import make_addresses
+
+
+def synthetic_fixtures(count, global_entries=50):
+    """Response bodies with the stub's local fields and a leaderboard-like global section"""
+    leaderboard = [{'rank': i + 1, 'address': f'addr1{i:040d}', 'crypto_receipts': 1000 - i,
+                    'night_allocation': (1000 - i) * 1_234_567, 'share': round(1 / (i + 2), 6)}
+                   for i in range(global_entries)]
+    bodies = []
+    for address in make_addresses(count):
+        payload = stub_stats_payload(address)
+        payload['global'] = {'wallets': 1_000_000, 'crypto_receipts': 123_456_789, 'leaderboard': leaderboard}
+        bodies.append(json.dumps(payload))
+    return bodies
+
+
+def load_fixtures(path):
+    """Response bodies from a file, one per line"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_cache_payloads(path):
+    """Raw payloads kept in a StatsCache file"""
+    db = sqlite3.connect(path)
+    try:
+        return [row[0] for row in db.execute('SELECT payload FROM stats WHERE payload IS NOT NULL')]
+    finally:
+        db.close()
+
+
+def bench_decoder(decoder, addresses, bodies, repeat):
+    """Best time over `repeat` passes, and the records of the last pass"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = [decoder.decode(address, body) for address, body in zip(addresses, bodies)]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, records
+
+
+def main():
+    args, options = split_options(sys.argv[1:])
+    count = int(args[0]) if args else 10000
+    repeat = int(options.get('repeat', 5))
+
+    if 'fixtures' in options:
+        bodies = load_fixtures(options['fixtures'])
+        source = options['fixtures']
+    elif 'from_cache' in options:
+        bodies = load_cache_payloads(options['from_cache'])
+        source = f"cache {options['from_cache']}"
+    else:
+        bodies = synthetic_fixtures(count, int(options.get('global_entries', 50)))
+        source = 'synthetic'
+    if not bodies:
+        print("Error: No response bodies to decode")
+        sys.exit(1)
+
+    addresses = make_addresses(len(bodies))
+    raw = [body.encode() for body in bodies]  # curl_cffi hands the direct fetcher bytes
+    size = sum(len(body) for body in raw) / len(raw)
+    print(f"Decoding {len(bodies)} responses ({source}, {size:.0f} bytes on average), best of {repeat}")
+
+    reference = None
+    baseline = None
+    for backend in ('json', 'orjson'):
+        try:
+            StatsDecoder(backend)
+        except ImportError:
+            print(f"  {backend:<8} not installed, skipped")
+            continue
+
+        for selective in (False, True):
+            decoder = StatsDecoder(backend, selective=selective)
+            elapsed, records = bench_decoder(decoder, addresses, raw, repeat)
+            if reference is None:
+                reference, baseline = records, elapsed
+            label = f"{backend} {'selective' if selective else 'full'}"
+            summary = decoder.summary()
+            print(f"  {label:<18} {elapsed / len(raw) * 1e6:8.2f} us/response  {baseline / elapsed:5.2f}x  "
+                  f"same={records == reference} "
+                  f"(selective {summary['extracted'] // repeat}, full {summary['decoded'] // repeat})")
+
+
+if __name__ == '__main__':
+    main()
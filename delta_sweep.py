@@ -0,0 +1,330 @@
+#!/usr/bin/env python3.11
+"""
+Incremental sweeps: only re-fetch wallets that are due, and report what changed
+
+A state file (SQLite) keeps the last known statistics for every address, the
+history of its changes, and when it is next due. After each fetch the wallet's
+check interval is reset to --base-interval if its numbers changed. If they did
+not change, the interval doubles, up to --max-interval. Wallets whose
+solutions and NIGHT have settled are therefore checked less and less often,
+while active wallets stay on the short interval. Wallets that are not due are
+written to the output from the state file, without a request.
+
+The batch is swept in chunks of SWEEP_CHUNK wallets. The due wallets of a
+chunk are fetched stalest first (never fetched, then longest since their last
+fetch), and the chunk is written in input order once they are done.
+
+At the end a delta report lists the wallets that changed since their
+previous fetch.
+
+Usage:
+    python3.11 delta_sweep.py <wallet_file> [start_index] [batch_size] [options]
+
+Options:
+    --state FILE        Sweep state file (default: .wallet_stats_state.sqlite)
+    --base-interval S   Check interval for wallets that just changed (default: 3600)
+    --max-interval S    Longest interval for settled wallets (default: 604800 = 7 days)
+    --full              Fetch every wallet regardless of schedule
+    --delta-output FILE Also write the changes as JSON Lines to FILE
+    --concurrency N     Maximum requests in flight (default: 10)
+    --rate R            Starting request rate (default: 10/s)
+    --max-rate R        Request rate ceiling (default: 50/s)
+    --output-format F   json, jsonl, csv or columnar (default: json)
+    --output FILE       Output file (default: wallet_stats_sweep_<start>_<end>.<ext>)
+    --stats-url URL     Statistics URL template, e.g. a stub server for testing
+
+Example:
+    python3.11 delta_sweep.py wallets.json --output-format jsonl
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+from itertools import islice
+from cli_options import split_options
+from wallet_reader import count_wallets, iter_wallet_addresses
+from result_writers import open_writer, output_extension, WRITER_FORMATS
+from rate_limiter import AdaptiveRateLimiter
+from retry_queue import RetryQueue, is_failure
+from fetch_wallet_stats_direct import (create_client, iter_wallet_stats, DEFAULT_CONCURRENCY,
+                                       DEFAULT_RATE, DEFAULT_MAX_RATE)
+
+DEFAULT_STATE_FILE = '.wallet_stats_state.sqlite'
+DEFAULT_BASE_INTERVAL = 3600  # seconds
+DEFAULT_MAX_INTERVAL = 7 * 24 * 3600
+COMMIT_EVERY = 500
+SWEEP_CHUNK = 10000  # wallets planned, fetched and written together
+
+
+class SweepState:
+    """
+    Last known statistics, change history and next due time per address
+    """
+
+    def __init__(self, path=DEFAULT_STATE_FILE, base_interval=DEFAULT_BASE_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL):
+        """
+        Initialize state
+        Args:
+            path: SQLite state file
+            base_interval: Seconds until a wallet that just changed (or is new) is due again
+            max_interval: Upper bound on the interval for wallets that keep not changing
+        """
+        self.path = path
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS wallets (
+                address TEXT PRIMARY KEY,
+                solutions INTEGER NOT NULL,
+                night REAL NOT NULL,
+                last_fetched REAL NOT NULL,
+                last_changed REAL NOT NULL,
+                unchanged_runs INTEGER NOT NULL,
+                next_due REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS history (
+                address TEXT NOT NULL,
+                changed_at REAL NOT NULL,
+                solutions INTEGER NOT NULL,
+                night REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS history_address ON history (address, changed_at);
+        ''')
+        self.uncommitted = 0
+
+    def get(self, address):
+        """Stored row for an address as a dict, or None if never fetched"""
+        row = self.db.execute(
+            'SELECT solutions, night, last_fetched, unchanged_runs, next_due FROM wallets WHERE address = ?',
+            (address,),
+        ).fetchone()
+        if row is None:
+            return None
+        solutions, night, last_fetched, unchanged_runs, next_due = row
+        return {'solutions': solutions, 'night': night, 'last_fetched': last_fetched,
+                'unchanged_runs': unchanged_runs, 'next_due': next_due}
+
+    def interval(self, unchanged_runs):
+        """Seconds until the next check after `unchanged_runs` fetches in a row without a change"""
+        return min(self.max_interval, self.base_interval * 2 ** min(unchanged_runs, 32))
+
+    def update(self, stats, previous=None):
+        """
+        Record a successful fetch and schedule the next one
+        Args:
+            stats: Result record
+            previous: The address's row from get() (None if new)
+        Returns: a change dict if the wallet is new or its numbers changed, else None
+        """
+        now = time.time()
+        address, solutions, night = stats['address'], stats['solutions'], stats['night']
+        changed = previous is None or previous['solutions'] != solutions or previous['night'] != night
+        unchanged_runs = 0 if changed else previous['unchanged_runs'] + 1
+
+        self.db.execute(
+            'INSERT INTO wallets (address, solutions, night, last_fetched, last_changed, unchanged_runs, next_due) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (address) DO UPDATE SET solutions = excluded.solutions, night = excluded.night, '
+            'last_fetched = excluded.last_fetched, unchanged_runs = excluded.unchanged_runs, '
+            'next_due = excluded.next_due, '
+            'last_changed = CASE WHEN excluded.unchanged_runs = 0 THEN excluded.last_changed ELSE last_changed END',
+            (address, solutions, night, now, now, unchanged_runs, now + self.interval(unchanged_runs)),
+        )
+        if changed:
+            self.db.execute('INSERT INTO history (address, changed_at, solutions, night) VALUES (?, ?, ?, ?)',
+                            (address, now, solutions, night))
+
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+        if not changed:
+            return None
+        return {
+            'address': address,
+            'new': previous is None,
+            'solutions': solutions,
+            'night': night,
+            'solutions_delta': solutions - (previous['solutions'] if previous else 0),
+            'night_delta': night - (previous['night'] if previous else 0),
+        }
+
+    def history(self, address):
+        """Every recorded change for an address, oldest first: list of (changed_at, solutions, night)"""
+        return self.db.execute(
+            'SELECT changed_at, solutions, night FROM history WHERE address = ? ORDER BY changed_at', (address,)
+        ).fetchall()
+
+    def commit(self):
+        if self.uncommitted:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def close(self):
+        if self.db is not None:
+            self.commit()
+            self.db.close()
+            self.db = None
+
+
+async def _sweep(addresses, state, sink, client, concurrency, limiter, full, totals, changes, delta_file=None,
+                 stats_url=None):
+    """
+    Sweep the wallets chunk by chunk (see _sweep_chunk), writing results in input order
+    Changed wallets are kept in `changes` for the report; new wallets are only counted
+    (a first sweep would otherwise hold every wallet in memory). With `delta_file`,
+    every change, new wallets included, is also written there as a JSON line.
+    """
+    now = time.time()
+    addresses = iter(addresses)
+    while True:
+        chunk = list(islice(addresses, SWEEP_CHUNK))
+        if not chunk:
+            break
+        await _sweep_chunk(chunk, now, state, sink, client, concurrency, limiter, full, totals, changes, delta_file,
+                           stats_url)
+
+
+async def _sweep_chunk(chunk, now, state, sink, client, concurrency, limiter, full, totals, changes, delta_file,
+                       stats_url):
+    """
+    Fetch the due wallets of one chunk, stalest first, then write the whole chunk in input order
+    Wallets that are not due are answered from the state file. An address listed more than
+    once in the chunk is fetched (and recorded) once.
+    """
+    results = {}
+    previous_rows = {}
+    for address in chunk:
+        if address in results or address in previous_rows:
+            continue
+        row = state.get(address)
+        if full or row is None or row['next_due'] <= now:
+            previous_rows[address] = row
+        else:
+            # Settled or recently checked - answer from the state file
+            results[address] = {'address': address, 'solutions': row['solutions'], 'night': row['night']}
+    # Only wallets that are not due; a repeated due wallet is not a skipped one
+    totals['skipped'] += len(results)
+
+    # Never fetched first, then the longest since the last fetch
+    due = sorted(previous_rows, key=lambda address: (previous_rows[address] or {}).get('last_fetched', -1.0))
+
+    kwargs = {'client': client, 'limiter': limiter, 'retries': RetryQueue()}
+    if stats_url:
+        kwargs['stats_url'] = stats_url
+    async for stats in iter_wallet_stats(due, concurrency, **kwargs):
+        results[stats['address']] = stats
+        if is_failure(stats):
+            totals['failed'] += 1
+            continue
+
+        totals['fetched'] += 1
+        change = state.update(stats, previous_rows[stats['address']])
+        if change is None:
+            continue
+        if delta_file is not None:
+            delta_file.write(json.dumps(change, separators=(',', ':')) + '\n')
+        if change['new']:
+            totals['new'] += 1
+        else:
+            changes.append(change)
+
+    for address in chunk:
+        sink.write(results[address])
+
+
+def print_delta_report(changes, totals):
+    """Summarize what changed since each wallet's previous fetch"""
+    requests_saved = totals['skipped'] / max(1, totals['skipped'] + totals['fetched'] + totals['failed'])
+
+    print("\nDelta report")
+    print(f"  Fetched: {totals['fetched']}  Skipped (not due): {totals['skipped']} ({requests_saved:.0%} of requests saved)"
+          f"  Failed: {totals['failed']}")
+    print(f"  New wallets: {totals['new']}")
+    print(f"  Changed wallets: {len(changes)} "
+          f"(+{sum(c['solutions_delta'] for c in changes)} solutions, "
+          f"+{sum(c['night_delta'] for c in changes):.4f} NIGHT)")
+
+    for c in sorted(changes, key=lambda c: c['night_delta'], reverse=True)[:10]:
+        print(f"    {c['address'][:20]}... {c['solutions_delta']:+d} solutions, {c['night_delta']:+.4f} NIGHT "
+              f"(now {c['solutions']}, {c['night']:.4f})")
+
+
+def main():
+    args, options = split_options(sys.argv[1:], flags=('full',))
+    if len(args) < 1:
+        print("Usage: python3.11 delta_sweep.py <wallet_file> [start_index] [batch_size] [options]")
+        print("\nExample:")
+        print("  python3.11 delta_sweep.py wallets.json --output-format jsonl")
+        sys.exit(1)
+
+    wallet_file = args[0]
+    start_index = int(args[1]) if len(args) > 1 else 0
+    batch_size = int(args[2]) if len(args) > 2 else None
+    state_file = options.get('state', DEFAULT_STATE_FILE)
+    base_interval = float(options.get('base_interval', DEFAULT_BASE_INTERVAL))
+    max_interval = float(options.get('max_interval', DEFAULT_MAX_INTERVAL))
+    full = bool(options.get('full', False))
+    concurrency = int(options.get('concurrency', DEFAULT_CONCURRENCY))
+    rate = float(options.get('rate', DEFAULT_RATE))
+    max_rate = float(options.get('max_rate', DEFAULT_MAX_RATE))
+    output_format = options.get('output_format', 'json')
+    if output_format not in WRITER_FORMATS:
+        print(f"Error: Unknown output format '{output_format}' (choose from {', '.join(WRITER_FORMATS)})")
+        sys.exit(1)
+
+    if not os.path.exists(wallet_file):
+        print(f"Error: Wallet file '{wallet_file}' not found")
+        sys.exit(1)
+
+    try:
+        total_wallets = count_wallets(wallet_file)
+    except (ValueError, KeyError) as e:
+        print(f"Error: Invalid wallet file: {e}")
+        sys.exit(1)
+
+    batch_end = total_wallets if batch_size is None else min(start_index + batch_size, total_wallets)
+    if batch_end <= start_index:
+        print("No wallets to process in this batch")
+        return
+
+    output_file = options.get('output') or f'wallet_stats_sweep_{start_index}_{batch_end}.{output_extension(output_format)}'
+    print(f"Sweeping wallets {start_index} to {batch_end} of {wallet_file} (state: {state_file})...")
+
+    state = SweepState(state_file, base_interval, max_interval)
+    sink = open_writer(output_file, output_format)
+    client = create_client(pool_size=concurrency)
+    limiter = AdaptiveRateLimiter(rate=rate, max_rate=max_rate, name='statistics')
+    totals = {'fetched': 0, 'skipped': 0, 'failed': 0, 'new': 0}
+    changes = []
+    delta_file = open(options['delta_output'], 'w', encoding='utf-8') if 'delta_output' in options else None
+
+    async def run():
+        try:
+            await _sweep(iter_wallet_addresses(wallet_file, start_index, batch_size), state, sink, client,
+                         concurrency, limiter, full, totals, changes, delta_file, options.get('stats_url'))
+        finally:
+            await client.aclose()
+
+    try:
+        asyncio.run(run())
+    finally:
+        sink.close()
+        state.close()
+        if delta_file is not None:
+            delta_file.close()
+
+    print(f"\n✓ Sweep results saved to {output_file}")
+    print_delta_report(changes, totals)
+    if delta_file is not None:
+        print(f"  Changes written to {options['delta_output']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,115 +4,260 @@ Fetch wallet statistics from Midnight API using AsyncBrowserAPIClient
 Uses the same bypass technique as the miners
 
 Usage:
-    python3.11 fetch_wallet_stats.py <wallet_file> [start_index] [batch_size]
+    python3.11 fetch_wallet_stats.py <wallet_file> [start_index] [batch_size] [options]
+
+Options:
+    --journal FILE      Resumable run: append results to FILE as they complete and
+                        skip wallets already in it (batch_size defaults to all wallets)
+    --commit-every N    Journal records per fsync'ed commit (default: 100)
+    --cache FILE        Answer repeat lookups from an on-disk SQLite cache at FILE
+    --cache-ttl S       Seconds a cached result stays valid (default: 3600)
+    --max-age S         Override the age limit for this run (0 = refetch everything)
+    --cache-max-entries N  Evict the oldest entries beyond N (default: 5000000)
+    --rate R            Starting request rate, adapted to 429/504 responses (default: 2/s)
+    --max-rate R        Never exceed R requests/s - the server's stated limit (default: 10/s)
+    --browsers N        Browsers in the pool (default: 3)
+    --min-browsers N    Start with N browsers and add more while fetches are waiting (default: all)
+    --browser-idle-timeout S  Close browsers beyond --min-browsers after S idle seconds (default: 300)
+    --shared-browser    Run every browser as an isolated context in a single Chromium process
+    --hybrid            Use one browser only for the session; fetch statistics with pooled
+                        curl_cffi requests that carry its cookies (rate defaults as direct)
+    --concurrency N     Hybrid mode: maximum requests in flight (default: 10)
+    --session-refresh S Hybrid mode: seconds between browser session refreshes (default: 300)
+    --pages-per-browser N  Concurrent fetches per browser, each on its own page (default: 1)
+    --fetch-batch N     Wallets fetched together by one in-page fetch() call (default: 10)
+    --block-resources T Abort these resource types in the browser, comma-separated
+                        ('default' = image,media,font,stylesheet,manifest); analytics are always blocked
+    --allow-resources T Abort every resource type except these (document, fetch and xhr always load)
+    --output-format F   json, jsonl, csv or columnar (default: json)
+    --output FILE       Output file (default: wallet_stats_batch_<start>_<end>.<ext>)
+    --stats-url URL     Statistics URL template, e.g. a stub server for testing
+    --metrics-port N    Serve per-request timing metrics on http://127.0.0.1:N/metrics
+    --metrics-output FILE  Write the timing metrics summary to FILE (JSON) at the end
+    --log-level L       debug, info, warning or error (default: info)
+    --log-json FILE     Also write log records as JSON lines to FILE
+    --log-sample N      At most N per-wallet lines per second of each kind (default: 20, 0 = all)
+    --dedup MODE        Normalize addresses, answer invalid ones without a request and fetch
+                        repeated ones once: 'set' (exact) or 'bloom' (fixed memory, huge inputs)
+    --json-backend B    auto, orjson or json (default: auto - orjson when installed)
+    --selective-decode  Read only the needed fields from each response instead of decoding it all
+    --keep-raw          Store each raw response body in the cache (requires --cache)
 
 Example:
     python3.11 fetch_wallet_stats.py wallets.json 0 100
 """
-import json
+import time
 import asyncio
 import sys
 import os
-from browser_api_client_async import AsyncBrowserPool
+from collections import deque
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+from browser_api_client_async import AsyncBrowserPool, BrowserSession, ResourceFilter
+from wallet_reader import count_wallets, iter_wallet_addresses
+from checkpoint import ResultJournal, DEFAULT_COMMIT_EVERY
+from cli_options import split_options
+from result_writers import open_writer, output_extension, WRITER_FORMATS
+from stats_cache import StatsCache, DEFAULT_TTL, DEFAULT_MAX_ENTRIES
+from rate_limiter import parse_retry_after
+from retry_queue import (RetryQueue, failure_record, is_failure, classify_status, classify_exception,
+                         ERROR_PARSE, ERROR_TIMEOUT, ERROR_NETWORK)
+from address_dedup import (DuplicateTracker, find_duplicates, normalize_address, address_error,
+                           invalid_address_record, DEDUP_MODES)
+from request_metrics import RequestMetrics, start_metrics_server, outcome
+from run_log import get_logger, setup_logging
+from stats_decoder import DEFAULT_DECODER
+from fetch_wallet_stats_direct import (create_client, create_decoder, _fetch_batch,
+                                       DEFAULT_CONCURRENCY, DEFAULT_RATE, DEFAULT_MAX_RATE, DEFAULT_REORDER_BUFFER)
+
+STATS_ORIGIN = 'https://scavenger.prod.gd.midnighttge.io'
+STATS_URL = STATS_ORIGIN + '/statistics/{address}'
+DEFAULT_FETCH_BATCH = 10
+
+log = get_logger('browser_fetch')
+
+def _batch_result_stats(pool, address, result, decoder=DEFAULT_DECODER):
+    """Result record for one in-page fetch() result"""
+    if result['error']:
+        error_class = ERROR_TIMEOUT if result['error'] == 'timeout' else ERROR_NETWORK
+        return failure_record(address, result['error'], error_class)
+
+    status = result['status']
+    pool.stats_rate_limiter.observe(status, {
+        'Retry-After': result.get('retry_after'),
+        'X-RateLimit-Remaining': result.get('ratelimit_remaining'),
+        'X-RateLimit-Reset': result.get('ratelimit_reset'),
+    })
+    if status != 200:
+        return failure_record(address, f'HTTP {status}', classify_status(status),
+                              retry_after=parse_retry_after(result.get('retry_after')))
 
-async def fetch_wallet_stats_with_browser(pool, address):
-    """Fetch statistics for a single wallet using browser pool"""
     try:
-        # Use the browser pool's async method directly
-        from concurrent.futures import Future
-
-        # Create async task to fetch via browser
-        async def _fetch():
-            browser = await pool._get_next_browser()
-
-            # Navigate to statistics page
-            url = f'https://scavenger.prod.gd.midnighttge.io/statistics/{address}'
-
-            # Set extra headers to bypass Vercel protection
-            await browser.page.set_extra_http_headers({
-                'Accept': 'application/json',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Upgrade-Insecure-Requests': '1',
-            })
-
-            response = await browser.page.goto(url, wait_until='networkidle', timeout=15000)
-
-            # Debug: print first response status
-            if not hasattr(_fetch, '_status_printed'):
-                print(f"  [Debug] Status: {response.status} for {address[:20]}...")
-                _fetch._status_printed = True
-
-            if response.status != 200:
-                return {'address': address, 'solutions': 0, 'night': 0}
-
-            # Parse JSON
-            try:
-                pre = await browser.page.query_selector('pre')
-                if pre:
-                    json_text = await pre.inner_text()
-                    data = json.loads(json_text)
-
-                    # Extract stats
-                    local = data.get('local', {})
-                    solutions = local.get('crypto_receipts', 0)
-                    night_raw = local.get('night_allocation', 0)
-                    night = night_raw / 1_000_000
-
-                    return {
-                        'address': address,
-                        'solutions': solutions,
-                        'night': night
-                    }
-                else:
-                    # No <pre> tag found, try getting body text
-                    body = await browser.page.query_selector('body')
-                    if body:
-                        json_text = await body.inner_text()
-                        data = json.loads(json_text)
-
-                        # Extract stats
-                        local = data.get('local', {})
-                        solutions = local.get('crypto_receipts', 0)
-                        night_raw = local.get('night_allocation', 0)
-                        night = night_raw / 1_000_000
-
-                        return {
-                            'address': address,
-                            'solutions': solutions,
-                            'night': night
-                        }
-            except Exception as e:
-                # Debug: print first error to see what's going wrong
-                if not hasattr(fetch_wallet_stats_with_browser, '_error_printed'):
-                    print(f"  [Debug] Parse error: {e}")
-                    fetch_wallet_stats_with_browser._error_printed = True
-
-            return {'address': address, 'solutions': 0, 'night': 0}
-
-        # Run the fetch
-        future = pool._run_async(_fetch())
-        return future.result(timeout=30)
+        return decoder.decode(address, result['text'])
+    except (ValueError, AttributeError, TypeError) as e:
+        log.debug("Parse error for %s...: %s", address[:20], e, extra={'sample': True})
+        return failure_record(address, f'Parse error: {e}', ERROR_PARSE)
+
+def stats_origin(stats_url):
+    """Origin (scheme://host[:port]) of a statistics URL template"""
+    parts = urlsplit(stats_url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+async def fetch_stats_on_page(pool, browser, page, addresses, stats_url=STATS_URL, metrics=None,
+                              decoder=DEFAULT_DECODER):
+    """
+    Fetch statistics for several wallets with one in-page fetch() batch
+    With `metrics` (RequestMetrics), page navigation and each request's phases are recorded.
+    `decoder` (a StatsDecoder) turns each response body into the result record.
+    Returns: list of result records in the same order as addresses
+    """
+    try:
+        started = time.perf_counter()
+        if await browser.ensure_origin(page, stats_origin(stats_url)) and metrics is not None:
+            metrics.observe('navigation', time.perf_counter() - started)
+
+        # Shared adaptive rate limit across all browsers in the pool - one slot per request
+        waited = time.perf_counter()
+        for _ in addresses:
+            await pool.stats_rate_limiter.acquire()
+
+        urls = [stats_url.format(address=address) for address in addresses]
+        sent = time.perf_counter()
+        results = await browser.fetch_json_batch(page, urls)
+        received = time.perf_counter()
+
+        log.debug("Status: %s for %s...", results[0]['status'], addresses[0][:20], extra={'sample': True})
+
+        if metrics is None:
+            return [_batch_result_stats(pool, address, result, decoder)
+                    for address, result in zip(addresses, results)]
+
+        # The batch shares one rate wait and one evaluate round-trip; fetch() is timed per request in the page
+        rate_wait = sent - waited
+        extract = max(0.0, received - sent - max(result.get('elapsed_ms') or 0 for result in results) / 1000)
+        records = []
+        for address, result in zip(addresses, results):
+            parsing = time.perf_counter()
+            stats = _batch_result_stats(pool, address, result, decoder)
+            fetch = (result.get('elapsed_ms') or 0) / 1000
+            parse = time.perf_counter() - parsing
+            metrics.record_request({'rate_wait': rate_wait, 'fetch': fetch, 'extract': extract, 'parse': parse,
+                                    'total': rate_wait + fetch + extract + parse}, outcome(stats))
+            records.append(stats)
+        return records
+
+    except Exception as e:
+        log.warning("Error fetching batch of %d from %s...: %s", len(addresses), addresses[0][:20], e)
+        return [failure_record(address, str(e) or type(e).__name__, classify_exception(e)) for address in addresses]
+
+async def fetch_wallet_stats_with_browser(pool, address, cache=None):
+    """Fetch statistics for a single wallet using browser pool (checks the cache first)"""
+    if cache is not None:
+        cached = cache.get(address)
+        if cached is not None:
+            return cached
+
+    async def _fetch():
+        browser, page = await pool._checkout_page()
+        try:
+            (stats,) = await fetch_stats_on_page(pool, browser, page, [address])
+            return stats
+        finally:
+            pool._checkin_page(browser, page)
 
+    try:
+        future = pool._run_async(_fetch())
+        stats = future.result(timeout=30)
     except Exception as e:
-        print(f"  Error fetching {address[:20]}...: {e}")
-        return {'address': address, 'solutions': 0, 'night': 0}
+        log.warning("Error fetching %s...: %s", address[:20], e)
+        stats = failure_record(address, str(e) or type(e).__name__, classify_exception(e))
+
+    if cache is not None:
+        cache.put(stats)
+    return stats
+
+def _chunks(items, size):
+    """Group an iterable into lists of up to `size` items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def _fetch_hybrid(pool, addresses, concurrency, refresh_interval, progress_start, total_wallets, sink,
+                        cache=None, retries=None, dedup=None, stats_url=STATS_URL, metrics=None, progress=None,
+                        decoder=DEFAULT_DECODER):
+    """
+    Hybrid mode: the browser pool only provides the session cookies, and a pooled async
+    curl_cffi client fetches every wallet with the direct fetcher's engine
+    Returns: (totals, client, session) for the summary
+    """
+    client = create_client(pool_size=concurrency)
+    session = BrowserSession(pool, client, stats_origin(stats_url), refresh_interval)
+    await session.refresh(reload=False)
+    refresher = asyncio.ensure_future(session.keep_fresh())
+
+    try:
+        totals = await _fetch_batch(addresses, client, concurrency, progress_start, total_wallets, sink,
+                                    cache, pool.stats_rate_limiter, retries, stats_url=stats_url, dedup=dedup,
+                                    metrics=metrics, progress=progress, decoder=decoder)
+    finally:
+        refresher.cancel()
+    return totals, client, session
 
 def main():
     """Main function to fetch all wallet statistics in batches"""
     # Check for required arguments
-    if len(sys.argv) < 2:
-        print("Usage: python3.11 fetch_wallet_stats.py <wallet_file> [start_index] [batch_size]")
+    args, options = split_options(sys.argv[1:], flags=('shared_browser', 'hybrid', 'selective_decode', 'keep_raw'))
+    if len(args) < 1:
+        print("Usage: python3.11 fetch_wallet_stats.py <wallet_file> [start_index] [batch_size] [options]")
         print("\nExample:")
         print("  python3.11 fetch_wallet_stats.py wallets.json 0 100")
+        print("  python3.11 fetch_wallet_stats.py wallets.json --journal run.jsonl")
         sys.exit(1)
 
-    wallet_file = sys.argv[1]
-    start_index = int(sys.argv[2]) if len(sys.argv) > 2 else 0
-    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    wallet_file = args[0]
+    journal_file = options.get('journal')
+    start_index = int(args[1]) if len(args) > 1 else 0
+    # A journaled run covers the whole file in one invocation unless a batch size is given
+    batch_size = int(args[2]) if len(args) > 2 else (None if journal_file else 100)
+    commit_every = int(options.get('commit_every', DEFAULT_COMMIT_EVERY))
+    cache_file = options.get('cache')
+    cache_ttl = float(options.get('cache_ttl', DEFAULT_TTL))
+    max_age = float(options['max_age']) if 'max_age' in options else None
+    cache_max_entries = int(options.get('cache_max_entries', DEFAULT_MAX_ENTRIES))
+    hybrid = bool(options.get('hybrid', False))
+    concurrency = int(options.get('concurrency', DEFAULT_CONCURRENCY))
+    session_refresh = float(options.get('session_refresh', 300))
+    # Hybrid mode fetches like the direct method, so it starts from the direct rate limits
+    rate = float(options.get('rate', DEFAULT_RATE if hybrid else 2.0))
+    max_rate = float(options.get('max_rate', DEFAULT_MAX_RATE if hybrid else 10.0))
+    # Hybrid mode only needs one browser for the session
+    num_browsers = 1 if hybrid else int(options.get('browsers', 3))
+    min_browsers = int(options['min_browsers']) if 'min_browsers' in options else None
+    browser_idle_timeout = float(options.get('browser_idle_timeout', 300))
+    shared_browser = bool(options.get('shared_browser', False))
+    pages_per_browser = int(options.get('pages_per_browser', 1))
+    fetch_batch = int(options.get('fetch_batch', DEFAULT_FETCH_BATCH))
+    resource_filter = None
+    if 'allow_resources' in options:
+        resource_filter = ResourceFilter(allowed_types=options['allow_resources'].split(','))
+    elif 'block_resources' in options:
+        blocked = options['block_resources']
+        resource_filter = ResourceFilter() if blocked == 'default' else ResourceFilter(blocked_types=blocked.split(','))
+    stats_url = options.get('stats_url', STATS_URL)
+    dedup_mode = options.get('dedup')
+    if dedup_mode is not None and dedup_mode not in DEDUP_MODES:
+        print(f"Error: Unknown dedup mode '{dedup_mode}' (choose from {', '.join(DEDUP_MODES)})")
+        sys.exit(1)
+    output_format = options.get('output_format', 'json')
+    if output_format not in WRITER_FORMATS:
+        print(f"Error: Unknown output format '{output_format}' (choose from {', '.join(WRITER_FORMATS)})")
+        sys.exit(1)
+    decoder = create_decoder(options)
 
     # Check if wallet file exists
     if not os.path.exists(wallet_file):
@@ -122,67 +267,269 @@ def main():
     print(f"Loading wallets from {wallet_file}...")
 
     try:
-        with open(wallet_file, 'r') as f:
-            wallets = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in wallet file: {e}")
+        total_wallets = count_wallets(wallet_file)
+    except (ValueError, KeyError) as e:
+        print(f"Error: Invalid wallet file: {e}")
         sys.exit(1)
 
-    print(f"Found {len(wallets)} wallets")
-    print(f"Processing batch: wallets {start_index} to {min(start_index + batch_size, len(wallets))}")
-
-    # Slice wallets for this batch
-    batch_wallets = wallets[start_index:start_index + batch_size]
+    batch_end = total_wallets if batch_size is None else min(start_index + batch_size, total_wallets)
+    print(f"Found {total_wallets} wallets")
+    print(f"Processing batch: wallets {start_index} to {batch_end}")
 
-    if not batch_wallets:
+    if batch_end <= start_index:
         print("No wallets to process in this batch")
         return
 
-    # Create browser pool with 3 browsers for faster fetching
+    # Stream this batch's addresses straight from the file
+    addresses = iter_wallet_addresses(wallet_file, start_index, batch_size)
+    progress_start = start_index
+
+    dedup = None
+    if dedup_mode is not None:
+        duplicates = find_duplicates(lambda: iter_wallet_addresses(wallet_file, start_index, batch_size),
+                                     dedup_mode, expected_items=batch_end - start_index)
+        dedup = DuplicateTracker(duplicates)
+        print(f"Dedup ({dedup_mode}): {len(duplicates)} addresses listed more than once "
+              f"({sum(duplicates.values()) - len(duplicates)} repeat entries)")
+        addresses = map(normalize_address, addresses)
+
+    journal = None
+    if journal_file:
+        journal = ResultJournal(journal_file, commit_every=commit_every)
+        done = journal.load()
+        if done:
+            print(f"Resuming from journal {journal_file}: {len(done)} wallets already done")
+            addresses = (address for address in addresses if address not in done)
+            progress_start += len(done)
+
+    if journal is not None:
+        sink = journal
+    else:
+        # Results for this batch are written as they arrive
+        output_file = options.get('output') or f'wallet_stats_batch_{start_index}_{batch_end}.{output_extension(output_format)}'
+        sink = open_writer(output_file, output_format)
+
+    cache = None
+    if cache_file:
+        cache = StatsCache(cache_file, ttl=cache_ttl, max_entries=cache_max_entries, max_age=max_age)
+
+    run_log = setup_logging(options)
+
+    # Create browser pool - one statistics fetch in flight per pooled page
     print("Starting browser pool...")
-    pool = AsyncBrowserPool(num_browsers=3, headless=True)
-
-    print(f"\nFetching statistics for {len(batch_wallets)} wallets...")
-    wallet_stats = []
+    try:
+        pool = AsyncBrowserPool(num_browsers=num_browsers, headless=True, stats_rate=rate, stats_max_rate=max_rate,
+                                pages_per_browser=pages_per_browser, resource_filter=resource_filter,
+                                min_browsers=min_browsers, idle_timeout=browser_idle_timeout,
+                                shared_browser=shared_browser)
+    except RuntimeError:
+        # Flush the startup warnings before the error is reported
+        run_log.close()
+        raise
+
+    print(f"\nFetching statistics for {batch_end - progress_start} wallets...")
     successful = 0
-
-    for i, wallet in enumerate(batch_wallets):
-        # Support both {'address': '...'} and plain string formats
-        address = wallet if isinstance(wallet, str) else wallet['address']
-        global_index = start_index + i
-
-        # Fetch stats using browser pool
-        stats = asyncio.run(fetch_wallet_stats_with_browser(pool, address))
-        wallet_stats.append(stats)
-
+    processed = 0
+    failed = 0
+    total_solutions = 0
+    total_night = 0
+    retries = RetryQueue()
+
+    metrics = metrics_server = None
+    if 'metrics_port' in options or 'metrics_output' in options:
+        metrics = RequestMetrics()
+        metrics.add_gauge('rate_limit', 'Current request rate limit (requests/s)',
+                          lambda: pool.stats_rate_limiter.rate)
+        metrics.add_gauge('retry_queue_length', 'Wallets waiting for a retry', lambda: len(retries))
+        if 'metrics_port' in options:
+            metrics_server = start_metrics_server(metrics, int(options['metrics_port']))
+            print(f"Serving metrics on http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+
+    # Results are written in input order: a wallet waiting for a retry holds back up to
+    # `reorder_buffer` later results, after which no new wallets are started until it is final
+    window = deque()  # output slots (futures) in input order
+    reorder_buffer = DEFAULT_REORDER_BUFFER
+    copies = {}  # address -> slots of later occurrences, filled once the first one is final
+    exhausted = False
+
+    async def fetch(browser, page, batch):
+        """Run one attempt for a batch of (address, attempts, slot) items on a pooled page"""
+        results = await fetch_stats_on_page(pool, browser, page, [address for address, _, _ in batch], stats_url,
+                                            metrics, decoder)
+        for (_, attempts, _), stats in zip(batch, results):
+            if is_failure(stats):
+                stats['attempts'] = attempts + 1
+        return results
+
+    def record(stats, slot):
+        """Fill a wallet's slot with its final result (or defer a retryable failure), then the repeat entries' slots"""
+        if is_failure(stats) and retries.schedule(stats, stats.pop('retry_after', None), payload=slot):
+            return
+
+        slot.set_result(stats)
+        if dedup is not None:
+            for copy_slot, copy in zip(copies.pop(stats['address'], ()), dedup.resolve(stats)):
+                copy_slot.set_result(copy)
+
+    def flush():
+        """Write the results at the head of the window that are final, in input order"""
+        while window and window[0].done():
+            write(window.popleft().result())
+            advance()
+
+    def write(stats):
+        """Write a final result and update totals"""
+        nonlocal successful, processed, failed, total_solutions, total_night
+        sink.write(stats)
+        processed += 1
+
+        if is_failure(stats):
+            failed += 1
+            log.warning("✗ %s... - %s (after %d attempts)", stats['address'][:20], stats['error'], stats['attempts'],
+                        extra={'fields': stats})
+            return
+
+        total_solutions += stats['solutions']
+        total_night += stats['night']
         if stats['solutions'] > 0 or stats['night'] > 0:
             successful += 1
-            print(f"  ✓ {address[:20]}... - {stats['solutions']} solutions, {stats['night']:.4f} NIGHT")
-
-        if (i + 1) % 10 == 0:
-            print(f"  Progress: {global_index + 1}/{len(wallets)} ({successful} with earnings)")
-
-        # Rate limiting
-        if (i + 1) % 5 == 0:
-            asyncio.run(asyncio.sleep(1))
-
-    # Close browser pool
-    pool.close_all()
-
-    # Save results for this batch
-    output_file = f'wallet_stats_batch_{start_index}_{start_index + len(batch_wallets)}.json'
-    with open(output_file, 'w') as f:
-        json.dump(wallet_stats, f, indent=2)
-
-    total_solutions = sum(w['solutions'] for w in wallet_stats)
-    total_night = sum(w['night'] for w in wallet_stats)
-
-    print(f"\n✓ Batch statistics saved to {output_file}")
-    print(f"  Wallets with earnings: {successful}/{len(batch_wallets)}")
+            log.info("✓ %s... - %d solutions, %.4f NIGHT", stats['address'][:20], stats['solutions'], stats['night'],
+                     extra={'sample': True, 'fields': stats})
+
+    def pending():
+        """
+        Wallets to fetch: cache misses, with retries that have come due mixed in
+        Each input position gets a slot in the window. Stops early once `reorder_buffer`
+        slots are waiting on an unfinished head; the next call picks up where this one left off.
+        """
+        nonlocal exhausted
+        while True:
+            yield from retries.pop_ready()
+            flush()
+            if len(window) >= reorder_buffer:
+                return
+            address = next(addresses, None)
+            if address is None:
+                exhausted = True
+                return
+
+            slot = Future()
+            window.append(slot)
+            if dedup is not None:
+                if address_error(address):
+                    slot.set_result(invalid_address_record(address))
+                    continue
+                if address in dedup and not dedup.first(address):
+                    # Repeat entry: copy the first occurrence's result (now, or when record() resolves it)
+                    copy = dedup.take(address)
+                    if copy is None:
+                        copies.setdefault(address, []).append(slot)
+                    else:
+                        slot.set_result(copy)
+                    continue
+
+            cached = cache.get(address) if cache is not None else None
+            if cached is not None:
+                record(cached, slot)
+            else:
+                yield (address, 0, slot)
+
+    def advance():
+        """Count a written wallet and update the progress line"""
+        nonlocal fresh_done
+        fresh_done += 1
+        if run_log.progress.due():
+            rate = fresh_done / max(time.monotonic() - started, 1e-9)
+            run_log.progress.show(f"Progress: {progress_start + fresh_done}/{total_wallets} "
+                                  f"({successful} with earnings, {failed} failed, {rate:.1f} wallets/s)")
+
+    def run(items):
+        """Fetch items concurrently across the pool, in batches, and write results in input order as they complete"""
+        # No overall job timeout: each in-page fetch() aborts on its own, while the
+        # rate limiter wait legitimately grows with the batch size
+        batches = _chunks(items, fetch_batch)
+        for batch, results, error in pool.map_as_completed(fetch, batches, timeout=None):
+            if error is not None:
+                results = [failure_record(address, str(error) or type(error).__name__,
+                                          classify_exception(error), attempts + 1)
+                           for address, attempts, _ in batch]
+
+            for (address, attempts, slot), stats in zip(batch, results):
+                if attempts and not is_failure(stats):
+                    retries.record_recovered()
+                if cache is not None:
+                    cache.put(stats)
+                record(stats, slot)
+            flush()
+
+    fresh_done = 0
+    started = time.monotonic()
+    client = session = None
+    try:
+        if hybrid:
+            totals, client, session = asyncio.run(_fetch_hybrid(
+                pool, addresses, concurrency, session_refresh, progress_start, total_wallets, sink, cache, retries,
+                dedup, stats_url, metrics, run_log.progress, decoder
+            ))
+            processed, successful, failed = totals['processed'], totals['successful'], totals['failed']
+            total_solutions, total_night = totals['solutions'], totals['night']
+        else:
+            run(pending())
+
+            # The head of the window is waiting out a retry backoff (or the input has run out):
+            # run retries as they come due, then refill the window
+            while window or not exhausted:
+                time.sleep(retries.next_due_in() or 0)
+                run(pending())
+    finally:
+        sink.close()
+        if cache is not None:
+            cache.close()
+
+        # Close browser pool
+        pool.close_all()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        run_log.close()
+
+    if journal is not None:
+        print(f"\n✓ Results journaled to {journal_file} ({journal.committed} new this run)")
+    else:
+        print(f"\n✓ Batch statistics saved to {output_file}")
+
+    print(f"  Wallets with earnings: {successful}/{processed}")
     print(f"  Total Solutions: {total_solutions}")
     print(f"  Total NIGHT: {total_night:.4f}")
-    print(f"\nTo process next batch, run:")
-    print(f"  xvfb-run -a python3.11 fetch_wallet_stats.py {wallet_file} {start_index + batch_size} {batch_size}")
+    retry_stats = retries.metrics()
+    print(f"  Failed: {failed} (after retries; {retry_stats['recovered']} recovered on retry)")
+    if cache is not None:
+        cache_stats = cache.summary()
+        print(f"  Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    if dedup is not None:
+        print(f"  Dedup: {dedup.saved} repeat entries answered without a request")
+    decoding = decoder.summary()
+    print(f"  Decoding: {decoding['backend']}, {decoding['extracted']} responses read selectively, "
+          f"{decoding['decoded']} fully decoded")
+    if client is not None:
+        connections = client.connection_stats()
+        print(f"  Connections: {connections['connections_opened']} opened, {connections['connections_reused']} reused")
+        print(f"  Browser session refreshes: {session.refreshes}")
+    if pool.first_result_seconds is not None:
+        print(f"  Time to first result: {pool.first_result_seconds:.1f}s")
+    for label, route_stats in pool.route_summary():
+        print(f"  {label}: blocked {route_stats['blocked']} requests "
+              f"(~{route_stats['bytes_saved_estimate'] / 1024:.0f} KB saved), allowed {route_stats['allowed']}")
+    rate_stats = pool.stats_rate_limiter.metrics()
+    print(f"  Rate limit: {rate_stats['rate']:.1f} req/s at end ({rate_stats['throttles']} throttled responses)")
+    if metrics is not None:
+        metrics.print_breakdown()
+        if 'metrics_output' in options:
+            metrics.write_summary(options['metrics_output'])
+            print(f"  Metrics summary saved to {options['metrics_output']}")
+
+    if journal is None:
+        print(f"\nTo process next batch, run:")
+        print(f"  xvfb-run -a python3.11 fetch_wallet_stats.py {wallet_file} {start_index + batch_size} {batch_size}")
 
 if __name__ == '__main__':
     main()
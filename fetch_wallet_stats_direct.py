@@ -6,63 +6,389 @@ Bypasses Vercel protection without needing a full browser
 This is the faster, simpler method that doesn't require X11/Xvfb.
 
 Usage:
-    python3.11 fetch_wallet_stats_direct.py <wallet_file> [start_index] [batch_size]
+    python3.11 fetch_wallet_stats_direct.py <wallet_file> [start_index] [batch_size] [options]
+
+Options:
+    --concurrency N     Maximum requests in flight (default: 10)
+    --pool-size N       Maximum pooled keep-alive connections (default: concurrency)
+    --max-per-host N    Maximum requests in flight per host (default: pool size)
+    --idle-timeout S    Seconds an idle pooled connection is kept (default: 60)
+    --journal FILE      Resumable run: append results to FILE as they complete and
+                        skip wallets already in it (batch_size defaults to all wallets)
+    --commit-every N    Journal records per fsync'ed commit (default: 100)
+    --cache FILE        Answer repeat lookups from an on-disk SQLite cache at FILE
+    --cache-ttl S       Seconds a cached result stays valid (default: 3600)
+    --max-age S         Override the age limit for this run (0 = refetch everything)
+    --cache-max-entries N  Evict the oldest entries beyond N (default: 5000000)
+    --rate R            Starting request rate, adapted to 429/504 responses (default: 10/s)
+    --max-rate R        Never exceed R requests/s - the server's stated limit (default: 50/s)
+    --output-format F   json, jsonl, csv or columnar (default: json)
+    --output FILE       Output file (default: wallet_stats_batch_<start>_<end>.<ext>)
+    --stats-url URL     Statistics URL template, e.g. a stub server for testing
+    --metrics-port N    Serve per-request timing metrics on http://127.0.0.1:N/metrics
+    --metrics-output FILE  Write the timing metrics summary to FILE (JSON) at the end
+    --log-level L       debug, info, warning or error (default: info)
+    --log-json FILE     Also write log records as JSON lines to FILE
+    --log-sample N      At most N per-wallet lines per second of each kind (default: 20, 0 = all)
+    --dedup MODE        Normalize addresses, answer invalid ones without a request and fetch
+                        repeated ones once: 'set' (exact) or 'bloom' (fixed memory, huge inputs)
+    --json-backend B    auto, orjson or json (default: auto - orjson when installed)
+    --selective-decode  Read only the needed fields from each response instead of decoding it all
+    --keep-raw          Store each raw response body in the cache (requires --cache)
 
 Example:
-    python3.11 fetch_wallet_stats_direct.py wallets.json 0 100
+    python3.11 fetch_wallet_stats_direct.py wallets.json 0 100 --concurrency 20
 """
-import json
 import sys
 import os
-from curl_cffi import requests
+import time
+import asyncio
+from collections import deque
+from cli_options import split_options
+from http_client import PooledStatsClient, DEFAULT_IDLE_TIMEOUT, response_timings
+from wallet_reader import count_wallets, iter_wallet_addresses
+from checkpoint import ResultJournal, DEFAULT_COMMIT_EVERY
+from result_writers import open_writer, output_extension, WRITER_FORMATS
+from stats_cache import StatsCache, DEFAULT_TTL, DEFAULT_MAX_ENTRIES
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from retry_queue import (RetryQueue, failure_record, is_failure, classify_status, classify_exception,
+                         ERROR_PARSE)
+from address_dedup import (DuplicateTracker, find_duplicates, normalize_address, address_error,
+                           invalid_address_record, DEDUP_MODES)
+from request_metrics import RequestMetrics, start_metrics_server, outcome
+from run_log import get_logger, setup_logging
+from stats_decoder import StatsDecoder, DEFAULT_DECODER, JSON_BACKENDS
+
+STATS_URL = 'https://scavenger.prod.gd.midnighttge.io/statistics/{address}'
+
+# CRITICAL: API blocks Chrome user-agent but allows curl
+HEADERS = {
+    'User-Agent': 'curl/7.81.0',
+    'Accept': '*/*'
+}
+
+DEFAULT_CONCURRENCY = 10
+DEFAULT_RATE = 10.0      # requests/s to start with
+DEFAULT_MAX_RATE = 50.0  # requests/s ceiling
+DEFAULT_REORDER_BUFFER = 1000  # results held back behind a wallet waiting for a retry
+
+# Shared by fetch_wallet_stats() calls that don't pass their own client
+_default_client = None
+
+log = get_logger('direct')
+
+def create_client(pool_size=DEFAULT_CONCURRENCY, host_concurrency=None, idle_timeout=DEFAULT_IDLE_TIMEOUT, headers=None):
+    """Create a pooled client configured for the statistics API"""
+    return PooledStatsClient(
+        pool_size=pool_size,
+        host_concurrency=host_concurrency or pool_size,
+        idle_timeout=idle_timeout,
+        impersonate="chrome120",  # Chrome TLS fingerprint impersonation
+        headers=headers or HEADERS,
+        timeout=10,
+    )
 
-def fetch_wallet_stats(address):
-    """Fetch statistics for a single wallet"""
+def create_decoder(options):
+    """StatsDecoder from command line options (--json-backend, --selective-decode, --keep-raw)"""
+    backend = options.get('json_backend', 'auto')
+    if backend not in JSON_BACKENDS:
+        print(f"Error: Unknown JSON backend '{backend}' (choose from {', '.join(JSON_BACKENDS)})")
+        sys.exit(1)
+    keep_raw = bool(options.get('keep_raw', False))
+    if keep_raw and 'cache' not in options:
+        print("Error: --keep-raw stores response bodies in the cache, so it requires --cache")
+        sys.exit(1)
     try:
-        # Use curl_cffi with Chrome TLS fingerprint impersonation
-        session = requests.Session(impersonate="chrome120")
+        return StatsDecoder(backend, selective=bool(options.get('selective_decode', False)), keep_raw=keep_raw)
+    except ImportError:
+        print("Error: --json-backend orjson requires orjson (pip install orjson)")
+        sys.exit(1)
 
-        # CRITICAL: API blocks Chrome user-agent but allows curl
-        headers = {
-            'User-Agent': 'curl/7.81.0',
-            'Accept': '*/*'
-        }
+def _response_stats(address, response, decoder=DEFAULT_DECODER):
+    """Result record for a response - a failure record for non-200 or an unreadable body"""
+    if response.status_code != 200:
+        return failure_record(address, f'HTTP {response.status_code}', classify_status(response.status_code),
+                              retry_after=parse_retry_after(response.headers.get('Retry-After')))
 
-        url = f'https://scavenger.prod.gd.midnighttge.io/statistics/{address}'
+    try:
+        return decoder.decode(address, response.content)
+    except (ValueError, AttributeError, TypeError) as e:
+        return failure_record(address, f'Parse error: {e}', ERROR_PARSE)
+
+def fetch_wallet_stats(address, stats_url=STATS_URL, client=None, cache=None, limiter=None, decoder=DEFAULT_DECODER):
+    """Fetch statistics for a single wallet (reuses a pooled connection, checks the cache first)"""
+    global _default_client
+    if cache is not None:
+        cached = cache.get(address)
+        if cached is not None:
+            return cached
+
+    try:
+        if client is None:
+            if _default_client is None:
+                _default_client = create_client()
+            client = _default_client
 
-        response = session.get(url, headers=headers, timeout=10)
+        url = stats_url.format(address=address)
 
-        if response.status_code != 200:
-            return {'address': address, 'solutions': 0, 'night': 0}
+        if limiter is not None:
+            limiter.acquire_sync()
 
-        data = response.json()
+        response = client.get(url)
 
-        # Extract stats
-        local = data.get('local', {})
-        solutions = local.get('crypto_receipts', 0)
-        night_raw = local.get('night_allocation', 0)
-        night = night_raw / 1_000_000
+        if limiter is not None:
+            limiter.observe(response.status_code, response.headers)
 
-        return {
-            'address': address,
-            'solutions': solutions,
-            'night': night
-        }
+        stats = _response_stats(address, response, decoder)
     except Exception as e:
-        return {'address': address, 'solutions': 0, 'night': 0, 'error': str(e)}
+        return failure_record(address, str(e), classify_exception(e))
+
+    if cache is not None:
+        cache.put(stats)
+    return stats
+
+async def fetch_wallet_stats_async(client, semaphore, address, stats_url=STATS_URL, cache=None, limiter=None,
+                                   attempts=1, metrics=None, decoder=DEFAULT_DECODER):
+    """
+    Fetch statistics for a single wallet on a shared PooledStatsClient (checks the cache first)
+    `attempts` is this attempt's number, recorded in failure records for the retry policy.
+    With `metrics` (RequestMetrics), the request's phase timings are recorded.
+    `decoder` (a StatsDecoder) turns the response body into the result record.
+    Only the first attempt checks the cache - a retry follows a miss.
+    """
+    if cache is not None and attempts == 1:
+        cached = cache.get(address)
+        if cached is not None:
+            return cached
+
+    async with semaphore:
+        phases = {}
+        started = time.perf_counter()
+        try:
+            url = stats_url.format(address=address)
+
+            if limiter is not None:
+                await limiter.acquire()
+                phases['rate_wait'] = time.perf_counter() - started
+
+            response = await client.aget(url)
+
+            if limiter is not None:
+                limiter.observe(response.status_code, response.headers)
+
+            received = time.perf_counter()
+            stats = _response_stats(address, response, decoder)
+            if metrics is not None:
+                phases['parse'] = time.perf_counter() - received
+                phases.update(response_timings(response))
+        except Exception as e:
+            stats = failure_record(address, str(e), classify_exception(e))
+
+        if metrics is not None:
+            phases['total'] = time.perf_counter() - started
+            metrics.record_request(phases, outcome(stats))
+
+    if is_failure(stats):
+        stats['attempts'] = attempts
+    elif cache is not None:
+        cache.put(stats)
+    return stats
+
+async def iter_wallet_stats(addresses, concurrency=DEFAULT_CONCURRENCY, stats_url=STATS_URL, client=None, cache=None,
+                            limiter=None, retries=None, dedup=None, metrics=None, decoder=DEFAULT_DECODER,
+                            reorder_buffer=DEFAULT_REORDER_BUFFER):
+    """
+    Fetch statistics for many wallets with at most `concurrency` requests in flight
+    Yields results in input order. Each input position holds an output slot that is filled
+    with the wallet's final result, so `addresses` may be any (lazy) iterable and only a
+    bounded window of slots is kept.
+    Failed fetches go to a deferred RetryQueue (`retries`, default policies) and are retried
+    with jittered backoff while fresh fetches continue behind them. A retried wallet keeps its
+    slot until it succeeds or runs out of attempts; up to `reorder_buffer` later results are
+    held back meanwhile, after which fresh fetches wait for it.
+    If no client is given, a pool sized to `concurrency` is created and closed here.
+    With `dedup` (a DuplicateTracker), addresses are normalized, invalid ones get a failure
+    record without a request, and a repeated address is fetched once - its later positions
+    get copies of the first occurrence's final result.
+    """
+    window = deque()  # output slots (futures) in input order
+    window_size = concurrency * 4  # fresh fetches started ahead of the results being yielded
+
+    if retries is None:
+        retries = RetryQueue()
+    fresh_tasks = set()
+    retry_tasks = set()
+
+    owns_client = client is None
+    if owns_client:
+        client = create_client(pool_size=concurrency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    copies = {}  # address -> slots of later occurrences, filled once the first one is final
+
+    def start(address, slot, attempts=1):
+        task = asyncio.ensure_future(
+            fetch_wallet_stats_async(client, semaphore, address, stats_url, cache, limiter, attempts, metrics, decoder)
+        )
+        (fresh_tasks if attempts == 1 else retry_tasks).add(task)
+        task.add_done_callback(lambda task: on_done(task, slot, attempts > 1))
+
+    def dispatch(address):
+        slot = loop.create_future()
+        if dedup is None:
+            start(address, slot)
+            return slot
+        address = normalize_address(address)
+        if address_error(address):
+            slot.set_result(invalid_address_record(address))
+        elif address not in dedup or dedup.first(address):
+            start(address, slot)
+        else:
+            stats = dedup.take(address)
+            if stats is None:
+                copies.setdefault(address, []).append(slot)
+            else:
+                slot.set_result(stats)
+        return slot
+
+    def on_done(task, slot, retried):
+        fresh_tasks.discard(task)
+        retry_tasks.discard(task)
+        if task.cancelled():
+            return
+        stats = task.result()
+        if is_failure(stats):
+            # The retry carries its own slot, so a repeated address can't take another position's
+            if retries.schedule(stats, stats.pop('retry_after', None), payload=slot):
+                return
+        elif retried:
+            retries.record_recovered()
+
+        slot.set_result(stats)
+        if dedup is not None:
+            for copy_slot, copy in zip(copies.pop(stats['address'], ()), dedup.resolve(stats)):
+                copy_slot.set_result(copy)
+
+    def launch_due_retries():
+        for address, attempts, slot in retries.pop_ready():
+            start(address, slot, attempts + 1)
+
+    async def wait_for_progress():
+        # Until some fetch finishes or the next retry comes due
+        launch_due_retries()
+        tasks = fresh_tasks | retry_tasks
+        if tasks:
+            await asyncio.wait(tasks, timeout=retries.next_due_in(), return_when=asyncio.FIRST_COMPLETED)
+        else:
+            await asyncio.sleep(retries.next_due_in() or 0)
+
+    try:
+        for address in addresses:
+            window.append(dispatch(address))
+            launch_due_retries()
+            while window and window[0].done():
+                yield window.popleft().result()
+
+            while len(fresh_tasks) >= window_size or len(window) >= reorder_buffer:
+                await wait_for_progress()
+                while window and window[0].done():
+                    yield window.popleft().result()
+
+        while window:
+            while not window[0].done():
+                await wait_for_progress()
+            yield window.popleft().result()
+    finally:
+        for task in fresh_tasks | retry_tasks:
+            task.cancel()
+        if owns_client:
+            await client.aclose()
+
+async def fetch_all_wallet_stats(addresses, concurrency=DEFAULT_CONCURRENCY, stats_url=STATS_URL, client=None):
+    """Fetch statistics for many wallets concurrently, returning results in input order"""
+    return [stats async for stats in iter_wallet_stats(addresses, concurrency, stats_url, client)]
+
+async def _fetch_batch(addresses, client, concurrency, progress_start, total_wallets, sink, cache=None, limiter=None,
+                       retries=None, quiet=False, stats_url=STATS_URL, dedup=None, metrics=None, progress=None,
+                       decoder=DEFAULT_DECODER):
+    """
+    Run the async engine over one batch, logging results and updating `progress` (a ProgressLine) as they arrive
+    Each result goes straight to `sink` (a result writer or journal) instead of being kept in memory.
+    With `quiet`, only failures are logged (for shard workers running side by side).
+    Returns: running totals for the summary
+    """
+    totals = {'processed': 0, 'successful': 0, 'failed': 0, 'solutions': 0, 'night': 0}
+    started = time.monotonic()
+
+    try:
+        async for stats in iter_wallet_stats(addresses, concurrency, stats_url, client=client, cache=cache,
+                                             limiter=limiter, retries=retries, dedup=dedup, metrics=metrics,
+                                             decoder=decoder):
+            sink.write(stats)
+            totals['processed'] += 1
+
+            if is_failure(stats):
+                totals['failed'] += 1
+                log.warning("✗ %s... - failed after %d attempt(s): %s", stats['address'][:20], stats['attempts'],
+                            stats['error'], extra={'fields': stats})
+            else:
+                totals['solutions'] += stats['solutions']
+                totals['night'] += stats['night']
+
+                if stats['solutions'] > 0 or stats['night'] > 0:
+                    totals['successful'] += 1
+                    if not quiet:
+                        log.info("✓ %s... - %d solutions, %.4f NIGHT", stats['address'][:20], stats['solutions'],
+                                 stats['night'], extra={'sample': True, 'fields': stats})
+
+            if progress is not None and progress.due():
+                rate = totals['processed'] / max(time.monotonic() - started, 1e-9)
+                progress.show(f"Progress: {progress_start + totals['processed']}/{total_wallets} "
+                              f"({totals['successful']} with earnings, {totals['failed']} failed, {rate:.1f} wallets/s)")
+    finally:
+        sink.close()
+        await client.aclose()
+
+    return totals
 
 def main():
     """Main function to fetch wallet statistics in batches"""
     # Check for required arguments
-    if len(sys.argv) < 2:
-        print("Usage: python3.11 fetch_wallet_stats_direct.py <wallet_file> [start_index] [batch_size]")
+    args, options = split_options(sys.argv[1:], flags=('selective_decode', 'keep_raw'))
+    if len(args) < 1:
+        print("Usage: python3.11 fetch_wallet_stats_direct.py <wallet_file> [start_index] [batch_size] [options]")
         print("\nExample:")
-        print("  python3.11 fetch_wallet_stats_direct.py wallets.json 0 100")
+        print("  python3.11 fetch_wallet_stats_direct.py wallets.json 0 100 --concurrency 20")
+        print("  python3.11 fetch_wallet_stats_direct.py wallets.json --journal run.jsonl")
         sys.exit(1)
 
-    wallet_file = sys.argv[1]
-    start_index = int(sys.argv[2]) if len(sys.argv) > 2 else 0
-    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    wallet_file = args[0]
+    journal_file = options.get('journal')
+    start_index = int(args[1]) if len(args) > 1 else 0
+    # A journaled run covers the whole file in one invocation unless a batch size is given
+    batch_size = int(args[2]) if len(args) > 2 else (None if journal_file else 100)
+    concurrency = int(options.get('concurrency', DEFAULT_CONCURRENCY))
+    pool_size = int(options.get('pool_size', concurrency))
+    host_concurrency = int(options.get('max_per_host', pool_size))
+    idle_timeout = int(options.get('idle_timeout', DEFAULT_IDLE_TIMEOUT))
+    commit_every = int(options.get('commit_every', DEFAULT_COMMIT_EVERY))
+    cache_file = options.get('cache')
+    cache_ttl = float(options.get('cache_ttl', DEFAULT_TTL))
+    max_age = float(options['max_age']) if 'max_age' in options else None
+    cache_max_entries = int(options.get('cache_max_entries', DEFAULT_MAX_ENTRIES))
+    rate = float(options.get('rate', DEFAULT_RATE))
+    max_rate = float(options.get('max_rate', DEFAULT_MAX_RATE))
+    stats_url = options.get('stats_url', STATS_URL)
+    dedup_mode = options.get('dedup')
+    if dedup_mode is not None and dedup_mode not in DEDUP_MODES:
+        print(f"Error: Unknown dedup mode '{dedup_mode}' (choose from {', '.join(DEDUP_MODES)})")
+        sys.exit(1)
+    output_format = options.get('output_format', 'json')
+    if output_format not in WRITER_FORMATS:
+        print(f"Error: Unknown output format '{output_format}' (choose from {', '.join(WRITER_FORMATS)})")
+        sys.exit(1)
+    decoder = create_decoder(options)
 
     # Check if wallet file exists
     if not os.path.exists(wallet_file):
@@ -72,56 +398,116 @@ def main():
     print(f"Loading wallets from {wallet_file}...")
 
     try:
-        with open(wallet_file, 'r') as f:
-            wallets = json.load(f)
-    except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in wallet file: {e}")
+        total_wallets = count_wallets(wallet_file)
+    except (ValueError, KeyError) as e:
+        print(f"Error: Invalid wallet file: {e}")
         sys.exit(1)
 
-    print(f"Found {len(wallets)} wallets")
-    print(f"Processing batch: wallets {start_index} to {min(start_index + batch_size, len(wallets))}")
+    batch_end = total_wallets if batch_size is None else min(start_index + batch_size, total_wallets)
+    print(f"Found {total_wallets} wallets")
+    print(f"Processing batch: wallets {start_index} to {batch_end}")
 
-    # Slice wallets for this batch
-    batch_wallets = wallets[start_index:start_index + batch_size]
-
-    if not batch_wallets:
+    if batch_end <= start_index:
         print("No wallets to process in this batch")
         return
 
-    print(f"\nFetching statistics for {len(batch_wallets)} wallets...")
-    wallet_stats = []
-    successful = 0
+    # Stream this batch's addresses straight from the file
+    addresses = iter_wallet_addresses(wallet_file, start_index, batch_size)
+    to_fetch = batch_end - start_index
+
+    dedup = None
+    if dedup_mode is not None:
+        duplicates = find_duplicates(lambda: iter_wallet_addresses(wallet_file, start_index, batch_size),
+                                     dedup_mode, expected_items=to_fetch)
+        dedup = DuplicateTracker(duplicates)
+        print(f"Dedup ({dedup_mode}): {len(duplicates)} addresses listed more than once "
+              f"({sum(duplicates.values()) - len(duplicates)} repeat entries)")
+        addresses = map(normalize_address, addresses)
+
+    journal = None
+    if journal_file:
+        journal = ResultJournal(journal_file, commit_every=commit_every)
+        done = journal.load()
+        if done:
+            print(f"Resuming from journal {journal_file}: {len(done)} wallets already done")
+            addresses = (address for address in addresses if address not in done)
+            to_fetch = None
 
-    for i, wallet in enumerate(batch_wallets):
-        # Support both {'address': '...'} and plain string formats
-        address = wallet if isinstance(wallet, str) else wallet['address']
-        global_index = start_index + i
+    if to_fetch is None:
+        print(f"\nFetching statistics for remaining wallets (concurrency {concurrency})...")
+    else:
+        print(f"\nFetching statistics for {to_fetch} wallets (concurrency {concurrency})...")
 
-        # Fetch stats
-        stats = fetch_wallet_stats(address)
-        wallet_stats.append(stats)
+    if journal is not None:
+        sink = journal
+    else:
+        # Results for this batch are written as they arrive
+        output_file = options.get('output') or f'wallet_stats_batch_{start_index}_{batch_end}.{output_extension(output_format)}'
+        sink = open_writer(output_file, output_format)
 
-        if stats['solutions'] > 0 or stats['night'] > 0:
-            successful += 1
-            print(f"  ✓ {address[:20]}... - {stats['solutions']} solutions, {stats['night']:.4f} NIGHT")
+    cache = None
+    if cache_file:
+        cache = StatsCache(cache_file, ttl=cache_ttl, max_entries=cache_max_entries, max_age=max_age)
 
-        if (i + 1) % 10 == 0:
-            print(f"  Progress: {global_index + 1}/{len(wallets)} ({successful} with earnings)")
+    limiter = AdaptiveRateLimiter(rate=rate, max_rate=max_rate, name='statistics')
+    retries = RetryQueue()
+    client = create_client(pool_size, host_concurrency, idle_timeout)
+    progress_start = start_index if journal is None else start_index + len(done)
+
+    metrics = metrics_server = None
+    if 'metrics_port' in options or 'metrics_output' in options:
+        metrics = RequestMetrics()
+        metrics.add_gauge('rate_limit', 'Current request rate limit (requests/s)', lambda: limiter.rate)
+        metrics.add_gauge('retry_queue_length', 'Wallets waiting for a retry', lambda: len(retries))
+        if 'metrics_port' in options:
+            metrics_server = start_metrics_server(metrics, int(options['metrics_port']))
+            print(f"Serving metrics on http://127.0.0.1:{metrics_server.server_address[1]}/metrics")
+
+    run_log = setup_logging(options)
+    try:
+        totals = asyncio.run(
+            _fetch_batch(addresses, client, concurrency, progress_start, total_wallets, sink, cache, limiter, retries,
+                         stats_url=stats_url, dedup=dedup, metrics=metrics, progress=run_log.progress,
+                         decoder=decoder)
+        )
+    finally:
+        run_log.close()
+        if cache is not None:
+            cache.close()
+        if metrics_server is not None:
+            metrics_server.shutdown()
 
-    # Save results for this batch
-    output_file = f'wallet_stats_batch_{start_index}_{start_index + len(batch_wallets)}.json'
-    with open(output_file, 'w') as f:
-        json.dump(wallet_stats, f, indent=2)
+    if journal is not None:
+        print(f"\n✓ Results journaled to {journal_file} ({journal.committed} new this run)")
+    else:
+        print(f"\n✓ Batch statistics saved to {output_file}")
 
-    total_solutions = sum(w['solutions'] for w in wallet_stats)
-    total_night = sum(w['night'] for w in wallet_stats)
+    print(f"  Wallets with earnings: {totals['successful']}/{totals['processed']}")
+    print(f"  Total Solutions: {totals['solutions']}")
+    print(f"  Total NIGHT: {totals['night']:.4f}")
+    retry_stats = retries.metrics()
+    print(f"  Failed: {totals['failed']} (after retries; {retry_stats['recovered']} recovered on retry)")
+    connections = client.connection_stats()
+    print(f"  Connections: {connections['connections_opened']} opened, {connections['connections_reused']} reused")
+    if cache is not None:
+        cache_stats = cache.summary()
+        print(f"  Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    if dedup is not None:
+        print(f"  Dedup: {dedup.saved} repeat entries answered without a request")
+    rate_stats = limiter.metrics()
+    print(f"  Rate limit: {rate_stats['rate']:.1f} req/s at end ({rate_stats['throttles']} throttled responses)")
+    decoding = decoder.summary()
+    print(f"  Decoding: {decoding['backend']}, {decoding['extracted']} responses read selectively, "
+          f"{decoding['decoded']} fully decoded")
+    if metrics is not None:
+        metrics.print_breakdown()
+        if 'metrics_output' in options:
+            metrics.write_summary(options['metrics_output'])
+            print(f"  Metrics summary saved to {options['metrics_output']}")
 
-    print(f"\n✓ Batch statistics saved to {output_file}")
-    print(f"  Wallets with earnings: {successful}/{len(batch_wallets)}")
-    print(f"  Total Solutions: {total_solutions}")
-    print(f"  Total NIGHT: {total_night:.4f}")
-    print(f"\nTo process next batch, run:")
-    print(f"  python3.11 fetch_wallet_stats_direct.py {wallet_file} {start_index + batch_size} {batch_size}")
+    if journal is None:
+        print(f"\nTo process next batch, run:")
+        print(f"  python3.11 fetch_wallet_stats_direct.py {wallet_file} {start_index + batch_size} {batch_size} --concurrency {concurrency}")
 
 if __name__ == '__main__':
     main()
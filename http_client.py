@@ -0,0 +1,162 @@
+#!/usr/bin/env python3.11
+"""
+Shared keep-alive HTTP client for the statistics API
+
+One PooledStatsClient owns a curl_cffi connection pool that is reused across
+wallets, so each request skips the TLS handshake and connection setup once a
+connection to the API is open. The client counts how many requests opened a
+new connection versus reused a pooled one, for the run summary.
+host_concurrency caps the requests in flight to one host, on both paths: an
+asyncio semaphore per host for aget() and a thread semaphore per host for get().
+It is a concurrency cap, not a connection limit - the pool may still hold more
+idle connections to a host than that.
+response_timings() splits a response's time into phases from curl's timers.
+"""
+import asyncio
+import threading
+from urllib.parse import urlsplit
+from curl_cffi import requests, CurlOpt, CurlInfo
+from curl_cffi.requests import AsyncSession
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_HOST_CONCURRENCY = 10
+DEFAULT_IDLE_TIMEOUT = 60  # seconds an idle connection may sit in the pool
+
+# curl's cumulative timers, in seconds since the transfer started
+TIMING_INFOS = [CurlInfo.NAMELOOKUP_TIME, CurlInfo.CONNECT_TIME, CurlInfo.APPCONNECT_TIME,
+                CurlInfo.PRETRANSFER_TIME, CurlInfo.STARTTRANSFER_TIME, CurlInfo.TOTAL_TIME]
+
+
+def response_timings(response):
+    """
+    Phases of a transfer from curl's timers (seconds)
+    Returns: dict with dns, connect, tls, ttfb (request sent to first byte) and transfer;
+             dns/connect/tls are 0 on a reused connection. Empty if curl reported no timers.
+    """
+    infos = response.infos
+    if CurlInfo.TOTAL_TIME not in infos:
+        return {}
+    namelookup, connect, appconnect, pretransfer, starttransfer, total = (infos.get(info, 0.0)
+                                                                          for info in TIMING_INFOS)
+    return {
+        'dns': namelookup,
+        'connect': max(0.0, connect - namelookup),
+        'tls': max(0.0, appconnect - connect) if appconnect else 0.0,
+        'ttfb': max(0.0, starttransfer - pretransfer),
+        'transfer': max(0.0, total - starttransfer),
+    }
+
+
+class PooledStatsClient:
+    """
+    Reusable HTTP client with a keep-alive connection pool
+    Usable from sync code (get) and from async code (aget) - each side keeps its own pool
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, impersonate="chrome120", headers=None, timeout=10):
+        """
+        Initialize client
+        Args:
+            pool_size: Maximum connections kept open (and concurrent transfers for async)
+            host_concurrency: Maximum requests in flight to a single host (sync and async)
+            idle_timeout: Seconds before an idle pooled connection is closed instead of reused
+            impersonate: curl_cffi browser TLS fingerprint
+            headers: Default request headers
+            timeout: Per-request timeout in seconds
+        """
+        self.pool_size = pool_size
+        self.host_concurrency = host_concurrency
+        self.idle_timeout = idle_timeout
+        self.impersonate = impersonate
+        self.headers = headers or {}
+        self.timeout = timeout
+
+        self.session = None
+        self.async_session = None
+        self.host_semaphores = {}  # host -> asyncio.Semaphore, for aget
+        self.host_thread_semaphores = {}  # host -> threading.BoundedSemaphore, for get
+        self.host_thread_semaphores_lock = threading.Lock()
+
+        self.connections_opened = 0
+        self.connections_reused = 0
+
+    def _session_kwargs(self):
+        return {
+            'impersonate': self.impersonate,
+            'headers': self.headers,
+            'curl_options': {
+                CurlOpt.MAXCONNECTS: self.pool_size,
+                CurlOpt.MAXAGE_CONN: self.idle_timeout,
+            },
+            # NUM_CONNECTS is 0 when the transfer reused a pooled connection
+            'curl_infos': [CurlInfo.NUM_CONNECTS] + TIMING_INFOS,
+        }
+
+    def _record_connection(self, response):
+        """Count whether a response needed a new connection"""
+        if response.infos.get(CurlInfo.NUM_CONNECTS, 1) > 0:
+            self.connections_opened += 1
+        else:
+            self.connections_reused += 1
+
+    def get(self, url, **kwargs):
+        """GET on the shared sync session, limited to host_concurrency in flight per host across threads"""
+        if self.session is None:
+            self.session = requests.Session(**self._session_kwargs())
+
+        host = urlsplit(url).netloc
+        with self.host_thread_semaphores_lock:
+            semaphore = self.host_thread_semaphores.get(host)
+            if semaphore is None:
+                semaphore = self.host_thread_semaphores[host] = threading.BoundedSemaphore(self.host_concurrency)
+
+        with semaphore:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+        self._record_connection(response)
+        return response
+
+    async def aget(self, url, **kwargs):
+        """GET on the shared async session, limited to host_concurrency in flight per host"""
+        if self.async_session is None:
+            self.async_session = AsyncSession(max_clients=self.pool_size, **self._session_kwargs())
+
+        host = urlsplit(url).netloc
+        semaphore = self.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self.host_semaphores[host] = asyncio.Semaphore(self.host_concurrency)
+
+        async with semaphore:
+            response = await self.async_session.get(url, timeout=self.timeout, **kwargs)
+        self._record_connection(response)
+        return response
+
+    def update_headers(self, headers):
+        """Change default headers (e.g. a refreshed Cookie) on the client and any open sessions"""
+        self.headers = {**self.headers, **headers}
+        for session in (self.session, self.async_session):
+            if session is not None:
+                session.headers.update(headers)
+
+    def connection_stats(self):
+        """Connection reuse counters"""
+        total = self.connections_opened + self.connections_reused
+        return {
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'reuse_ratio': self.connections_reused / total if total else 0.0,
+        }
+
+    def close(self):
+        """Close the sync pool"""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    async def aclose(self):
+        """Close the async pool (and the sync pool, if any)"""
+        if self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
+            self.host_semaphores = {}
+        self.close()
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3.11
+"""
+Merge results files into one deduplicated, address-sorted dataset with a report and a lookup index
+
+`merge` streams every input (wallet_stats_batch_*.json files, JSON Lines
+journals, columnar files; anything result_writers can read) and keeps one
+record per address. The last write wins: inputs are applied oldest first
+(by modification time, or in argument order with --order args), and within a
+file a later record replaces an earlier one. Addresses are compared after
+normalization (trimmed, lower-cased) and written normalized.
+
+Memory stays bounded whatever the input size. Records are collected into runs
+of --run-size addresses, and each run is deduplicated, sorted and spilled to
+a temporary file. The runs are then merged in one streaming pass. That pass
+writes the output, sorted by address, and feeds the report. The report holds
+only counters and fixed-bucket histograms, so its distributions are
+estimates.
+
+Sorted output makes lookups cheap. A JSON Lines output gets a sidecar index
+(<output>.idx) with the address and byte offset of every --index-stride-th
+record, so `lookup` reads one block instead of scanning the file. A columnar
+output is binary-searched directly in the memory-mapped address column (the
+writer records in the header whether the addresses are sorted; a columnar file
+that is not sorted is scanned).
+
+Usage:
+    python3.11 merge_results.py merge <output_file> <results_file>... [options]
+    python3.11 merge_results.py lookup <merged_file> <address>...
+
+Merge options:
+    --format F          jsonl or columnar (default: from the output extension, else jsonl)
+    --order O           mtime (oldest file first) or args (default: mtime)
+    --prefer-success    A failed record never replaces an earlier successful one
+    --run-size N        Addresses held in memory per sorted run (default: 200000)
+    --index-stride N    Records per index entry for JSON Lines output (default: 1000)
+    --report FILE       Also write the report as JSON to FILE
+
+Example:
+    python3.11 merge_results.py merge merged.jsonl 'wallet_stats_batch_*.json' run.jsonl --report report.json
+    python3.11 merge_results.py lookup merged.jsonl addr1qx...
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import bisect
+import tempfile
+import itertools
+from cli_options import split_options, expand_paths
+from result_writers import ColumnarResults, iter_result_file, open_writer, COLUMNAR_MAGIC
+from address_dedup import normalize_address
+from request_metrics import Histogram
+from stats_decoder import json_loads
+from wallet_reader import index_path, read_index, write_index
+
+MERGE_FORMATS = ('jsonl', 'columnar')
+DEFAULT_RUN_SIZE = 200_000
+INDEX_STRIDE = 1000
+INDEX_VERSION = 1
+INDEX_KIND = 'merged'
+# Bucket upper bounds for the report's distributions over wallets with earnings
+NIGHT_BUCKETS = tuple(m * 10 ** e for e in range(-3, 7) for m in (1, 2.5, 5))
+SOLUTION_BUCKETS = tuple(m * 10 ** e for e in range(0, 6) for m in (1, 2, 5))
+
+_loads = json_loads('auto')[1]
+
+
+def _is_failure(stats):
+    return 'error' in stats
+
+
+class MergeReport:
+    """
+    Running totals and distributions over the merged records (bounded memory)
+    """
+
+    def __init__(self):
+        self.read = 0        # input records
+        self.superseded = 0  # input records replaced by a later write
+        self.wallets = 0
+        self.failed = 0
+        self.with_earnings = 0
+        self.solutions = 0
+        self.night = 0.0
+        self.night_histogram = Histogram(NIGHT_BUCKETS)
+        self.solution_histogram = Histogram(SOLUTION_BUCKETS)
+        self.sources = {}    # path -> records read
+
+    def add(self, stats):
+        """Count one merged record"""
+        self.wallets += 1
+        if _is_failure(stats):
+            self.failed += 1
+            return
+        self.solutions += stats['solutions']
+        self.night += stats['night']
+        if stats['solutions'] > 0 or stats['night'] > 0:
+            self.with_earnings += 1
+            self.night_histogram.observe(stats['night'])
+            self.solution_histogram.observe(stats['solutions'])
+
+    def summary(self):
+        return {
+            'sources': self.sources,
+            'records_read': self.read,
+            'superseded': self.superseded,
+            'wallets': self.wallets,
+            'failed': self.failed,
+            'with_earnings': self.with_earnings,
+            'solutions': self.solutions,
+            'night': round(self.night, 6),
+            # Estimated from fixed buckets, over wallets with earnings
+            'night_distribution': self.night_histogram.summary(),
+            'solutions_distribution': self.solution_histogram.summary(),
+            'night_buckets': self._buckets(self.night_histogram),
+        }
+
+    @staticmethod
+    def _buckets(histogram):
+        bounds = [str(bound) for bound in histogram.buckets] + ['+Inf']
+        return {bound: count for bound, count in zip(bounds, histogram.counts) if count}
+
+    def print_summary(self):
+        print(f"  Records read: {self.read} ({self.superseded} superseded by a later write)")
+        print(f"  Wallets: {self.wallets}")
+        print(f"  Wallets with earnings: {self.with_earnings}/{self.wallets}")
+        print(f"  Total Solutions: {self.solutions}")
+        print(f"  Total NIGHT: {self.night:.4f}")
+        print(f"  Failed: {self.failed}")
+        if self.with_earnings:
+            night = self.night_histogram.summary()
+            solutions = self.solution_histogram.summary()
+            print(f"  NIGHT per earning wallet (est.): mean {night['mean']:.4f}, p50 {night['p50']:.4f}, "
+                  f"p95 {night['p95']:.4f}, p99 {night['p99']:.4f}, max {night['max']:.4f}")
+            print(f"  Solutions per earning wallet (est.): mean {solutions['mean']:.1f}, p50 {solutions['p50']:.1f}, "
+                  f"p95 {solutions['p95']:.1f}, p99 {solutions['p99']:.1f}, max {solutions['max']:.0f}")
+
+
+def _write_run(records, directory):
+    """Spill one run (address -> record) to a temporary file, sorted by address"""
+    run = tempfile.TemporaryFile('w+', encoding='utf-8', dir=directory)
+    for address in sorted(records):
+        run.write(json.dumps(records[address], separators=(',', ':')))
+        run.write('\n')
+    run.seek(0)
+    return run
+
+
+def _iter_run(run):
+    for line in run:
+        yield _loads(line)
+
+
+def _winner(current, stats, prefer_success):
+    """The record to keep when `stats` is a later write of the same address as `current`"""
+    if prefer_success and _is_failure(stats) and not _is_failure(current):
+        return current
+    return stats
+
+
+def merge_results(paths, writer, run_size=DEFAULT_RUN_SIZE, prefer_success=False, directory=None):
+    """
+    Merge results files into `writer`, one record per address in address order
+    Args:
+        paths: Results files, oldest first (later writes win)
+        writer: A result writer (see result_writers.open_writer)
+        run_size: Addresses held in memory per sorted run
+        prefer_success: Keep the last successful record over a later failure
+        directory: Where temporary run files go (default: the system temp dir)
+    Returns: MergeReport
+    """
+    report = MergeReport()
+    runs = []
+    pending = {}  # address -> winning write so far in this run
+
+    def spill():
+        runs.append(_write_run(pending, directory))
+        pending.clear()
+
+    try:
+        for path in paths:
+            count = 0
+            for stats in iter_result_file(path):
+                address = normalize_address(stats['address'])
+                stats['address'] = address
+                current = pending.get(address)
+                if current is None:
+                    pending[address] = stats
+                else:
+                    pending[address] = _winner(current, stats, prefer_success)
+                    report.superseded += 1
+                count += 1
+                if len(pending) >= run_size:
+                    spill()
+            report.sources[path] = count
+            report.read += count
+        if pending:
+            spill()
+
+        # heapq.merge is stable: for equal addresses, older runs come first
+        merged = heapq.merge(*(_iter_run(run) for run in runs), key=lambda stats: stats['address'])
+        for address, group in itertools.groupby(merged, key=lambda stats: stats['address']):
+            stats = next(group)
+            for later in group:
+                stats = _winner(stats, later, prefer_success)
+                report.superseded += 1
+            writer.write(stats)
+            report.add(stats)
+    finally:
+        for run in runs:
+            run.close()
+    return report
+
+
+def build_index(path, stride=INDEX_STRIDE):
+    """
+    Record the address and byte offset of every `stride`-th record of a sorted JSON Lines file
+    Returns: index dict (also written to the sidecar file when possible)
+    Raises ValueError when the file is not sorted by address.
+    """
+    st = os.stat(path)
+    addresses = []
+    offsets = []
+    count = 0
+    previous = None
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                try:
+                    address = _loads(line)['address']
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path} is not a merged JSON Lines file ({e})") from None
+                if previous is not None and address < previous:
+                    raise ValueError(f"{path} is not sorted by address (use merge_results.py merge to build it)")
+                if count % stride == 0:
+                    addresses.append(address)
+                    offsets.append(offset)
+                previous = address
+                count += 1
+            offset += len(line)
+
+    index = {
+        'kind': INDEX_KIND,
+        'version': INDEX_VERSION,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'stride': stride,
+        'count': count,
+        'addresses': addresses,
+        'offsets': offsets,
+    }
+    write_index(path, index, 'Merge Index')
+    return index
+
+
+def load_index(path):
+    """Load the sidecar index, rebuilding it if missing or stale"""
+    return read_index(path, INDEX_KIND, INDEX_VERSION) or build_index(path)
+
+
+def _addresses_sorted(results):
+    """True if a columnar file's addresses are in ascending order (compared as UTF-8 bytes, like str)"""
+    offsets, data = results.address_offsets, results.address_data
+    previous = b''
+    for i in range(len(results)):
+        address = bytes(data[offsets[i]:offsets[i + 1]])
+        if address < previous:
+            return False
+        previous = address
+    return True
+
+
+class _SortedAddresses:
+    """Sequence view of a columnar file's address column, for bisect"""
+
+    def __init__(self, results):
+        self.results = results
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, i):
+        return self.results.address(i)
+
+
+class MergedResults:
+    """
+    Per-address lookups on a merged (address-sorted) JSON Lines or columnar file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            columnar = f.read(len(COLUMNAR_MAGIC)) == COLUMNAR_MAGIC
+
+        self.columnar = None
+        self.file = None
+        if columnar:
+            self.columnar = ColumnarResults(path)
+            self.addresses = _SortedAddresses(self.columnar)
+            # The writer records whether the addresses came in order; files from before
+            # that flag existed are checked once. An unsorted file is still searchable, by a scan.
+            self.sorted = self.columnar.header.get('sorted')
+            if self.sorted is None:
+                self.sorted = _addresses_sorted(self.columnar)
+        else:
+            self.index = load_index(path)
+            self.file = open(path, 'rb')
+
+    def get(self, address):
+        """The record for an address, or None"""
+        address = normalize_address(address)
+
+        if self.columnar is not None:
+            if not self.sorted:
+                # Latest write first, as merge would resolve it
+                for i in reversed(range(len(self.addresses))):
+                    if self.addresses[i] == address:
+                        return self.columnar.record(i)
+                return None
+            i = bisect.bisect_left(self.addresses, address)
+            if i < len(self.addresses) and self.addresses[i] == address:
+                return self.columnar.record(i)
+            return None
+
+        # The block whose first address is the last one <= address
+        block = bisect.bisect_right(self.index['addresses'], address) - 1
+        if block < 0:
+            return None
+        self.file.seek(self.index['offsets'][block])
+        for _ in range(self.index['stride']):
+            line = self.file.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            stats = _loads(line)
+            if stats['address'] == address:
+                return stats
+            if stats['address'] > address:
+                break
+        return None
+
+    def __len__(self):
+        return len(self.columnar) if self.columnar is not None else self.index['count']
+
+    def close(self):
+        if self.columnar is not None:
+            self.columnar.close()
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cmd_merge(args, options):
+    if len(args) < 2:
+        print("Usage: python3.11 merge_results.py merge <output_file> <results_file>... [options]")
+        sys.exit(1)
+
+    output_file = args[0]
+    extension = os.path.splitext(output_file)[1].lstrip('.')
+    fmt = options.get('format', 'columnar' if extension == 'wcol' else 'jsonl')
+    if fmt not in MERGE_FORMATS:
+        print(f"Error: Unknown merge format '{fmt}' (choose from {', '.join(MERGE_FORMATS)})")
+        sys.exit(1)
+    order = options.get('order', 'mtime')
+    if order not in ('mtime', 'args'):
+        print(f"Error: Unknown order '{order}' (choose from mtime, args)")
+        sys.exit(1)
+
+    paths = expand_paths(args[1:])
+    missing = [path for path in paths if not os.path.exists(path)]
+    if not paths or missing:
+        print(f"Error: Results file '{missing[0] if missing else args[1]}' not found")
+        sys.exit(1)
+    if any(os.path.abspath(path) == os.path.abspath(output_file) for path in paths):
+        print(f"Error: Output file '{output_file}' is also an input")
+        sys.exit(1)
+    if order == 'mtime':
+        paths.sort(key=lambda path: os.stat(path).st_mtime_ns)
+
+    print(f"Merging {len(paths)} results files into {output_file} ({fmt}, last write wins)...")
+    started = time.perf_counter()
+    directory = os.path.dirname(os.path.abspath(output_file))
+    with open_writer(output_file, fmt) as writer:
+        report = merge_results(paths, writer, int(options.get('run_size', DEFAULT_RUN_SIZE)),
+                               bool(options.get('prefer_success', False)), directory)
+
+    if fmt == 'jsonl':
+        index = build_index(output_file, int(options.get('index_stride', INDEX_STRIDE)))
+        print(f"  Index: {len(index['offsets'])} entries in {index_path(output_file)}")
+
+    print(f"\n✓ Merged {report.wallets} wallets into {output_file} in {time.perf_counter() - started:.1f}s")
+    report.print_summary()
+
+    if 'report' in options:
+        with open(options['report'], 'w', encoding='utf-8') as f:
+            json.dump(report.summary(), f, indent=2)
+        print(f"  Report saved to {options['report']}")
+
+
+def cmd_lookup(args, options):
+    if len(args) < 2:
+        print("Usage: python3.11 merge_results.py lookup <merged_file> <address>...")
+        sys.exit(1)
+    if not os.path.exists(args[0]):
+        print(f"Error: Merged file '{args[0]}' not found")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    try:
+        merged = MergedResults(args[0])
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(f"  Opened {args[0]} ({len(merged)} records) in {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    with merged:
+        for address in args[1:]:
+            started = time.perf_counter()
+            stats = merged.get(address)
+            elapsed = (time.perf_counter() - started) * 1000
+            if stats is None:
+                print(f"  {address}: not found ({elapsed:.2f} ms)")
+            else:
+                print(f"  {json.dumps(stats)} ({elapsed:.2f} ms)")
+
+
+COMMANDS = {
+    'merge': cmd_merge,
+    'lookup': cmd_lookup,
+}
+
+
+def main():
+    args, options = split_options(sys.argv[1:], flags=('prefer_success',))
+    if not args or args[0] not in COMMANDS:
+        print("Usage: python3.11 merge_results.py merge|lookup ...")
+        print("\nExample:")
+        print("  python3.11 merge_results.py merge merged.jsonl 'wallet_stats_batch_*.json' --report report.json")
+        print("  python3.11 merge_results.py lookup merged.jsonl addr1qx...")
+        sys.exit(1)
+    COMMANDS[args[0]](args[1:], options)
+
+
+if __name__ == '__main__':
+    main()
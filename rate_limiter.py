@@ -0,0 +1,208 @@
+#!/usr/bin/env python3.11
+"""
+Adaptive rate limiter shared by the direct fetcher and the browser pool
+
+A token bucket whose rate adapts to server feedback (AIMD):
+    - each successful response nudges the rate up (additive increase)
+    - a 429/504 cuts the rate (multiplicative decrease), at most once per
+      refill interval (1 / rate): the throttles of one burst, answered to
+      requests that were already in flight, count as a single congestion signal
+    - Retry-After / X-RateLimit-Reset pause every caller until the given time
+
+The rate never exceeds `max_rate`, which should be set to the server's stated
+limit. Thread-safe: the same limiter can be used from several event loops and
+from plain threads (acquire_sync). SharedRateLimiter keeps its state in shared
+memory so worker processes draw from one global budget.
+"""
+import time
+import asyncio
+import threading
+import multiprocessing
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+THROTTLE_STATUSES = (429, 504)
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket rate limiter with additive increase / multiplicative decrease
+    """
+
+    def __init__(self, rate=5.0, min_rate=0.1, max_rate=50.0, burst=1,
+                 increase=0.5, decrease=0.5, name='requests'):
+        """
+        Initialize limiter
+        Args:
+            rate: Starting rate (requests per second)
+            min_rate: Floor the rate never drops below
+            max_rate: Ceiling - the server's stated limit
+            burst: Requests that may go out back-to-back after an idle period
+            increase: Rate gained per second of successful traffic
+            decrease: Factor applied to the rate on a throttling response
+            name: Label used in metrics and log lines
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.name = name
+
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = float('-inf')
+
+        self.successes = 0
+        self.throttles = 0
+        self.total_wait = 0.0
+
+    def _reserve(self):
+        """Reserve the next send slot, returning how long the caller must wait"""
+        with self.lock:
+            now = time.monotonic()
+            # Idle time banks up to `burst` tokens
+            earliest = now - (self.burst - 1) / self.rate
+            start = max(self.next_slot, earliest, self.paused_until)
+            self.next_slot = start + 1.0 / self.rate
+            wait = max(0.0, start - now)
+            self.total_wait += wait
+            return wait
+
+    async def acquire(self):
+        """Wait (async) until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        """Wait (blocking) until a request may be sent"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        """Record a successful response and raise the rate"""
+        with self.lock:
+            self.successes += 1
+            # Additive increase spread over requests: ~`increase` req/s gained per second at this rate
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after=None):
+        """Record a 429/504 (optionally with Retry-After seconds) and back off"""
+        with self.lock:
+            self.throttles += 1
+            now = time.monotonic()
+            # Throttles within one refill interval of the last cut belong to the same burst
+            if now - self.last_decrease >= 1.0 / self.rate:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.last_decrease = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            # Drop any banked burst so the lower rate applies immediately
+            self.next_slot = max(self.next_slot, now + 1.0 / self.rate)
+
+    def observe(self, status, headers=None):
+        """
+        Feed back a response status and headers
+        Honors Retry-After, and X-RateLimit-Remaining: 0 with X-RateLimit-Reset.
+        """
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+        if status in THROTTLE_STATUSES:
+            self.on_throttle(parse_retry_after(headers.get('retry-after')))
+            return
+
+        if headers.get('x-ratelimit-remaining') == '0':
+            reset = parse_retry_after(headers.get('x-ratelimit-reset'))
+            if reset is not None:
+                # Some servers send an epoch timestamp rather than a delta
+                if reset > 1e9:
+                    reset = max(0.0, reset - time.time())
+                with self.lock:
+                    self.paused_until = max(self.paused_until, time.monotonic() + reset)
+
+        if 200 <= status < 300:
+            self.on_success()
+
+    def metrics(self):
+        """Current rate and counters"""
+        return {
+            'name': self.name,
+            'rate': self.rate,
+            'successes': self.successes,
+            'throttles': self.throttles,
+            'total_wait_seconds': self.total_wait,
+        }
+
+
+class SharedRateLimiter(AdaptiveRateLimiter):
+    """
+    AdaptiveRateLimiter shared by several processes
+    The rate, next send slot, pause and last rate cut live in shared memory behind a process lock,
+    so every worker draws from (and adapts) one global budget. Pass the limiter to
+    worker processes when they are created (e.g. a pool initializer). Counters in
+    metrics() are per process.
+    """
+
+    def __init__(self, rate=5.0, min_rate=0.1, max_rate=50.0, burst=1,
+                 increase=0.5, decrease=0.5, name='requests', context=None):
+        """
+        Initialize limiter (same arguments as AdaptiveRateLimiter)
+        Args:
+            context: multiprocessing context the workers will be started from
+        """
+        self.shared = (context or multiprocessing).Array('d', 4)  # rate, next_slot, paused_until, last_decrease
+        super().__init__(rate, min_rate, max_rate, burst, increase, decrease, name)
+        self.lock = self.shared.get_lock()
+
+    # CLOCK_MONOTONIC is system-wide, so slot times compare across processes
+
+    @property
+    def rate(self):
+        return self.shared[0]
+
+    @rate.setter
+    def rate(self, value):
+        self.shared[0] = value
+
+    @property
+    def next_slot(self):
+        return self.shared[1]
+
+    @next_slot.setter
+    def next_slot(self, value):
+        self.shared[1] = value
+
+    @property
+    def paused_until(self):
+        return self.shared[2]
+
+    @paused_until.setter
+    def paused_until(self, value):
+        self.shared[2] = value
+
+    @property
+    def last_decrease(self):
+        return self.shared[3]
+
+    @last_decrease.setter
+    def last_decrease(self, value):
+        self.shared[3] = value
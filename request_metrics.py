@@ -0,0 +1,209 @@
+#!/usr/bin/env python3.11
+"""
+Per-request timing metrics with a Prometheus-style endpoint
+
+RequestMetrics keeps one histogram per (phase, outcome). Phases are the parts of
+a request the fetchers can time, and the outcome is 'ok' or the error class
+from retry_queue:
+    - direct: rate_wait, dns, connect, tls, ttfb, transfer (from curl's timers), parse
+    - browser: rate_wait, navigation, fetch (timed inside the page), extract
+      (evaluate round-trip back into Python), parse
+    - total: the whole request as the fetcher saw it
+The histograms can be served as Prometheus text on a local HTTP endpoint
+(start_metrics_server) and written as a JSON summary at the end of a run.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the histogram buckets; +Inf is implicit
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = 'wallet_stats'
+OUTCOME_OK = 'ok'
+# Order of phases in the printed breakdown, roughly the order they happen in
+PHASES = ('rate_wait', 'navigation', 'dns', 'connect', 'tls', 'ttfb', 'transfer', 'fetch', 'extract', 'parse', 'total')
+
+
+def outcome(stats):
+    """Outcome label for a result record: 'ok' or its error class"""
+    if stats.get('error') is None:
+        return OUTCOME_OK
+    return stats.get('error_class') or 'unknown'
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate the q-quantile (0-1) by linear interpolation within its bucket (kept within the values seen)"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, bucket_count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else None
+            if seen + bucket_count >= rank and bucket_count:
+                if upper is None:
+                    return self.max
+                lower = max(lower, self.min)
+                return min(self.max, lower + (upper - lower) * (rank - seen) / bucket_count)
+            seen += bucket_count
+            if upper is not None:
+                lower = upper
+        return self.max
+
+    def summary(self):
+        quantiles = {f'p{round(q * 100)}': self.quantile(q) for q in (0.50, 0.95, 0.99)}
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            **{key: None if value is None else round(value, 6) for key, value in quantiles.items()},
+            'max': round(self.max, 6),
+        }
+
+
+class RequestMetrics:
+    """
+    Thread-safe store of per-phase request histograms, request counters and gauges
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {}  # (phase, outcome) -> Histogram
+        self.requests = {}    # outcome -> count
+        self.gauges = {}      # name -> (help, callable)
+        self.lock = threading.Lock()
+
+    def observe(self, phase, seconds, outcome=OUTCOME_OK):
+        """Record one duration for a phase"""
+        with self.lock:
+            histogram = self.histograms.get((phase, outcome))
+            if histogram is None:
+                histogram = self.histograms[(phase, outcome)] = Histogram(self.buckets)
+            histogram.observe(max(0.0, seconds))
+
+    def record_request(self, phases, outcome=OUTCOME_OK):
+        """
+        Record a finished request
+        Args:
+            phases: dict of phase -> seconds (phases that were not timed are left out)
+            outcome: 'ok' or the error class
+        """
+        for phase, seconds in phases.items():
+            if seconds is not None:
+                self.observe(phase, seconds, outcome)
+        with self.lock:
+            self.requests[outcome] = self.requests.get(outcome, 0) + 1
+
+    def add_gauge(self, name, help_text, read):
+        """Expose a live value (e.g. the current rate limit) read on every scrape"""
+        self.gauges[name] = (help_text, read)
+
+    def render_prometheus(self):
+        """Prometheus text exposition format"""
+        name = f'{METRIC_PREFIX}_request_phase_seconds'
+        lines = [
+            f'# HELP {METRIC_PREFIX}_requests_total Requests finished, by outcome',
+            f'# TYPE {METRIC_PREFIX}_requests_total counter',
+        ]
+        with self.lock:
+            for label, count in sorted(self.requests.items()):
+                lines.append(f'{METRIC_PREFIX}_requests_total{{outcome="{label}"}} {count}')
+
+            lines.append(f'# HELP {name} Time spent in each phase of a request')
+            lines.append(f'# TYPE {name} histogram')
+            for (phase, label), histogram in sorted(self.histograms.items()):
+                labels = f'phase="{phase}",outcome="{label}"'
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+        for gauge, (help_text, read) in sorted(self.gauges.items()):
+            lines.append(f'# HELP {METRIC_PREFIX}_{gauge} {help_text}')
+            lines.append(f'# TYPE {METRIC_PREFIX}_{gauge} gauge')
+            lines.append(f'{METRIC_PREFIX}_{gauge} {read()}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """JSON-friendly summary: request counts, and count/sum/mean/p50/p95/p99 per phase and outcome"""
+        with self.lock:
+            phases = {}
+            for (phase, label), histogram in sorted(self.histograms.items()):
+                phases.setdefault(phase, {})[label] = histogram.summary()
+            summary = {'requests': dict(self.requests), 'phases': phases}
+        summary['gauges'] = {gauge: read() for gauge, (_, read) in self.gauges.items()}
+        return summary
+
+    def write_summary(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def print_breakdown(self):
+        """One summary line: mean milliseconds per phase over successful requests"""
+        with self.lock:
+            means = [(phase, histogram.sum / histogram.count)
+                     for (phase, label), histogram in self.histograms.items()
+                     if label == OUTCOME_OK and histogram.count]
+        means.sort(key=lambda item: PHASES.index(item[0]) if item[0] in PHASES else len(PHASES))
+        if means:
+            print("  Timing (mean ms, ok requests): " +
+                  ', '.join(f"{phase} {seconds * 1000:.1f}" for phase, seconds in means))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves /metrics (Prometheus text) and /metrics.json (summary)"""
+
+    def do_GET(self):
+        metrics = self.server.metrics
+        if self.path == '/metrics':
+            body, content_type = metrics.render_prometheus().encode(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(metrics.summary()).encode(), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(metrics, port, host='127.0.0.1'):
+    """
+    Serve `metrics` on a background thread
+    Returns: the running server (call shutdown() when done)
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3.11
+"""
+Compact in-memory store of result records, for aggregation over millions of wallets
+
+A list of result dicts costs several hundred bytes per wallet. ResultStore keeps
+the same data in columns, like the columnar output format: solutions (int64),
+night (float64) and a failed flag (uint8) in typed arrays, and the addresses back
+to back in one contiguous buffer with an offset array. That is roughly 17 bytes
+per wallet plus the address itself.
+
+Totals, top-N, percentiles and histograms run over the arrays. They are
+vectorized with NumPy when it is installed; otherwise they fall back to plain
+loops over the same arrays. Failed records are stored as 0 with the failed flag
+set, and percentiles and histograms leave them out.
+
+Load and combine previous results files (JSON array batch files, JSON Lines
+journals or columnar files), then print a summary:
+    python3.11 result_store.py <results_file>... [options]
+
+Options:
+    --top N             List the N wallets with the most NIGHT (default: 10)
+    --by COLUMN         Rank and summarize by 'night' or 'solutions' (default: night)
+    --bins N            Histogram buckets over wallets with earnings (default: 10)
+    --output FILE       Also write the combined records to FILE
+    --format F          Format for --output: json, jsonl, csv or columnar (default: columnar)
+
+Example:
+    python3.11 result_store.py 'wallet_stats_batch_*.json' --top 20 --output all.wcol
+"""
+import os
+import sys
+import heapq
+from array import array
+from cli_options import split_options, expand_paths
+from result_writers import (ColumnarResults, iter_result_file, open_writer, COLUMNAR_MAGIC, WRITER_FORMATS)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # the pure-Python fallbacks below work on the same arrays
+
+COLUMNS = ('solutions', 'night')
+DEFAULT_PERCENTILES = (50, 90, 99, 99.9)
+
+
+class ResultStore:
+    """
+    Result records in typed arrays (see module docstring)
+    """
+
+    def __init__(self):
+        self.solutions = array('q')
+        self.night = array('d')
+        self.failed = array('B')
+        # Address i spans address_data[address_offsets[i]:address_offsets[i + 1]]
+        self.address_offsets = array('Q', [0])
+        self.address_data = bytearray()
+
+    def __len__(self):
+        return len(self.failed)
+
+    def append(self, stats):
+        """Add one result record"""
+        self.address_data += stats['address'].encode('utf-8')
+        self.address_offsets.append(len(self.address_data))
+        # Failure records carry None - stored as 0 with the failed flag set
+        self.solutions.append(int(stats.get('solutions') or 0))
+        self.night.append(float(stats.get('night') or 0))
+        self.failed.append(1 if 'error' in stats else 0)
+
+    def extend(self, records):
+        for stats in records:
+            self.append(stats)
+
+    def load(self, path):
+        """
+        Add the records of a results file (JSON array, JSON Lines or columnar)
+        Returns: number of records added
+        """
+        before = len(self)
+        with open(path, 'rb') as f:
+            columnar = f.read(len(COLUMNAR_MAGIC)) == COLUMNAR_MAGIC
+
+        if columnar:
+            # Columns are copied as whole buffers, without building a dict per record
+            with ColumnarResults(path) as results:
+                self._append_columns(results.solutions, results.night, results.failed,
+                                     results.address_offsets, results.address_data)
+        else:
+            self.extend(iter_result_file(path))
+        return len(self) - before
+
+    @classmethod
+    def from_files(cls, paths):
+        """Store with the records of several results files, in order"""
+        store = cls()
+        for path in paths:
+            store.load(path)
+        return store
+
+    def merge(self, other):
+        """Append every record of another ResultStore"""
+        self._append_columns(other.solutions, other.night, other.failed, other.address_offsets, other.address_data)
+
+    def _append_columns(self, solutions, night, failed, address_offsets, address_data):
+        base = len(self.address_data)
+        self.solutions.frombytes(memoryview(solutions).tobytes())
+        self.night.frombytes(memoryview(night).tobytes())
+        self.failed.frombytes(memoryview(failed).tobytes())
+        if np is not None:
+            shifted = np.frombuffer(memoryview(address_offsets).tobytes(), dtype=np.uint64)[1:] + np.uint64(base)
+            self.address_offsets.frombytes(shifted.tobytes())
+        else:
+            self.address_offsets.extend(offset + base for offset in address_offsets[1:])
+        self.address_data += address_data
+
+    def address(self, i):
+        """Address of record i"""
+        return self.address_data[self.address_offsets[i]:self.address_offsets[i + 1]].decode('utf-8')
+
+    def record(self, i):
+        """Record i as a result dict"""
+        if self.failed[i]:
+            return {'address': self.address(i), 'solutions': None, 'night': None, 'error': 'failed'}
+        return {'address': self.address(i), 'solutions': self.solutions[i], 'night': self.night[i]}
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def nbytes(self):
+        """Memory held by the columns and the address buffer"""
+        return (sum(column.itemsize * len(column)
+                    for column in (self.solutions, self.night, self.failed, self.address_offsets))
+                + len(self.address_data))
+
+    def as_numpy(self):
+        """(solutions, night, failed) as NumPy arrays sharing the store's memory"""
+        if np is None:
+            raise ImportError("NumPy is not installed")
+        return (
+            np.frombuffer(self.solutions, dtype=np.int64),
+            np.frombuffer(self.night, dtype=np.float64),
+            np.frombuffer(self.failed, dtype=np.uint8),
+        )
+
+    def totals(self):
+        """Record count, failures, wallets with earnings and the solutions/NIGHT totals"""
+        if np is not None:
+            solutions, night, failed = self.as_numpy()
+            return {
+                'wallets': len(self),
+                'failed': int(failed.sum()),
+                'with_earnings': int(np.count_nonzero((solutions > 0) | (night > 0))),
+                'solutions': int(solutions.sum()),
+                'night': float(night.sum()),
+            }
+        return {
+            'wallets': len(self),
+            'failed': sum(self.failed),
+            'with_earnings': sum(1 for s, n in zip(self.solutions, self.night) if s > 0 or n > 0),
+            'solutions': sum(self.solutions),
+            'night': sum(self.night),
+        }
+
+    def values(self, column='night', earners_only=False):
+        """
+        Values of a column over successful records
+        Args:
+            column: 'night' or 'solutions'
+            earners_only: Only wallets with solutions or NIGHT
+        Returns: NumPy array when NumPy is installed, else a list
+        """
+        if column not in COLUMNS:
+            raise ValueError(f"Unknown column '{column}' (choose from {', '.join(COLUMNS)})")
+        if np is not None:
+            solutions, night, failed = self.as_numpy()
+            keep = failed == 0
+            if earners_only:
+                keep &= (solutions > 0) | (night > 0)
+            return (night if column == 'night' else solutions)[keep]
+
+        values = getattr(self, column)
+        return [values[i] for i in range(len(self))
+                if not self.failed[i] and (not earners_only or self.solutions[i] > 0 or self.night[i] > 0)]
+
+    def top(self, n=10, by='night'):
+        """The n records with the highest `by` column, highest first"""
+        if by not in COLUMNS:
+            raise ValueError(f"Unknown column '{by}' (choose from {', '.join(COLUMNS)})")
+        if np is not None and len(self) > n:
+            column = np.frombuffer(getattr(self, by), dtype=np.int64 if by == 'solutions' else np.float64)
+            # Ties at the cut-off go to the earliest records, like heapq.nlargest
+            threshold = np.partition(column, len(self) - n)[len(self) - n]
+            above = np.flatnonzero(column > threshold)
+            candidates = np.concatenate((above, np.flatnonzero(column == threshold)[:n - len(above)]))
+            indexes = candidates[np.lexsort((candidates, -column[candidates]))]
+        else:
+            column = getattr(self, by)
+            indexes = heapq.nlargest(n, range(len(self)), key=column.__getitem__)
+        return [self.record(int(i)) for i in indexes]
+
+    def percentiles(self, column='night', percentiles=DEFAULT_PERCENTILES, earners_only=False):
+        """
+        Percentiles of a column (linear interpolation, as numpy.percentile)
+        Returns: dict of percentile -> value (None when there are no values)
+        """
+        values = self.values(column, earners_only)
+        if len(values) == 0:
+            return {p: None for p in percentiles}
+        if np is not None:
+            return dict(zip(percentiles, (float(v) for v in np.percentile(values, percentiles))))
+
+        values = sorted(values)
+        result = {}
+        for p in percentiles:
+            rank = (len(values) - 1) * p / 100
+            low = int(rank)
+            high = min(low + 1, len(values) - 1)
+            result[p] = values[low] + (values[high] - values[low]) * (rank - low)
+        return result
+
+    def histogram(self, column='night', bins=10, earners_only=True):
+        """
+        Equal-width histogram of a column between its smallest and largest value
+        Returns: list of (low, high, count)
+        """
+        values = self.values(column, earners_only)
+        if len(values) == 0:
+            return []
+        if np is not None:
+            counts, edges = np.histogram(values, bins=bins)
+            return [(float(edges[i]), float(edges[i + 1]), int(counts[i])) for i in range(len(counts))]
+
+        low, high = min(values), max(values)
+        width = (high - low) / bins or 1
+        counts = [0] * bins
+        for value in values:
+            counts[min(int((value - low) / width), bins - 1)] += 1
+        return [(low + i * width, low + (i + 1) * width, counts[i]) for i in range(bins)]
+
+    def write(self, path, fmt='columnar'):
+        """Write every record to a results file"""
+        with open_writer(path, fmt) as writer:
+            for stats in self:
+                writer.write(stats)
+        return writer.count
+
+
+def main():
+    args, options = split_options(sys.argv[1:])
+    if len(args) < 1:
+        print("Usage: python3.11 result_store.py <results_file>... [--top N] [--by night|solutions] [--bins N] "
+              "[--output FILE] [--format F]")
+        sys.exit(1)
+
+    top_n = int(options.get('top', 10))
+    by = options.get('by', 'night')
+    bins = int(options.get('bins', 10))
+    output_format = options.get('format', 'columnar')
+    if by not in COLUMNS:
+        print(f"Error: Unknown column '{by}' (choose from {', '.join(COLUMNS)})")
+        sys.exit(1)
+    if output_format not in WRITER_FORMATS:
+        print(f"Error: Unknown output format '{output_format}' (choose from {', '.join(WRITER_FORMATS)})")
+        sys.exit(1)
+
+    paths = expand_paths(args)
+    missing = [path for path in paths if not os.path.exists(path)]
+    if not paths or missing:
+        print(f"Error: Results file '{missing[0] if missing else args[0]}' not found")
+        sys.exit(1)
+
+    store = ResultStore()
+    for path in paths:
+        print(f"  {path}: {store.load(path)} records")
+
+    totals = store.totals()
+    print(f"\n✓ {totals['wallets']} records from {len(paths)} files "
+          f"({store.nbytes() / 1024 / 1024:.1f} MB in memory, NumPy {'on' if np is not None else 'off'})")
+    print(f"  Wallets with earnings: {totals['with_earnings']}/{totals['wallets']}")
+    print(f"  Total Solutions: {totals['solutions']}")
+    print(f"  Total NIGHT: {totals['night']:.4f}")
+    print(f"  Failed: {totals['failed']}")
+
+    percentiles = store.percentiles(by, earners_only=True)
+    if percentiles[DEFAULT_PERCENTILES[0]] is not None:
+        print(f"\n  {by} percentiles (wallets with earnings): " +
+              ', '.join(f"p{p:g} {value:.4f}" for p, value in percentiles.items()))
+
+        print(f"\n  {by} histogram (wallets with earnings):")
+        histogram = store.histogram(by, bins)
+        widest = max(count for _, _, count in histogram)
+        for low, high, count in histogram:
+            bar = '#' * round(40 * count / widest) if widest else ''
+            print(f"    {low:14.4f} - {high:14.4f}  {count:9d}  {bar}")
+
+    if top_n > 0:
+        print(f"\n  Top {top_n} by {by}:")
+        for stats in store.top(top_n, by):
+            if stats['solutions'] is not None:
+                print(f"    {stats['address']}  {stats['solutions']:6d} solutions  {stats['night']:.4f} NIGHT")
+
+    if 'output' in options:
+        count = store.write(options['output'], output_format)
+        print(f"\n✓ Wrote {count} records to {options['output']} ({output_format})")
+
+
+if __name__ == '__main__':
+    main()
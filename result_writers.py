@@ -0,0 +1,389 @@
+#!/usr/bin/env python3.11
+"""
+Streaming result writers
+
+Each writer takes one result record at a time ({'address', 'solutions',
+'night'}, optionally 'error') and writes it out right away, so memory no
+longer grows with the number of wallets.
+
+Formats:
+    json      - JSON array, one compact record per line (same data as before, much smaller)
+    jsonl     - JSON Lines, one record per line
+    csv       - address,solutions,night,error
+    columnar  - compact binary file: addresses stored once in a contiguous
+                buffer, solutions/night/failed in typed arrays. ColumnarResults
+                memory-maps it for aggregation without parsing JSON.
+
+Columnar layout (little-endian, every section 8-byte aligned):
+    b'WSTATCOL'                   magic
+    uint32                        header length
+    header JSON                   {"count": n, "sorted": bool, "columns": {name: {"offset", "dtype", "length"}}}
+                                  sorted: addresses were written in ascending order
+    solutions        int64[n]
+    night            float64[n]
+    failed           uint8[n]     1 if the record carries an 'error' (solutions/night stored as 0)
+    address_offsets  uint64[n+1]  start of address i in address_data (plus end)
+    address_data     bytes        UTF-8 addresses, back to back
+
+Convert an existing results file (JSON array or JSON Lines, e.g. a journal):
+    python3.11 result_writers.py <input_file> <output_file> [--format csv|jsonl|json|columnar]
+"""
+import os
+import sys
+import csv
+import json
+import mmap
+import struct
+import tempfile
+from array import array
+from cli_options import split_options
+from wallet_reader import detect_format, iter_json_array_file, FORMAT_JSON_ARRAY
+
+COLUMNAR_MAGIC = b'WSTATCOL'
+FLUSH_EVERY = 8192  # records buffered in typed arrays before spilling to disk
+
+
+class JsonArrayWriter:
+    """JSON array, one compact record per line"""
+
+    extension = 'json'
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w')
+        self.file.write('[')
+        self.count = 0
+
+    def write(self, stats):
+        self.file.write(',\n' if self.count else '\n')
+        self.file.write(json.dumps(stats, separators=(',', ':')))
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.write('\n]\n')
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlWriter:
+    """JSON Lines, one record per line"""
+
+    extension = 'jsonl'
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w')
+        self.count = 0
+
+    def write(self, stats):
+        self.file.write(json.dumps(stats, separators=(',', ':')))
+        self.file.write('\n')
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvWriter:
+    """CSV with a header row: address,solutions,night,error"""
+
+    extension = 'csv'
+    fields = ('address', 'solutions', 'night', 'error')
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.fields)
+        self.count = 0
+
+    def write(self, stats):
+        self.writer.writerow([stats['address'], stats['solutions'], stats['night'], stats.get('error', '')])
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ColumnarWriter:
+    """
+    Compact columnar binary file (see module docstring for the layout)
+    Columns are spilled to temporary files while writing and assembled on close.
+    """
+
+    extension = 'wcol'
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self.address_bytes = 0
+        self.sorted = True  # addresses written in ascending order so far
+        self.last_address = b''
+
+        directory = os.path.dirname(os.path.abspath(path))
+        self.spill = {
+            name: tempfile.TemporaryFile(dir=directory)
+            for name in ('solutions', 'night', 'failed', 'address_offsets', 'address_data')
+        }
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self.solutions = array('q')
+        self.night = array('d')
+        self.failed = array('B')
+        self.address_offsets = array('Q')
+        self.address_data = bytearray()
+
+    def _flush(self):
+        for name in ('solutions', 'night', 'failed', 'address_offsets'):
+            column = getattr(self, name)
+            if sys.byteorder != 'little':
+                column.byteswap()
+            self.spill[name].write(column.tobytes())
+        self.spill['address_data'].write(self.address_data)
+        self._reset_buffers()
+
+    def write(self, stats):
+        encoded = stats['address'].encode('utf-8')
+        # UTF-8 bytes order like the str addresses they encode
+        if encoded < self.last_address:
+            self.sorted = False
+        self.last_address = encoded
+        self.address_offsets.append(self.address_bytes)
+        self.address_data += encoded
+        self.address_bytes += len(encoded)
+
+        # Failure records carry None - stored as 0 with the failed flag set
+        self.solutions.append(int(stats['solutions'] or 0))
+        self.night.append(float(stats['night'] or 0))
+        self.failed.append(1 if 'error' in stats else 0)
+
+        self.count += 1
+        if len(self.solutions) >= FLUSH_EVERY:
+            self._flush()
+
+    def close(self):
+        if self.spill is None:
+            return
+
+        # Closing offset so address i spans offsets[i]:offsets[i + 1]
+        self.address_offsets.append(self.address_bytes)
+        self._flush()
+
+        layout = [
+            ('solutions', '<i8', self.count * 8),
+            ('night', '<f8', self.count * 8),
+            ('failed', '|u1', self.count),
+            ('address_offsets', '<u8', (self.count + 1) * 8),
+            ('address_data', '|S1', self.address_bytes),
+        ]
+
+        # Header size depends on the offsets it contains; pad it to a fixed width
+        header_size = 1024
+        columns = {}
+        offset = _align(len(COLUMNAR_MAGIC) + 4 + header_size)
+        for name, dtype, length in layout:
+            columns[name] = {'offset': offset, 'dtype': dtype, 'length': length}
+            offset = _align(offset + length)
+
+        header = json.dumps({'count': self.count, 'sorted': self.sorted, 'columns': columns}).encode()
+        header = header.ljust(header_size, b' ')
+
+        with open(self.path, 'wb') as f:
+            f.write(COLUMNAR_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for name, _, _ in layout:
+                f.write(b'\0' * (columns[name]['offset'] - f.tell()))
+                spill = self.spill[name]
+                spill.seek(0)
+                while True:
+                    chunk = spill.read(1 << 20)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                spill.close()
+
+        self.spill = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _align(offset, alignment=8):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class ColumnarResults:
+    """
+    Read-only, memory-mapped view of a columnar results file
+    solutions/night/failed are zero-copy memoryviews; as_numpy() wraps them
+    in NumPy arrays when NumPy is installed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.map[:len(COLUMNAR_MAGIC)] != COLUMNAR_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar results file")
+
+        start = len(COLUMNAR_MAGIC)
+        (header_len,) = struct.unpack_from('<I', self.map, start)
+        self.header = json.loads(self.map[start + 4:start + 4 + header_len])
+        self.count = self.header['count']
+
+        view = memoryview(self.map)
+        columns = self.header['columns']
+
+        def column(name, fmt):
+            info = columns[name]
+            raw = view[info['offset']:info['offset'] + info['length']]
+            if sys.byteorder != 'little' and fmt != 'B':
+                # Byte-swapped copy on big-endian hosts (memory-mapping needs native order)
+                swapped = array(fmt, raw)
+                swapped.byteswap()
+                return memoryview(swapped)
+            return raw.cast(fmt)
+
+        self.solutions = column('solutions', 'q')
+        self.night = column('night', 'd')
+        self.failed = column('failed', 'B')
+        self.address_offsets = column('address_offsets', 'Q')
+        info = columns['address_data']
+        self.address_data = view[info['offset']:info['offset'] + info['length']]
+
+    def __len__(self):
+        return self.count
+
+    def address(self, i):
+        """Address of record i"""
+        return bytes(self.address_data[self.address_offsets[i]:self.address_offsets[i + 1]]).decode('utf-8')
+
+    def record(self, i):
+        """Record i as a result dict"""
+        if self.failed[i]:
+            return {'address': self.address(i), 'solutions': None, 'night': None, 'error': 'failed'}
+        return {'address': self.address(i), 'solutions': self.solutions[i], 'night': self.night[i]}
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.record(i)
+
+    def as_numpy(self):
+        """(solutions, night, failed) as NumPy arrays over the mapped file"""
+        import numpy as np
+        return (
+            np.frombuffer(self.solutions, dtype=np.int64),
+            np.frombuffer(self.night, dtype=np.float64),
+            np.frombuffer(self.failed, dtype=np.uint8),
+        )
+
+    def close(self):
+        for name in ('solutions', 'night', 'failed', 'address_offsets', 'address_data'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+WRITER_FORMATS = {
+    'json': JsonArrayWriter,
+    'jsonl': JsonlWriter,
+    'csv': CsvWriter,
+    'columnar': ColumnarWriter,
+}
+
+
+def open_writer(path, fmt='json'):
+    """Create a streaming writer for `fmt` (one of WRITER_FORMATS)"""
+    if fmt not in WRITER_FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}' (choose from {', '.join(WRITER_FORMATS)})")
+    return WRITER_FORMATS[fmt](path)
+
+
+def output_extension(fmt):
+    """File extension used for an output format"""
+    return WRITER_FORMATS[fmt].extension
+
+
+def iter_result_file(path):
+    """Yield records from a JSON array, JSON Lines or columnar results file"""
+    with open(path, 'rb') as f:
+        head = f.read(len(COLUMNAR_MAGIC))
+
+    if head == COLUMNAR_MAGIC:
+        with ColumnarResults(path) as results:
+            yield from results
+        return
+
+    # JSON arrays are parsed incrementally, like wallet files
+    if detect_format(path) == FORMAT_JSON_ARRAY:
+        yield from iter_json_array_file(path)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main():
+    """Convert a results file between formats"""
+    args, options = split_options(sys.argv[1:])
+    if len(args) < 2:
+        print("Usage: python3.11 result_writers.py <input_file> <output_file> [--format csv|jsonl|json|columnar]")
+        sys.exit(1)
+
+    input_file, output_file = args[0], args[1]
+    fmt = options.get('format', 'jsonl')
+
+    if not os.path.exists(input_file):
+        print(f"Error: Input file '{input_file}' not found")
+        sys.exit(1)
+
+    with open_writer(output_file, fmt) as writer:
+        for stats in iter_result_file(input_file):
+            writer.write(stats)
+
+    print(f"✓ Wrote {writer.count} records to {output_file} ({fmt})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3.11
+"""
+Retry policies and the deferred retry queue
+
+Failed fetches are classified (timeout, throttled, server, parse, network,
+client). Each class has its own policy: how many attempts it gets, and the
+base and maximum delay for exponential backoff with full jitter. Retryable
+failures go into a RetryQueue keyed by the time they become due. The fetchers
+run due retries alongside fresh fetches, so one slow or failing wallet does
+not stall the pipeline.
+
+A wallet that runs out of attempts gets a failure record: solutions/night are
+None (not 0), so a failed fetch can't be mistaken for an empty wallet.
+"""
+import time
+import heapq
+import random
+
+ERROR_TIMEOUT = 'timeout'
+ERROR_THROTTLED = 'throttled'  # HTTP 429
+ERROR_SERVER = 'server'        # HTTP 5xx
+ERROR_PARSE = 'parse'          # 200 but unreadable body
+ERROR_NETWORK = 'network'      # connection errors
+ERROR_CLIENT = 'client'        # other 4xx - not retried
+
+
+class RetryPolicy:
+    """Attempt limit and jittered exponential backoff for one error class"""
+
+    def __init__(self, max_attempts, base_delay=1.0, max_delay=60.0):
+        """
+        Args:
+            max_attempts: Total attempts including the first (1 = never retry)
+            base_delay: Backoff ceiling after the first failure (seconds)
+            max_delay: Upper bound on any single backoff (seconds)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempts, retry_after=None):
+        """Seconds to wait before the next attempt (full jitter, at least Retry-After)"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        delay = random.uniform(0, ceiling)
+        if retry_after:
+            delay = max(delay, retry_after)
+        return delay
+
+
+DEFAULT_RETRY_POLICIES = {
+    ERROR_TIMEOUT: RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=30.0),
+    ERROR_THROTTLED: RetryPolicy(max_attempts=5, base_delay=5.0, max_delay=120.0),
+    ERROR_SERVER: RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=60.0),
+    ERROR_PARSE: RetryPolicy(max_attempts=2, base_delay=1.0, max_delay=10.0),
+    ERROR_NETWORK: RetryPolicy(max_attempts=3, base_delay=2.0, max_delay=30.0),
+    ERROR_CLIENT: RetryPolicy(max_attempts=1),
+}
+
+
+def classify_status(status):
+    """Error class for a non-200 HTTP status"""
+    if status == 429:
+        return ERROR_THROTTLED
+    if status == 408:
+        return ERROR_TIMEOUT
+    if status >= 500:
+        return ERROR_SERVER
+    return ERROR_CLIENT
+
+
+def classify_exception(error):
+    """Error class for an exception raised while fetching"""
+    if isinstance(error, ValueError):
+        return ERROR_PARSE  # includes json.JSONDecodeError
+    if isinstance(error, TimeoutError) or 'timeout' in type(error).__name__.lower():
+        return ERROR_TIMEOUT
+    return ERROR_NETWORK
+
+
+def failure_record(address, error, error_class, attempts=1, retry_after=None):
+    """
+    Result record for a wallet whose fetch failed
+    `retry_after` (seconds, from a Retry-After header) is kept under 'retry_after' for the
+    caller to pop and pass to RetryQueue.schedule().
+    """
+    record = {
+        'address': address,
+        'solutions': None,
+        'night': None,
+        'error': error,
+        'error_class': error_class,
+        'attempts': attempts,
+    }
+    if retry_after is not None:
+        record['retry_after'] = retry_after
+    return record
+
+
+def is_failure(stats):
+    """True for failure records"""
+    return 'error' in stats
+
+
+class RetryQueue:
+    """
+    Deferred retry queue ordered by due time
+    Items are (address, attempts_so_far, payload); the payload is opaque to the queue and
+    lets the caller tie a retry back to its own bookkeeping (e.g. the wallet's output slot).
+    """
+
+    def __init__(self, policies=None):
+        self.policies = policies or DEFAULT_RETRY_POLICIES
+        self.heap = []
+        self.sequence = 0
+
+        self.scheduled = {}  # error_class -> retries scheduled
+        self.recovered = 0
+        self.exhausted = 0
+
+    def schedule(self, stats, retry_after=None, payload=None):
+        """
+        Queue a failed result for another attempt if its policy allows
+        The retry is not due before `retry_after` seconds (the server's Retry-After).
+        `payload` is handed back with the retry by pop_ready().
+        Returns: True if scheduled, False if the wallet is out of attempts
+        """
+        error_class = stats.get('error_class', ERROR_NETWORK)
+        attempts = stats.get('attempts', 1)
+        policy = self.policies.get(error_class, self.policies[ERROR_NETWORK])
+
+        if attempts >= policy.max_attempts:
+            self.exhausted += 1
+            return False
+
+        due = time.monotonic() + policy.delay(attempts, retry_after)
+        self.sequence += 1
+        heapq.heappush(self.heap, (due, self.sequence, stats['address'], attempts, payload))
+        self.scheduled[error_class] = self.scheduled.get(error_class, 0) + 1
+        return True
+
+    def pop_ready(self):
+        """Pop every retry that is due: list of (address, attempts_so_far, payload)"""
+        now = time.monotonic()
+        ready = []
+        while self.heap and self.heap[0][0] <= now:
+            _, _, address, attempts, payload = heapq.heappop(self.heap)
+            ready.append((address, attempts, payload))
+        return ready
+
+    def next_due_in(self):
+        """Seconds until the next retry is due (None if the queue is empty)"""
+        if not self.heap:
+            return None
+        return max(0.0, self.heap[0][0] - time.monotonic())
+
+    def record_recovered(self):
+        """Count a wallet that succeeded on a retry"""
+        self.recovered += 1
+
+    def __len__(self):
+        return len(self.heap)
+
+    def metrics(self):
+        """Retry counters for the run summary"""
+        return {
+            'retries_scheduled': dict(self.scheduled),
+            'recovered': self.recovered,
+            'failed': self.exhausted,
+        }
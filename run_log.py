@@ -0,0 +1,241 @@
+#!/usr/bin/env python3.11
+"""
+Logging for long runs: levels, a background writer, JSON lines, one progress line
+
+At high concurrency, printing a line per wallet from the fetch loop makes the
+console the bottleneck, and lines from different workers get mixed up. The
+modules log through the standard `logging` package under the 'wallet_stats'
+logger instead, and setup_logging() (called by the command line tools) wires it
+up for a run:
+    - records go onto a queue, and a listener thread formats and writes them, so
+      the fetch loop never blocks on the console or the log file
+    - per-wallet records (logged with extra={'sample': True}) are sampled on the
+      console. Each message kind gets at most --log-sample lines per second, and
+      the next line that gets through reports how many were suppressed. Warnings
+      and errors are never sampled.
+    - the console shows one progress line, redrawn in place on a terminal (or
+      logged every few seconds when output is redirected)
+    - --log-json FILE also writes every record as a JSON line, with its
+      structured fields (address, solutions, ...)
+Without setup_logging(), only warnings and errors reach stderr (Python's default).
+"""
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = 'wallet_stats'
+LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+DEFAULT_SAMPLE_RATE = 20.0      # sampled lines per second, per message kind
+PROGRESS_INTERVAL = 0.25        # seconds between redraws of the progress line on a terminal
+PLAIN_PROGRESS_INTERVAL = 10.0  # seconds between progress lines when output is not a terminal
+
+
+def get_logger(name):
+    """Logger for a module, under the 'wallet_stats' hierarchy"""
+    return logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit records marked with `sample`, per message template (token bucket)
+    A record that gets through after others were dropped carries `suppressed` = how many.
+    """
+
+    def __init__(self, per_second=DEFAULT_SAMPLE_RATE):
+        super().__init__()
+        self.per_second = per_second
+        self.buckets = {}  # msg template -> [tokens, last refill, suppressed]
+        self.total_suppressed = 0
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if not getattr(record, 'sample', False) or record.levelno >= logging.WARNING:
+            return True
+
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(record.msg)
+            if bucket is None:
+                bucket = self.buckets[record.msg] = [self.per_second, now, 0]
+            bucket[0] = min(self.per_second, bucket[0] + (now - bucket[1]) * self.per_second)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self.total_suppressed += 1
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class ProgressLine:
+    """
+    A single status line kept at the bottom of the console
+    Call due() before building the text, so the hot loop only formats it when it will be shown.
+    """
+
+    def __init__(self, stream=sys.stdout):
+        self.stream = stream
+        self.tty = stream.isatty()
+        self.interval = PROGRESS_INTERVAL if self.tty else PLAIN_PROGRESS_INTERVAL
+        self.lock = threading.RLock()
+        self.text = ''
+        self.visible = False
+        self.next_update = 0.0
+
+    def due(self):
+        return time.monotonic() >= self.next_update
+
+    def show(self, text):
+        """Replace the progress text (redrawn in place, or written as a line when not a terminal)"""
+        self.next_update = time.monotonic() + self.interval
+        with self.lock:
+            self.text = text
+            if self.tty:
+                self._draw()
+            else:
+                self.stream.write(f'  {text}\n')
+                self.stream.flush()
+
+    def clear(self):
+        """Remove the line before something else is written"""
+        if self.visible:
+            self.stream.write('\r\x1b[K')
+            self.visible = False
+
+    def redraw(self):
+        if self.tty and self.text:
+            self._draw()
+
+    def _draw(self):
+        self.stream.write(f'\r\x1b[K  {self.text}')
+        self.stream.flush()
+        self.visible = True
+
+    def finish(self):
+        """Leave the last progress text on its own line"""
+        with self.lock:
+            if self.visible:
+                self.stream.write('\n')
+                self.stream.flush()
+                self.visible = False
+            self.text = ''
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Indented message, with a note when sampling dropped similar lines"""
+
+    def format(self, record):
+        prefix = '  [debug] ' if record.levelno < logging.INFO else '  '
+        message = prefix + record.getMessage()
+        if getattr(record, 'suppressed', 0):
+            message += f' (+{record.suppressed} similar suppressed)'
+        if record.exc_info:
+            message += '\n' + self.formatException(record.exc_info)
+        return message
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and the record's `fields`"""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """Console output that moves the progress line out of the way"""
+
+    def __init__(self, progress):
+        super().__init__(progress.stream)
+        self.progress = progress
+
+    def emit(self, record):
+        with self.progress.lock:
+            self.progress.clear()
+            super().emit(record)
+            self.progress.redraw()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue the record as is: formatting happens on the listener thread, not in the fetch loop"""
+
+    def prepare(self, record):
+        # Log arguments are plain values (strings and numbers), so they are safe to format later
+        return record
+
+
+class RunLog:
+    """
+    Logging set up for one run (see setup_logging)
+    """
+
+    def __init__(self, level='info', json_file=None, sample_rate=DEFAULT_SAMPLE_RATE, stream=sys.stdout):
+        self.progress = ProgressLine(stream)
+        console = ConsoleHandler(self.progress)
+        console.setFormatter(ConsoleFormatter())
+        handlers = [console]
+
+        self.json_handler = None
+        if json_file:
+            self.json_handler = logging.FileHandler(json_file, encoding='utf-8')
+            self.json_handler.setFormatter(JsonLinesFormatter())
+            handlers.append(self.json_handler)
+
+        # Only the console is sampled: the JSON file gets every record
+        self.sampler = None
+        if sample_rate > 0:
+            self.sampler = SamplingFilter(sample_rate)
+            console.addFilter(self.sampler)
+
+        self.queue = queue.SimpleQueue()
+        queue_handler = _DeferredQueueHandler(self.queue)
+
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.setLevel(level.upper())
+        self.logger.handlers = [queue_handler]
+        self.logger.propagate = False
+
+        self.listener = QueueListener(self.queue, *handlers)
+        self.listener.start()
+
+    def close(self):
+        """Write out everything still queued, end the progress line and detach the handlers"""
+        if self.listener is None:
+            return
+        self.listener.stop()
+        self.listener = None
+        self.progress.finish()
+        if self.sampler is not None and self.sampler.total_suppressed:
+            self.progress.stream.write(f"  ({self.sampler.total_suppressed} per-wallet log lines suppressed on the "
+                                       f"console; --log-sample 0 keeps them all)\n")
+        if self.json_handler is not None:
+            self.json_handler.close()
+        self.logger.handlers = []
+        self.logger.propagate = True
+
+
+def setup_logging(options):
+    """
+    Configure logging from command line options (--log-level, --log-json, --log-sample)
+    Returns: the RunLog (close() it before printing the final summary)
+    """
+    level = options.get('log_level', 'info')
+    if level not in LOG_LEVELS:
+        print(f"Error: Unknown log level '{level}' (choose from {', '.join(LOG_LEVELS)})")
+        sys.exit(1)
+    return RunLog(level, options.get('log_json'), float(options.get('log_sample', DEFAULT_SAMPLE_RATE)))
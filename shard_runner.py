@@ -0,0 +1,192 @@
+#!/usr/bin/env python3.11
+"""
+Fetch statistics for very large wallet sets with several worker processes
+
+The batch (start_index/batch_size, as for fetch_wallet_stats_direct.py) is
+split into contiguous shards. A process pool runs the direct fetcher's async
+engine on each shard. Every worker has its own connection pool. All workers
+draw from one global rate limit (shared memory), so --rate/--max-rate apply
+to the whole run, not to each worker. Each shard writes its own file.
+When every shard is done, the shard files are merged in shard order into one
+output file and the summary totals are aggregated.
+
+Usage:
+    python3.11 shard_runner.py <wallet_file> [start_index] [batch_size] [options]
+
+Options:
+    --workers N         Worker processes (default: CPU count)
+    --shards N          Shards to split the batch into (default: workers)
+    --concurrency N     Requests in flight per worker (default: 10)
+    --pool-size N       Pooled keep-alive connections per worker (default: concurrency)
+    --rate R            Starting global request rate (default: 10/s)
+    --max-rate R        Global ceiling across all workers (default: 50/s)
+    --output-format F   json, jsonl, csv or columnar (default: json)
+    --output FILE       Merged output file (default: wallet_stats_batch_<start>_<end>.<ext>)
+    --keep-shards       Keep the per-shard files after merging
+    --stats-url URL     Statistics URL template, e.g. a stub server for testing
+
+Example:
+    python3.11 shard_runner.py wallets.json 0 1000000 --workers 8 --concurrency 20
+"""
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from cli_options import split_options
+from wallet_reader import count_wallets, iter_wallet_addresses
+from result_writers import open_writer, output_extension, iter_result_file, WRITER_FORMATS
+from rate_limiter import SharedRateLimiter
+from retry_queue import RetryQueue
+from fetch_wallet_stats_direct import (create_client, _fetch_batch, STATS_URL, DEFAULT_CONCURRENCY, DEFAULT_RATE,
+                                       DEFAULT_MAX_RATE)
+
+# Set in each worker process by _init_worker
+_limiter = None
+
+
+def plan_shards(start_index, end_index, num_shards):
+    """Split [start_index, end_index) into contiguous (shard_start, shard_size) ranges"""
+    total = end_index - start_index
+    num_shards = max(1, min(num_shards, total))
+    base, extra = divmod(total, num_shards)
+
+    shards = []
+    shard_start = start_index
+    for k in range(num_shards):
+        size = base + (1 if k < extra else 0)
+        shards.append((shard_start, size))
+        shard_start += size
+    return shards
+
+
+def shard_path(output_file, k):
+    """Per-shard output file next to the merged output"""
+    base, ext = os.path.splitext(output_file)
+    return f'{base}.shard{k:03d}{ext}'
+
+
+def _init_worker(limiter):
+    """Process pool initializer: keep the shared rate limiter for this worker"""
+    global _limiter
+    _limiter = limiter
+
+
+def run_shard(wallet_file, shard_start, shard_size, total_wallets, output_file, output_format, concurrency, pool_size,
+              stats_url=STATS_URL):
+    """
+    Fetch one shard in a worker process
+    Returns: the shard's totals, plus connection and retry counters
+    """
+    # The limiter's counters belong to the worker process, which may run several shards
+    throttles_before = _limiter.metrics()['throttles']
+    addresses = iter_wallet_addresses(wallet_file, shard_start, shard_size)
+    sink = open_writer(output_file, output_format)
+    client = create_client(pool_size)
+    retries = RetryQueue()
+
+    totals = asyncio.run(
+        _fetch_batch(addresses, client, concurrency, shard_start, total_wallets, sink, None, _limiter, retries,
+                     quiet=True, stats_url=stats_url)
+    )
+    totals.update(client.connection_stats())
+    totals['recovered'] = retries.metrics()['recovered']
+    totals['throttles'] = _limiter.metrics()['throttles'] - throttles_before
+    return totals
+
+
+def merge_shards(shard_files, output_file, output_format, keep_shards=False):
+    """Concatenate shard results, in shard order, into one output file"""
+    with open_writer(output_file, output_format) as writer:
+        for path in shard_files:
+            for stats in iter_result_file(path):
+                writer.write(stats)
+            if not keep_shards:
+                os.remove(path)
+    return writer.count
+
+
+def main():
+    """Split the batch into shards, fetch them in parallel and merge the results"""
+    args, options = split_options(sys.argv[1:], flags=('keep_shards',))
+    if len(args) < 1:
+        print("Usage: python3.11 shard_runner.py <wallet_file> [start_index] [batch_size] [options]")
+        print("\nExample:")
+        print("  python3.11 shard_runner.py wallets.json 0 1000000 --workers 8")
+        sys.exit(1)
+
+    wallet_file = args[0]
+    start_index = int(args[1]) if len(args) > 1 else 0
+    batch_size = int(args[2]) if len(args) > 2 else None
+    workers = int(options.get('workers', os.cpu_count() or 1))
+    num_shards = int(options.get('shards', workers))
+    concurrency = int(options.get('concurrency', DEFAULT_CONCURRENCY))
+    pool_size = int(options.get('pool_size', concurrency))
+    rate = float(options.get('rate', DEFAULT_RATE))
+    max_rate = float(options.get('max_rate', DEFAULT_MAX_RATE))
+    keep_shards = bool(options.get('keep_shards', False))
+    stats_url = options.get('stats_url', STATS_URL)
+    output_format = options.get('output_format', 'json')
+    if output_format not in WRITER_FORMATS:
+        print(f"Error: Unknown output format '{output_format}' (choose from {', '.join(WRITER_FORMATS)})")
+        sys.exit(1)
+
+    if not os.path.exists(wallet_file):
+        print(f"Error: Wallet file '{wallet_file}' not found")
+        sys.exit(1)
+
+    # Builds the sidecar index once, before the workers seek into the file
+    try:
+        total_wallets = count_wallets(wallet_file)
+    except (ValueError, KeyError) as e:
+        print(f"Error: Invalid wallet file: {e}")
+        sys.exit(1)
+
+    batch_end = total_wallets if batch_size is None else min(start_index + batch_size, total_wallets)
+    if batch_end <= start_index:
+        print("No wallets to process in this batch")
+        return
+
+    output_file = options.get('output') or f'wallet_stats_batch_{start_index}_{batch_end}.{output_extension(output_format)}'
+    shards = plan_shards(start_index, batch_end, num_shards)
+    shard_files = [shard_path(output_file, k) for k in range(len(shards))]
+
+    print(f"Found {total_wallets} wallets")
+    print(f"Processing wallets {start_index} to {batch_end} in {len(shards)} shards on {workers} workers "
+          f"(concurrency {concurrency} each, {rate:.0f}-{max_rate:.0f} req/s overall)")
+
+    limiter = SharedRateLimiter(rate=rate, max_rate=max_rate, name='statistics')
+    totals = {'processed': 0, 'successful': 0, 'failed': 0, 'solutions': 0, 'night': 0,
+              'recovered': 0, 'throttles': 0, 'connections_opened': 0, 'connections_reused': 0}
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(limiter,)) as executor:
+        futures = {
+            executor.submit(run_shard, wallet_file, shard_start, shard_size, total_wallets,
+                            shard_files[k], output_format, concurrency, pool_size, stats_url): k
+            for k, (shard_start, shard_size) in enumerate(shards)
+        }
+        for future in as_completed(futures):
+            k = futures[future]
+            shard_totals = future.result()
+            for key in totals:
+                totals[key] += shard_totals[key]
+            print(f"  Shard {k + 1}/{len(shards)} done: {shard_totals['processed']} wallets, "
+                  f"{shard_totals['successful']} with earnings, {shard_totals['failed']} failed "
+                  f"({totals['processed']}/{batch_end - start_index} overall)")
+
+    elapsed = time.perf_counter() - start
+    merged = merge_shards(shard_files, output_file, output_format, keep_shards)
+
+    print(f"\n✓ Batch statistics saved to {output_file} ({merged} records)")
+    print(f"  Wallets with earnings: {totals['successful']}/{totals['processed']}")
+    print(f"  Total Solutions: {totals['solutions']}")
+    print(f"  Total NIGHT: {totals['night']:.4f}")
+    print(f"  Failed: {totals['failed']} (after retries; {totals['recovered']} recovered on retry)")
+    print(f"  Connections: {totals['connections_opened']} opened, {totals['connections_reused']} reused")
+    print(f"  Rate limit: {limiter.rate:.1f} req/s at end ({totals['throttles']} throttled responses)")
+    print(f"  Elapsed: {elapsed:.1f}s ({totals['processed'] / elapsed:.1f} wallets/s)")
+
+
+if __name__ == '__main__':
+    main()
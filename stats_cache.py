@@ -0,0 +1,133 @@
+#!/usr/bin/env python3.11
+"""
+Local on-disk cache of statistics results, keyed by address
+
+Repeat sweeps over the same wallets can be answered from the cache instead of
+the API while an entry is younger than the TTL. Backed by SQLite (WAL mode),
+with writes grouped into commits. Entries older than the TTL are purged and
+the oldest entries are evicted once the cache exceeds `max_entries`.
+
+Only successful results are cached - failures are always fetched again.
+A record carrying its raw response body (StatsDecoder keep_raw) has the body
+stored in the `payload` column, so fields beyond the extracted ones can be
+read later with payload().
+"""
+import json
+import time
+import sqlite3
+from stats_decoder import RAW_PAYLOAD_KEY
+
+DEFAULT_CACHE_FILE = '.wallet_stats_cache.sqlite'
+DEFAULT_TTL = 3600  # seconds
+DEFAULT_MAX_ENTRIES = 5_000_000
+COMMIT_EVERY = 500
+
+
+class StatsCache:
+    """
+    SQLite-backed TTL cache of wallet statistics results
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, max_age=None):
+        """
+        Initialize cache
+        Args:
+            path: SQLite database file
+            ttl: Seconds an entry stays valid (and is kept on disk)
+            max_entries: Size limit - the oldest entries are evicted beyond this
+            max_age: Per-run override of the lookup age limit (0 = always refetch)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_age = ttl if max_age is None else max_age
+
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS stats (
+                address TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL,
+                result TEXT NOT NULL,
+                payload TEXT
+            )
+        ''')
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(stats)')}
+        if 'payload' not in columns:
+            # Cache files created before raw payloads were kept
+            self.db.execute('ALTER TABLE stats ADD COLUMN payload TEXT')
+        self.db.execute('CREATE INDEX IF NOT EXISTS stats_fetched_at ON stats (fetched_at)')
+        self.db.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.uncommitted = 0
+
+    def get(self, address):
+        """Return the cached result for an address, or None if missing or too old"""
+        row = self.db.execute(
+            'SELECT result FROM stats WHERE address = ? AND fetched_at >= ?',
+            (address, time.time() - self.max_age),
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json.loads(row[0])
+
+    def payload(self, address):
+        """Return the raw response body stored for an address, or None"""
+        row = self.db.execute('SELECT payload FROM stats WHERE address = ?', (address,)).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, stats):
+        """Store a successful result (taking its raw payload off the record, if it carries one)"""
+        payload = stats.pop(RAW_PAYLOAD_KEY, None)
+        if 'error' in stats:
+            return
+
+        self.db.execute(
+            'INSERT OR REPLACE INTO stats (address, fetched_at, result, payload) VALUES (?, ?, ?, ?)',
+            (stats['address'], time.time(), json.dumps(stats, separators=(',', ':')), payload),
+        )
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        if self.uncommitted:
+            self.db.commit()
+            self.uncommitted = 0
+
+    def evict(self):
+        """Purge expired entries, then the oldest entries beyond max_entries"""
+        self.db.execute('DELETE FROM stats WHERE fetched_at < ?', (time.time() - self.ttl,))
+
+        (count,) = self.db.execute('SELECT COUNT(*) FROM stats').fetchone()
+        if count > self.max_entries:
+            self.db.execute(
+                'DELETE FROM stats WHERE address IN '
+                '(SELECT address FROM stats ORDER BY fetched_at LIMIT ?)',
+                (count - self.max_entries,),
+            )
+        self.db.commit()
+        self.uncommitted = 0
+
+    def summary(self):
+        """Hit/miss counters for the run summary"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        """Commit, evict and close the database"""
+        if self.db is not None:
+            self.evict()
+            self.db.close()
+            self.db = None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3.11
+"""
+Decoding of statistics responses into result records
+
+Only `local.crypto_receipts` and `local.night_allocation` are used from a
+statistics response. StatsDecoder turns a response body into a result record:
+    - backend: 'orjson' when it is installed (pip install orjson), else the
+      standard library 'json' module ('auto' picks the fastest available)
+    - selective: find the two fields in the raw body with regular expressions
+      instead of decoding the whole document (the 'global' section makes up most
+      of a response). Only used for bodies of SELECTIVE_MIN_BYTES or more, when
+      the 'local' object is unambiguous and flat and the fields are plain
+      numbers. Anything else (error bodies, unexpected shapes) falls back to a
+      full decode, so the result is the same either way.
+    - keep_raw: attach the undecoded body to successful records (under
+      RAW_PAYLOAD_KEY), so StatsCache can keep the full payload next to the
+      extracted fields. The cache takes the body off the record before it is
+      written anywhere else.
+"""
+import re
+import json
+
+JSON_BACKENDS = ('auto', 'orjson', 'json')
+RAW_PAYLOAD_KEY = '_raw_payload'
+
+# Bodies smaller than this decode faster in full than the field scan takes
+SELECTIVE_MIN_BYTES = 1024
+
+_LOCAL_KEY = re.compile(rb'"local"\s*:')
+# The 'local' object's members, when it holds no nested objects or arrays
+_FLAT_OBJECT = re.compile(rb'\s*\{([^{}\[\]]*)\}')
+_MEMBER = re.compile(rb'"([^"\\]*)"\s*:\s*([^,]*)')
+_NUMBER = re.compile(rb'-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?')
+_WANTED = {b'crypto_receipts': 'crypto_receipts', b'night_allocation': 'night_allocation'}
+
+
+def json_loads(backend='auto'):
+    """
+    Pick a JSON decoding function
+    Args:
+        backend: One of JSON_BACKENDS
+    Returns: (backend name, loads function accepting str or bytes)
+    """
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{backend}'")
+    if backend in ('auto', 'orjson'):
+        try:
+            import orjson
+            return 'orjson', orjson.loads
+        except ImportError:
+            if backend == 'orjson':
+                raise
+    return 'json', json.loads
+
+
+def parse_stats(address, data):
+    """Build the output record from a decoded statistics response"""
+    local = data.get('local', {})
+    solutions = local.get('crypto_receipts', 0)
+    night_raw = local.get('night_allocation', 0)
+    night = night_raw / 1_000_000
+
+    return {
+        'address': address,
+        'solutions': solutions,
+        'night': night
+    }
+
+
+def _number(text):
+    return float(text) if any(c in text for c in b'.eE') else int(text)
+
+
+def extract_local_fields(body):
+    """
+    Read crypto_receipts and night_allocation from a raw response body without decoding it
+    Returns: {'local': {...}} with both fields, or None when the body needs a full decode
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if not body.lstrip()[:1] == b'{':
+        return None
+
+    # A second 'local' key (e.g. inside the global section) would make the match ambiguous
+    key = _LOCAL_KEY.search(body)
+    if key is None or _LOCAL_KEY.search(body, key.end()) is not None:
+        return None
+    match = _FLAT_OBJECT.match(body, key.end())
+    if match is None:
+        return None
+
+    local = {}
+    for name, value in _MEMBER.findall(match.group(1)):
+        if b'"' in value:
+            # A string value may hold braces or commas that cut the match short
+            return None
+        name = _WANTED.get(name)
+        if name is None:
+            continue
+        value = value.strip()
+        if name in local or not _NUMBER.fullmatch(value):
+            # Repeated key, or a value that is not a plain number (null, ...)
+            return None
+        local[name] = _number(value)
+    if len(local) < len(_WANTED):
+        # A missing field may only look missing; the full decode settles it
+        return None
+    return {'local': local}
+
+
+class StatsDecoder:
+    """
+    Decodes statistics response bodies into result records
+    """
+
+    def __init__(self, backend='auto', selective=False, keep_raw=False):
+        """
+        Args:
+            backend: One of JSON_BACKENDS
+            selective: Extract the needed fields without a full decode where possible
+            keep_raw: Attach the raw body to successful records for the cache
+        """
+        self.backend, self.loads = json_loads(backend)
+        self.selective = selective
+        self.keep_raw = keep_raw
+        self.extracted = 0  # bodies answered by selective extraction
+        self.decoded = 0    # bodies fully decoded
+
+    def decode(self, address, body):
+        """
+        Result record for a 200 response body (str or bytes)
+        Raises ValueError (or TypeError/AttributeError for unexpected shapes) when it can't be parsed.
+        """
+        data = None
+        if self.selective and len(body) >= SELECTIVE_MIN_BYTES:
+            data = extract_local_fields(body)
+        if data is None:
+            data = self.loads(body)
+            self.decoded += 1
+        else:
+            self.extracted += 1
+
+        stats = parse_stats(address, data)
+        if self.keep_raw:
+            stats[RAW_PAYLOAD_KEY] = body if isinstance(body, str) else bytes(body).decode('utf-8')
+        return stats
+
+    def summary(self):
+        return {'backend': self.backend, 'extracted': self.extracted, 'decoded': self.decoded}
+
+
+DEFAULT_DECODER = StatsDecoder()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3.11
+"""
+Local stub of the Midnight statistics API for benchmarking
+
+Serves GET /statistics/<address> with a deterministic payload derived from
+the address, and GET /api/challenge with a fixed active challenge, after an
+artificial latency. Nothing here talks to the real API.
+
+Usage:
+    python3.11 stub_stats_server.py [port] [options]
+
+Options:
+    --latency S         Mean artificial latency per request (default: 0.05)
+    --latency-dist D    fixed, uniform (0 to 2x mean), exponential or lognormal (default: fixed)
+    --throttle-rate P   Answer this fraction of requests with 429 (default: 0)
+    --retry-after S     Retry-After header sent with injected 429s (default: 1)
+    --payload-bytes N   Pad statistics responses with N bytes of filler (default: 0)
+
+Example:
+    python3.11 stub_stats_server.py 8787 --latency 0.05 --latency-dist lognormal --throttle-rate 0.02
+"""
+import json
+import sys
+import math
+import time
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cli_options import split_options
+
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+LOGNORMAL_SIGMA = 0.5  # spread of the lognormal distribution; its mean is still --latency
+
+STUB_CHALLENGE = {
+    'code': 'active',
+    'challenge': {
+        'challenge_id': '**D01C01',
+        'day': 1,
+        'challenge_number': 1,
+        'difficulty': '000FFFFF',
+        'no_pre_mine': 'cddba7b592e3133393c16194fac7431abf2f5485ed711db282183c819e08ebaa',
+        'latest_submission': '2099-01-01T00:00:00.000Z',
+        'no_pre_mine_hour': '509681483',
+    },
+}
+
+
+def stub_stats_payload(address, payload_bytes=0):
+    """Deterministic statistics payload for an address (roughly 1 in 4 wallets has earnings)"""
+    digest = hashlib.sha256(address.encode()).digest()
+    if digest[0] % 4 != 0:
+        payload = {'local': {'crypto_receipts': 0, 'night_allocation': 0}}
+    else:
+        payload = {
+            'local': {
+                'crypto_receipts': digest[1] + 1,
+                'night_allocation': int.from_bytes(digest[2:6], 'big'),
+            }
+        }
+
+    if payload_bytes > 0:
+        # Stands in for the global/leaderboard fields of the real response
+        payload['global'] = {'padding': 'x' * payload_bytes}
+    return payload
+
+
+def sample_latency(rng, mean, distribution='fixed'):
+    """Draw one artificial latency (seconds) with the given mean"""
+    if mean <= 0:
+        return 0.0
+    if distribution == 'uniform':
+        return rng.uniform(0, 2 * mean)
+    if distribution == 'exponential':
+        return rng.expovariate(1 / mean)
+    if distribution == 'lognormal':
+        return rng.lognormvariate(math.log(mean) - LOGNORMAL_SIGMA ** 2 / 2, LOGNORMAL_SIGMA)
+    return mean
+
+
+class StubStatsHandler(BaseHTTPRequestHandler):
+    """Request handler serving /statistics/<address> and /api/challenge"""
+
+    # Keep-alive so clients can reuse connections like against the real API
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; avoid delayed-ACK stalls on reused connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if self.path == '/':
+            # Page the browser method loads so its fetch() calls are same-origin
+            self._send(200, b'<!doctype html><title>stub</title>', 'text/html')
+            return
+        if not self.path.startswith('/statistics/') and self.path != '/api/challenge':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        delay = server.next_latency()
+        if delay > 0:
+            time.sleep(delay)
+
+        if server.should_throttle():
+            self._send_json(429, {'error': 'Too Many Requests'}, {'Retry-After': str(server.retry_after)})
+            return
+
+        if self.path == '/api/challenge':
+            self._send_json(200, STUB_CHALLENGE)
+            return
+
+        address = self.path[len('/statistics/'):]
+        self._send_json(200, stub_stats_payload(address, server.payload_bytes))
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode(), 'application/json', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate benchmark timings
+        pass
+
+
+class StubStatsServer(ThreadingHTTPServer):
+    """Threaded HTTP server with artificial latency, 429 injection and padded payloads"""
+
+    daemon_threads = True
+    # socketserver's default backlog of 5 drops connections under concurrent load
+    request_queue_size = 1024
+
+    def __init__(self, port=0, latency=0.0, latency_dist='fixed', throttle_rate=0.0, retry_after=1,
+                 payload_bytes=0, seed=None):
+        """
+        Args:
+            port: Port to listen on (0 = any free port)
+            latency: Mean artificial latency per request, in seconds
+            latency_dist: One of LATENCY_DISTRIBUTIONS
+            throttle_rate: Fraction of requests answered with 429
+            retry_after: Retry-After seconds sent with injected 429s
+            payload_bytes: Filler bytes added to each statistics response
+            seed: Random seed, for reproducible latencies and throttling
+        """
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{latency_dist}'")
+        super().__init__(('127.0.0.1', port), StubStatsHandler)
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.payload_bytes = payload_bytes
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+
+    def next_latency(self):
+        """Count a request and draw its artificial latency"""
+        with self.lock:
+            self.requests += 1
+            return sample_latency(self.rng, self.latency, self.latency_dist)
+
+    def should_throttle(self):
+        """Decide whether to answer the current request with 429"""
+        if self.throttle_rate <= 0:
+            return False
+        with self.lock:
+            if self.rng.random() >= self.throttle_rate:
+                return False
+            self.throttled += 1
+            return True
+
+    def counters(self):
+        """Requests served and 429s injected so far"""
+        with self.lock:
+            return {'requests': self.requests, 'throttled': self.throttled}
+
+    @property
+    def stats_url(self):
+        """URL template usable as `stats_url` by the fetchers"""
+        return f'http://127.0.0.1:{self.server_address[1]}/statistics/{{address}}'
+
+
+def start_stub_server(port=0, latency=0.0, **kwargs):
+    """
+    Start a stub server on a background thread (kwargs as for StubStatsServer)
+    Returns: the running StubStatsServer (call shutdown() when done)
+    """
+    server = StubStatsServer(port=port, latency=latency, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    args, options = split_options(sys.argv[1:])
+    port = int(args[0]) if args else 8787
+    latency = float(options.get('latency', 0.05))
+    latency_dist = options.get('latency_dist', 'fixed')
+    if latency_dist not in LATENCY_DISTRIBUTIONS:
+        print(f"Error: Unknown latency distribution '{latency_dist}' (choose from {', '.join(LATENCY_DISTRIBUTIONS)})")
+        sys.exit(1)
+
+    server = StubStatsServer(port=port, latency=latency, latency_dist=latency_dist,
+                             throttle_rate=float(options.get('throttle_rate', 0)),
+                             retry_after=int(options.get('retry_after', 1)),
+                             payload_bytes=int(options.get('payload_bytes', 0)))
+    print(f"Stub statistics server on {server.stats_url} (latency {latency}s {latency_dist}, "
+          f"{server.throttle_rate:.0%} throttled)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
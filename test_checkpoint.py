@@ -0,0 +1,91 @@
+"""
+Tests for the resumable result journal in checkpoint.py
+
+Run with:
+    python3.11 -m pytest test_checkpoint.py
+"""
+import os
+import sys
+import json
+import subprocess
+from checkpoint import ResultJournal, iter_journal
+from stub_stats_server import start_stub_server
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def wallet(i):
+    return f'addr1{i:040d}'
+
+
+def line(stats):
+    return json.dumps(stats, separators=(',', ':')).encode() + b'\n'
+
+
+def test_torn_tail_is_truncated_before_appending(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    path.write_bytes(line({'address': wallet(1)}) + line({'address': wallet(2)}) + b'{"address":"addr1')
+
+    journal = ResultJournal(str(path), commit_every=1)
+    assert journal.load() == {wallet(1), wallet(2)}
+    journal.write({'address': wallet(3)})
+    journal.close()
+
+    assert [record['address'] for record in iter_journal(str(path))] == [wallet(1), wallet(2), wallet(3)]
+    assert path.read_bytes().endswith(line({'address': wallet(3)}))
+
+
+def test_torn_tail_longer_than_one_read_step(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    intact = line({'address': wallet(1)})
+    path.write_bytes(intact + b'{"address":"' + b'x' * 10000)
+
+    journal = ResultJournal(str(path))
+    assert journal.load() == {wallet(1)}
+    journal.close()
+    assert path.read_bytes() == intact
+
+    # A journal with no complete line at all is emptied
+    path.write_bytes(b'x' * 5000)
+    journal = ResultJournal(str(path))
+    assert journal.load() == set()
+    journal.close()
+    assert path.read_bytes() == b''
+
+
+def test_failed_results_are_not_done_until_a_later_success(tmp_path):
+    path = tmp_path / 'run.jsonl'
+    path.write_bytes(line({'address': wallet(1)})
+                     + line({'address': wallet(2), 'error': 'HTTP 500'})
+                     + line({'address': wallet(3), 'error': 'HTTP 500'})
+                     + line({'address': wallet(3)}))
+
+    journal = ResultJournal(str(path))
+    assert journal.load() == {wallet(1), wallet(3)}
+    journal.close()
+
+
+def test_resumed_run_skips_finished_wallets(tmp_path):
+    addresses = [wallet(i) for i in range(30)]
+    wallet_file = tmp_path / 'wallets.json'
+    wallet_file.write_text(json.dumps(addresses))
+    journal_file = tmp_path / 'run.jsonl'
+    # An earlier run finished the first ten wallets, one of them with a failure, then crashed mid-line
+    journal_file.write_bytes(b''.join(line({'address': address}) for address in addresses[:9])
+                             + line({'address': addresses[9], 'error': 'HTTP 500'}) + b'{"addr')
+
+    server = start_stub_server(latency=0.001, seed=1)
+    try:
+        result = subprocess.run([sys.executable, os.path.join(HERE, 'fetch_wallet_stats_direct.py'),
+                                 str(wallet_file), '--journal', str(journal_file), '--rate', '500',
+                                 '--max-rate', '1000', '--stats-url', server.stats_url],
+                                capture_output=True, text=True, timeout=120, cwd=tmp_path)
+        assert result.returncode == 0, result.stdout + result.stderr
+    finally:
+        server.shutdown()
+
+    assert 'Resuming from journal' in result.stdout
+    assert server.counters()['requests'] == 21
+    journal = ResultJournal(str(journal_file))
+    assert journal.load() == set(addresses)
+    journal.close()
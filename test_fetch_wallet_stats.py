@@ -0,0 +1,91 @@
+"""
+Tests for the browser fetcher's output ordering in fetch_wallet_stats.py
+The browser pool and the in-page fetch are stubbed, so no browser is needed.
+
+Run with:
+    python3.11 -m pytest test_fetch_wallet_stats.py
+"""
+import sys
+import json
+import types
+import asyncio
+
+try:
+    import playwright.async_api  # noqa: F401
+except ImportError:
+    # Only the pool imports playwright, and the pool is replaced below
+    sys.modules['playwright'] = types.ModuleType('playwright')
+    sys.modules['playwright.async_api'] = types.SimpleNamespace(async_playwright=None)
+
+import fetch_wallet_stats
+from rate_limiter import AdaptiveRateLimiter
+from retry_queue import RetryQueue, RetryPolicy, DEFAULT_RETRY_POLICIES, failure_record, ERROR_SERVER, ERROR_CLIENT
+
+
+class FakePool:
+    """Runs jobs in groups and hands the results back in reverse, like pages finishing out of order"""
+
+    def __init__(self, **kwargs):
+        self.stats_rate_limiter = AdaptiveRateLimiter(rate=1000, max_rate=1000)
+        self.first_result_seconds = None
+
+    def map_as_completed(self, job, items, timeout=30, window=None):
+        group = []
+        for item in items:
+            group.append(item)
+            if len(group) == 3:
+                yield from self._run(job, group)
+                group = []
+        yield from self._run(job, group)
+
+    @staticmethod
+    def _run(job, group):
+        results = [asyncio.run(job(None, None, item)) for item in group]
+        return reversed([(item, result, None) for item, result in zip(group, results)])
+
+    def route_summary(self):
+        return []
+
+    def close_all(self):
+        pass
+
+
+def wallet(i):
+    return f'addr1{i:040d}'
+
+
+def test_browser_dedup_writes_every_position_in_input_order(tmp_path, monkeypatch):
+    addresses = [wallet(1), wallet(2), ' ' + wallet(1).upper(), 'bogus', wallet(3), wallet(2), wallet(4), wallet(1)]
+    wallet_file = tmp_path / 'wallets.json'
+    wallet_file.write_text(json.dumps(addresses))
+    output_file = tmp_path / 'results.jsonl'
+    requests = {}
+
+    async def fake_fetch_stats_on_page(pool, browser, page, batch, *args):
+        records = []
+        for address in batch:
+            requests[address] = requests.get(address, 0) + 1
+            if address in (wallet(1), wallet(3)) and requests[address] == 1:
+                records.append(failure_record(address, 'HTTP 500', ERROR_SERVER))
+            else:
+                records.append({'address': address, 'solutions': int(address[-1]), 'night': 0.5})
+        return records
+
+    monkeypatch.setattr(fetch_wallet_stats, 'AsyncBrowserPool', FakePool)
+    monkeypatch.setattr(fetch_wallet_stats, 'fetch_stats_on_page', fake_fetch_stats_on_page)
+    monkeypatch.setattr(fetch_wallet_stats, 'RetryQueue', lambda: RetryQueue(
+        {error_class: RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+         for error_class in DEFAULT_RETRY_POLICIES}))
+    # A small reorder window, so fresh wallets also have to wait for a retried head
+    monkeypatch.setattr(fetch_wallet_stats, 'DEFAULT_REORDER_BUFFER', 3)
+    monkeypatch.setattr(sys, 'argv', ['fetch_wallet_stats.py', str(wallet_file), '--dedup', 'set', '--fetch-batch',
+                                      '2', '--output', str(output_file), '--output-format', 'jsonl'])
+    monkeypatch.chdir(tmp_path)
+
+    fetch_wallet_stats.main()
+
+    results = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [stats['address'] for stats in results] == [address.strip().lower() for address in addresses]
+    assert results[3]['error_class'] == ERROR_CLIENT
+    assert all('error' not in stats for k, stats in enumerate(results) if k != 3)
+    assert requests == {wallet(1): 2, wallet(2): 1, wallet(3): 2, wallet(4): 1}
@@ -0,0 +1,106 @@
+"""
+Tests for the ordered async engine in fetch_wallet_stats_direct.py
+
+Run with:
+    python3.11 -m pytest test_fetch_wallet_stats_direct.py
+"""
+import json
+import asyncio
+from fetch_wallet_stats_direct import iter_wallet_stats
+from retry_queue import RetryQueue, RetryPolicy, DEFAULT_RETRY_POLICIES, is_failure
+from address_dedup import DuplicateTracker, find_duplicates
+
+STATS_URL = 'http://stub/statistics/{address}'
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.content = json.dumps(payload or {}).encode()
+        self.headers = headers or {}
+
+
+class FakeClient:
+    """Answers every address with a small payload; listed addresses fail on their first request"""
+
+    def __init__(self, fail_once=(), delays=None):
+        self.fail_once = set(fail_once)
+        self.delays = delays or {}
+        self.requests = {}
+
+    async def aget(self, url):
+        address = url.rsplit('/', 1)[1]
+        self.requests[address] = self.requests.get(address, 0) + 1
+        await asyncio.sleep(self.delays.get(address, 0.001))
+        if address in self.fail_once and self.requests[address] == 1:
+            return FakeResponse(500)
+        return FakeResponse(200, {'local': {'crypto_receipts': len(address), 'night_allocation': 1_000_000}})
+
+    async def aclose(self):
+        pass
+
+
+class ScriptedClient:
+    """Gives the n-th request for any address the n-th scripted response"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    async def aget(self, url):
+        await asyncio.sleep(0.001)
+        return self.responses.pop(0)
+
+    async def aclose(self):
+        pass
+
+
+def fast_retries():
+    return RetryQueue({error_class: RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.01)
+                       for error_class in DEFAULT_RETRY_POLICIES})
+
+
+def wallet(i):
+    return f'addr1{i:040d}'
+
+
+def run(addresses, client, **kwargs):
+    async def collect():
+        return [stats async for stats in iter_wallet_stats(addresses, concurrency=4, stats_url=STATS_URL,
+                                                           client=client, retries=fast_retries(), **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_retried_wallets_keep_input_order():
+    addresses = [wallet(i) for i in range(50)]
+    client = FakeClient(fail_once=addresses[::7])
+    results = run(addresses, client)
+    assert [stats['address'] for stats in results] == addresses
+    assert not any(is_failure(stats) for stats in results)
+
+
+def test_duplicate_of_wallet_that_fails_once_keeps_its_position():
+    addresses = [wallet(1), wallet(2), wallet(1), wallet(3), wallet(1)]
+    # The duplicate's first occurrence fails, and the wallets between the copies finish later
+    client = FakeClient(fail_once=[wallet(1)], delays={wallet(2): 0.05, wallet(3): 0.05})
+    dedup = DuplicateTracker(find_duplicates(lambda: addresses))
+    results = run(addresses, client, dedup=dedup)
+    assert [stats['address'] for stats in results] == addresses
+    assert not any(is_failure(stats) for stats in results)
+    assert client.requests[wallet(1)] == 2  # one failure and one retry, no request for the copies
+    assert dedup.saved == 2
+
+
+def test_repeated_address_retries_keep_their_own_positions():
+    ok = FakeResponse(200, {'local': {'crypto_receipts': 1, 'night_allocation': 0}})
+    # Both copies fail; the first one's retry waits out a Retry-After and fails again
+    client = ScriptedClient([FakeResponse(500, headers={'Retry-After': '0.2'}), FakeResponse(500), ok,
+                             FakeResponse(500)])
+    retries = RetryQueue({error_class: RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.01)
+                          for error_class in DEFAULT_RETRY_POLICIES})
+
+    async def collect():
+        return [stats async for stats in iter_wallet_stats([wallet(1), wallet(1)], concurrency=4,
+                                                           stats_url=STATS_URL, client=client, retries=retries)]
+    results = asyncio.run(collect())
+    assert is_failure(results[0]) and results[0]['attempts'] == 2
+    assert not is_failure(results[1])
@@ -0,0 +1,62 @@
+"""
+Tests for rate_limiter.py
+
+Run with:
+    python3.11 -m pytest test_rate_limiter.py
+"""
+import pytest
+import rate_limiter
+from rate_limiter import AdaptiveRateLimiter, SharedRateLimiter
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.mark.parametrize('limiter_class', [AdaptiveRateLimiter, SharedRateLimiter])
+def test_throttle_burst_cuts_rate_once(clock, limiter_class):
+    limiter = limiter_class(rate=8.0, decrease=0.5)
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.rate == 4.0
+    assert limiter.metrics()['throttles'] == 10
+
+
+@pytest.mark.parametrize('limiter_class', [AdaptiveRateLimiter, SharedRateLimiter])
+def test_throttle_after_refill_interval_cuts_again(clock, limiter_class):
+    limiter = limiter_class(rate=8.0, decrease=0.5)
+    limiter.on_throttle()
+    # Refill interval at the lowered rate of 4/s is 0.25s
+    clock.now += 0.2
+    limiter.on_throttle()
+    assert limiter.rate == 4.0
+    clock.now += 0.05
+    limiter.on_throttle()
+    assert limiter.rate == 2.0
+
+
+def test_throttle_in_burst_still_honors_retry_after(clock):
+    limiter = AdaptiveRateLimiter(rate=8.0)
+    limiter.on_throttle()
+    limiter.on_throttle(retry_after=5)
+    assert limiter.rate == 4.0
+    assert limiter.paused_until == clock.now + 5
+
+
+def test_rate_never_drops_below_min_rate(clock):
+    limiter = AdaptiveRateLimiter(rate=1.0, min_rate=0.5, decrease=0.1)
+    for _ in range(5):
+        limiter.on_throttle()
+        clock.now += 10
+    assert limiter.rate == 0.5
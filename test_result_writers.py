@@ -0,0 +1,79 @@
+"""
+Tests for the columnar results format in result_writers.py
+
+Run with:
+    python3.11 -m pytest test_result_writers.py
+"""
+import pytest
+from result_writers import ColumnarWriter, ColumnarResults, open_writer, iter_result_file, FLUSH_EVERY
+from retry_queue import failure_record, ERROR_SERVER
+
+
+def wallet(i):
+    return f'addr1{i:040d}'
+
+
+def make_records(count):
+    records = []
+    for i in range(count):
+        if i % 7 == 3:
+            records.append(failure_record(wallet(i), 'HTTP 500', ERROR_SERVER, 4))
+        else:
+            records.append({'address': wallet(i), 'solutions': i * 3, 'night': i / 8})
+    return records
+
+
+def test_round_trip_across_spill_flushes_keeps_every_record(tmp_path):
+    path = str(tmp_path / 'results.wcol')
+    records = make_records(FLUSH_EVERY * 2 + 5)
+    with ColumnarWriter(path) as writer:
+        for stats in records:
+            writer.write(stats)
+    assert writer.count == len(records)
+
+    with ColumnarResults(path) as results:
+        assert len(results) == len(records)
+        assert results.header['sorted'] is True
+        for i in (0, 3, FLUSH_EVERY - 1, FLUSH_EVERY, FLUSH_EVERY + 3, len(records) - 1):
+            assert results.address(i) == wallet(i)
+            expected = records[i]
+            if 'error' in expected:
+                # Failures keep None values, not zeros that could pass for an empty wallet
+                assert results.record(i) == {'address': wallet(i), 'solutions': None, 'night': None,
+                                             'error': 'failed'}
+            else:
+                assert results.record(i) == expected
+        assert sum(results.failed) == sum('error' in stats for stats in records)
+
+
+def test_unsorted_and_empty_files(tmp_path):
+    path = str(tmp_path / 'unsorted.wcol')
+    with open_writer(path, 'columnar') as writer:
+        for i in (2, 1, 3):
+            writer.write({'address': wallet(i), 'solutions': i, 'night': 0.0})
+    with ColumnarResults(path) as results:
+        assert results.header['sorted'] is False
+    assert [stats['address'] for stats in iter_result_file(path)] == [wallet(2), wallet(1), wallet(3)]
+
+    path = str(tmp_path / 'empty.wcol')
+    ColumnarWriter(path).close()
+    with ColumnarResults(path) as results:
+        assert len(results) == 0
+        assert list(results) == []
+
+
+@pytest.mark.parametrize('fmt', ['json', 'jsonl'])
+def test_converted_results_read_back_unchanged(tmp_path, fmt):
+    records = make_records(20)
+    path = str(tmp_path / f'results.{fmt}')
+    with open_writer(path, fmt) as writer:
+        for stats in records:
+            writer.write(stats)
+    assert list(iter_result_file(path)) == records
+
+
+def test_non_columnar_file_is_rejected(tmp_path):
+    path = tmp_path / 'results.json'
+    path.write_text('[]')
+    with pytest.raises(ValueError):
+        ColumnarResults(str(path))
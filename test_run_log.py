@@ -0,0 +1,29 @@
+"""
+Tests for log sampling in run_log.py
+
+Run with:
+    python3.11 -m pytest test_run_log.py
+"""
+import io
+import json
+from run_log import RunLog, get_logger
+
+
+def test_sampling_thins_the_console_but_not_the_json_file(tmp_path):
+    json_file = tmp_path / 'run.log.jsonl'
+    stream = io.StringIO()
+    run_log = RunLog('info', str(json_file), sample_rate=5, stream=stream)
+    log = get_logger('test')
+    for i in range(200):
+        log.info("✓ wallet %d", i, extra={'sample': True, 'fields': {'index': i}})
+    log.warning("✗ wallet failed")
+    run_log.close()
+
+    entries = [json.loads(line) for line in json_file.read_text(encoding='utf-8').splitlines()]
+    assert [entry['index'] for entry in entries[:-1]] == list(range(200))
+    assert entries[-1]['level'] == 'warning'
+
+    console = stream.getvalue()
+    assert console.count('✓ wallet') < 200
+    assert '✗ wallet failed' in console
+    assert 'suppressed on the console' in console
@@ -0,0 +1,39 @@
+"""
+Tests for selective field extraction in stats_decoder.py
+
+Run with:
+    python3.11 -m pytest test_stats_decoder.py
+"""
+import json
+import pytest
+from stats_decoder import StatsDecoder, extract_local_fields, SELECTIVE_MIN_BYTES
+
+PADDING = {'global': {'history': [{'day': day, 'receipts': day * 7} for day in range(80)]}}
+
+
+def body(local):
+    text = json.dumps({**PADDING, 'local': local})
+    assert len(text) >= SELECTIVE_MIN_BYTES
+    return text.encode()
+
+
+def test_flat_numeric_local_object_is_read_without_decoding():
+    assert extract_local_fields(body({'crypto_receipts': 12, 'night_allocation': 3_500_000})) == \
+        {'local': {'crypto_receipts': 12, 'night_allocation': 3_500_000}}
+
+
+@pytest.mark.parametrize('local', [
+    {'note': 'a}b', 'crypto_receipts': 12, 'night_allocation': 3_500_000},
+    {'crypto_receipts': 12, 'note': 'x, "night_allocation": 1', 'night_allocation': 3_500_000},
+    {'crypto_receipts': 12},
+    {'crypto_receipts': 12, 'night_allocation': None},
+], ids=['brace-in-string', 'key-in-string', 'missing-field', 'null'])
+def test_ambiguous_local_objects_fall_back_to_a_full_decode(local):
+    assert extract_local_fields(body(local)) is None
+
+
+def test_selective_decode_matches_a_full_decode_for_string_values():
+    data = body({'note': 'a}b', 'crypto_receipts': 12, 'night_allocation': 3_500_000})
+    selective = StatsDecoder('json', selective=True)
+    assert selective.decode('addr1x', data) == {'address': 'addr1x', 'solutions': 12, 'night': 3.5}
+    assert selective.summary()['decoded'] == 1
@@ -0,0 +1,74 @@
+"""
+Tests for the streaming wallet reader and its sidecar index in wallet_reader.py
+
+Run with:
+    python3.11 -m pytest test_wallet_reader.py
+"""
+import re
+import json
+import codecs
+import pytest
+from wallet_reader import count_wallets, iter_wallet_addresses, read_index, INDEX_KIND, INDEX_VERSION
+
+ADDRESSES = [f'addr1q{i:039d}' for i in range(5)]
+
+
+def json_objects(addresses):
+    return json.dumps([{'address': address, 'label': 'wallet ü'} for address in addresses], indent=2,
+                      ensure_ascii=False)
+
+
+def json_strings(addresses):
+    return json.dumps(addresses)
+
+
+def json_lines(addresses):
+    # Objects and plain strings may be mixed; blank lines are skipped
+    return '\n'.join(json.dumps({'address': address}) if k % 2 else json.dumps(address) + '\n'
+                     for k, address in enumerate(addresses)) + '\n'
+
+
+def plain_text(addresses):
+    return '# exported wallets\n\n' + '\n'.join(f'  {address}  ' for address in addresses) + '\n'
+
+
+@pytest.mark.parametrize('bom', [b'', codecs.BOM_UTF8], ids=['plain', 'bom'])
+@pytest.mark.parametrize('render', [json_objects, json_strings, json_lines, plain_text])
+def test_every_format_reads_back_in_order(tmp_path, render, bom):
+    path = tmp_path / 'wallets'
+    path.write_bytes(bom + render(ADDRESSES).encode('utf-8'))
+
+    assert count_wallets(str(path)) == len(ADDRESSES)
+    assert list(iter_wallet_addresses(str(path))) == ADDRESSES
+    assert list(iter_wallet_addresses(str(path), 2, 2)) == ADDRESSES[2:4]
+
+
+@pytest.mark.parametrize('render', [json_objects, json_lines])
+def test_seeks_through_the_sidecar_index_across_stride_boundaries(tmp_path, render):
+    addresses = [f'addr1q{i:039d}' for i in range(2500)]
+    path = tmp_path / 'wallets'
+    path.write_bytes(codecs.BOM_UTF8 + render(addresses).encode('utf-8'))
+
+    assert count_wallets(str(path)) == len(addresses)
+    index = read_index(str(path), INDEX_KIND, INDEX_VERSION)
+    assert index is not None and index['count'] == len(addresses)
+    assert len(index['offsets']) == 3
+
+    # Each indexed offset points at its wallet, past the BOM and any multi-byte characters before it
+    data = path.read_bytes()
+    for slot, offset in enumerate(index['offsets']):
+        assert re.search(rb'addr1q\d+', data[offset:]).group().decode() == addresses[slot * index['stride']]
+
+    for start, limit in [(0, 3), (998, 5), (1000, 1), (1999, 2), (2497, 10)]:
+        assert list(iter_wallet_addresses(str(path), start, limit)) == addresses[start:start + limit]
+
+
+def test_index_is_rebuilt_when_the_wallet_file_changes(tmp_path):
+    path = tmp_path / 'wallets.txt'
+    path.write_text(plain_text(ADDRESSES))
+    assert count_wallets(str(path)) == len(ADDRESSES)
+    assert (tmp_path / 'wallets.txt.idx').exists()
+
+    path.write_text(plain_text(ADDRESSES + ['addr1q' + '7' * 39]))
+    assert count_wallets(str(path)) == len(ADDRESSES) + 1
+    assert list(iter_wallet_addresses(str(path), 5)) == ['addr1q' + '7' * 39]
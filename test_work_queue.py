@@ -0,0 +1,97 @@
+"""
+End-to-end tests of work_queue.py against the stub server
+
+Run with:
+    python3.11 -m pytest test_work_queue.py
+"""
+import os
+import sys
+import json
+import subprocess
+from stub_stats_server import start_stub_server
+from work_queue import WorkQueue
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+NUM_WALLETS = 300
+RANGE_SIZE = 40
+NUM_WORKERS = 3
+
+
+def work_queue(*args):
+    return subprocess.run([sys.executable, os.path.join(HERE, 'work_queue.py'), *args],
+                          capture_output=True, text=True, timeout=120, cwd=HERE)
+
+
+def test_workers_export_every_wallet_in_order(tmp_path):
+    addresses = [f'addr1{i:040d}' for i in range(NUM_WALLETS)]
+    wallet_file = tmp_path / 'wallets.json'
+    wallet_file.write_text(json.dumps([{'address': address} for address in addresses]))
+    queue_file = str(tmp_path / 'sweep.sqlite')
+    output_file = tmp_path / 'results.jsonl'
+
+    # Varied latency, so results complete out of order within each range
+    server = start_stub_server(latency=0.01, latency_dist='exponential', seed=1)
+    try:
+        assert work_queue('init', queue_file, str(wallet_file), '--range-size', str(RANGE_SIZE)).returncode == 0
+
+        workers = [subprocess.Popen([sys.executable, os.path.join(HERE, 'work_queue.py'), 'worker', queue_file,
+                                     '--worker-id', f'worker-{k}', '--concurrency', '8', '--rate', '500',
+                                     '--max-rate', '1000', '--stats-url', server.stats_url],
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, cwd=HERE)
+                   for k in range(NUM_WORKERS)]
+        outputs = [worker.communicate(timeout=120)[0] for worker in workers]
+        assert [worker.returncode for worker in workers] == [0] * NUM_WORKERS, outputs
+
+        exported = work_queue('export', queue_file, str(output_file), '--format', 'jsonl')
+        assert exported.returncode == 0, exported.stdout
+    finally:
+        server.shutdown()
+
+    results = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [stats['address'] for stats in results] == addresses
+    assert not any('error' in stats for stats in results)
+    assert server.counters()['requests'] == NUM_WALLETS
+
+    ranges_done = sum(int(output.split(' ranges, ')[0].rsplit(' ', 1)[1])
+                      for output in outputs if ' ranges, ' in output)
+    assert ranges_done == -(-NUM_WALLETS // RANGE_SIZE)
+    assert f'Results collected: {NUM_WALLETS}' in exported.stdout
+
+
+def test_expired_lease_of_dead_worker_is_reclaimed(tmp_path):
+    addresses = [f'addr1{i:040d}' for i in range(3 * RANGE_SIZE)]
+    wallet_file = tmp_path / 'wallets.json'
+    wallet_file.write_text(json.dumps([{'address': address} for address in addresses]))
+    queue_file = str(tmp_path / 'sweep.sqlite')
+    output_file = tmp_path / 'results.jsonl'
+
+    # Each range takes longer than the lease timeout, so the live worker has to keep renewing
+    server = start_stub_server(latency=0.1, seed=1)
+    try:
+        assert work_queue('init', queue_file, str(wallet_file), '--range-size', str(RANGE_SIZE)).returncode == 0
+
+        # A worker that takes the first range and dies without renewing it
+        queue = WorkQueue(queue_file, lease_timeout=1)
+        assert queue.lease('dead-worker')[0] == 1
+        queue.close()
+
+        worker = work_queue('worker', queue_file, '--worker-id', 'live-worker', '--concurrency', '4',
+                            '--rate', '500', '--max-rate', '1000', '--lease-timeout', '1',
+                            '--stats-url', server.stats_url)
+        assert worker.returncode == 0, worker.stdout
+        exported = work_queue('export', queue_file, str(output_file), '--format', 'jsonl')
+        assert exported.returncode == 0, exported.stdout
+    finally:
+        server.shutdown()
+
+    assert 'Range 1 ' in worker.stdout
+    assert 'was reclaimed' not in worker.stdout
+    results = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [stats['address'] for stats in results] == addresses
+    assert server.counters()['requests'] == len(addresses)
+
+    queue = WorkQueue(queue_file)
+    try:
+        assert queue.progress()['reclaimed'] == 1
+    finally:
+        queue.close()
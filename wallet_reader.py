@@ -0,0 +1,286 @@
+#!/usr/bin/env python3.11
+"""
+Streaming wallet-file reader
+
+Reads wallet addresses lazily instead of json.load()-ing the whole file, so
+memory stays flat no matter how many wallets the file holds.
+
+Supported formats (detected from the first non-whitespace character):
+    - JSON array of objects with an "address" key, or of plain strings
+    - JSON Lines (one JSON string or {"address": ...} object per line)
+    - Plain text (one address per line, blank lines and # comments ignored)
+
+A small sidecar index (<wallet_file>.idx) records the byte offset of every
+INDEX_STRIDE-th wallet plus the total count. Later batches seek straight to
+the nearest indexed wallet instead of re-parsing the file from the start.
+The index is rebuilt automatically when the wallet file changes.
+"""
+import os
+import json
+import codecs
+
+INDEX_STRIDE = 1000
+INDEX_VERSION = 1
+INDEX_KIND = 'wallets'
+CHUNK_SIZE = 1 << 16
+
+FORMAT_JSON_ARRAY = 'json'
+FORMAT_JSON_LINES = 'jsonl'
+FORMAT_TEXT = 'text'
+
+
+def detect_format(path):
+    """Detect the wallet file format from its first non-whitespace character"""
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return FORMAT_JSON_ARRAY  # empty file, treated as an empty array
+            stripped = chunk.lstrip(b'\xef\xbb\xbf \t\r\n')
+            if stripped:
+                break
+
+    first = stripped[:1]
+    if first == b'[':
+        return FORMAT_JSON_ARRAY
+    if first in (b'{', b'"'):
+        return FORMAT_JSON_LINES
+    return FORMAT_TEXT
+
+
+def wallet_address(wallet):
+    """Support both {'address': '...'} and plain string entries"""
+    return wallet if isinstance(wallet, str) else wallet['address']
+
+
+def _iter_json_array(f, offset, expect_open):
+    """
+    Yield (byte_offset, element) for each element of a JSON array
+    Args:
+        f: Binary file positioned at `offset`
+        offset: Byte offset of the current position
+        expect_open: True when positioned before '[', False when at an element
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    base = offset  # byte offset of buf[0]
+    ascii_only = True  # byte offsets equal character offsets within buf
+    # Last converted position in buf and its byte offset: offsets are asked for in
+    # increasing order, so only the text since the previous one is re-encoded
+    mark_char, mark_byte = 0, offset
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, base, ascii_only, eof, mark_char, mark_byte
+        base = byte_offset(pos)
+        chunk = f.read(CHUNK_SIZE)
+        eof = not chunk
+        buf = buf[pos:] + text_decoder.decode(chunk, final=eof)
+        ascii_only = buf.isascii()
+        pos = 0
+        mark_char, mark_byte = 0, base
+
+    def byte_offset(char_pos):
+        nonlocal mark_char, mark_byte
+        if ascii_only:
+            return base + char_pos
+        if char_pos < mark_char:
+            mark_char, mark_byte = 0, base
+        mark_byte += len(buf[mark_char:char_pos].encode('utf-8'))
+        mark_char = char_pos
+        return mark_byte
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    if expect_open:
+        skip_whitespace()
+        if pos >= len(buf):
+            return  # empty file
+        if buf[pos] != '[':
+            raise ValueError("Expected a JSON array of wallets")
+        pos += 1
+
+    first = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of wallet file (unterminated JSON array)")
+        if buf[pos] == ']':
+            return
+        if not first:
+            if buf[pos] != ',':
+                raise ValueError(f"Expected ',' or ']' at byte {byte_offset(pos)}")
+            pos += 1
+            skip_whitespace()
+        first = False
+
+        element_offset = None
+        while True:
+            try:
+                element, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            if end == len(buf) and not eof:
+                # A value ending exactly at the buffer edge may be truncated - read more
+                fill()
+                continue
+            element_offset = byte_offset(pos)
+            pos = end
+            break
+
+        yield element_offset, element
+
+
+def _iter_lines(f, fmt):
+    """Yield (byte_offset, address) for each wallet in a line-based file"""
+    while True:
+        line_offset = f.tell()
+        line = f.readline()
+        if not line:
+            return
+
+        text = line.decode('utf-8').strip()
+        if not text or (fmt == FORMAT_TEXT and text.startswith('#')):
+            continue
+
+        if fmt == FORMAT_JSON_LINES:
+            yield line_offset, wallet_address(json.loads(text))
+        else:
+            yield line_offset, text
+
+
+def _iter_entries(path, fmt, offset=0):
+    """Yield (byte_offset, address) for every wallet from `offset` on"""
+    with open(path, 'rb') as f:
+        at_start = offset == 0
+        if at_start and f.read(3) == codecs.BOM_UTF8:
+            offset = 3
+        f.seek(offset)
+
+        if fmt == FORMAT_JSON_ARRAY:
+            for element_offset, element in _iter_json_array(f, offset, expect_open=at_start):
+                yield element_offset, wallet_address(element)
+        else:
+            yield from _iter_lines(f, fmt)
+
+
+def iter_json_array_file(path):
+    """Lazily yield the elements of a file holding one JSON array"""
+    with open(path, 'rb') as f:
+        offset = 3 if f.read(3) == codecs.BOM_UTF8 else 0
+        f.seek(offset)
+        for _, element in _iter_json_array(f, offset, expect_open=True):
+            yield element
+
+
+def index_path(path):
+    """Sidecar index location for a file (wallet file, or a merged results file)"""
+    return path + '.idx'
+
+
+def read_index(path, kind, version):
+    """The sidecar index of `path`, or None if it is missing, of another kind or version, or stale"""
+    try:
+        with open(index_path(path), 'r') as f:
+            index = json.load(f)
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    if (isinstance(index, dict)
+            and index.get('kind') == kind
+            and index.get('version') == version
+            and index.get('size') == st.st_size
+            and index.get('mtime_ns') == st.st_mtime_ns):
+        return index
+    return None
+
+
+def write_index(path, index, label='Wallet Index'):
+    """Write an index to the sidecar file of `path`"""
+    try:
+        with open(index_path(path), 'w') as f:
+            json.dump(index, f)
+    except OSError as e:
+        # Read-only location - the in-memory index still works for this run
+        print(f"  [{label}] Could not write {index_path(path)}: {e}")
+
+
+def build_index(path, stride=INDEX_STRIDE):
+    """
+    Stream the wallet file once and record every `stride`-th wallet's byte offset
+    Returns: index dict (also written to the sidecar file when possible)
+    """
+    fmt = detect_format(path)
+    st = os.stat(path)
+
+    offsets = []
+    count = 0
+    for offset, _ in _iter_entries(path, fmt):
+        if count % stride == 0:
+            offsets.append(offset)
+        count += 1
+
+    index = {
+        'kind': INDEX_KIND,
+        'version': INDEX_VERSION,
+        'format': fmt,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'stride': stride,
+        'count': count,
+        'offsets': offsets,
+    }
+    write_index(path, index)
+    return index
+
+
+def load_index(path):
+    """Load the sidecar index, rebuilding it if missing or stale"""
+    return read_index(path, INDEX_KIND, INDEX_VERSION) or build_index(path)
+
+
+def count_wallets(path):
+    """Total number of wallets in the file (from the index)"""
+    return load_index(path)['count']
+
+
+def iter_wallet_addresses(path, start_index=0, limit=None):
+    """
+    Lazily yield wallet addresses starting at `start_index`
+    Args:
+        path: Wallet file path
+        start_index: Index of the first wallet to yield
+        limit: Maximum number of wallets to yield (None = to end of file)
+    """
+    if limit is not None and limit <= 0:
+        return
+
+    index = load_index(path)
+    if start_index >= index['count']:
+        return
+
+    stride = index['stride']
+    slot = start_index // stride
+    skip = start_index - slot * stride
+
+    yielded = 0
+    for _, address in _iter_entries(path, index['format'], index['offsets'][slot]):
+        if skip:
+            skip -= 1
+            continue
+        yield address
+        yielded += 1
+        if limit is not None and yielded >= limit:
+            return
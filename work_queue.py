@@ -0,0 +1,365 @@
+#!/usr/bin/env python3.11
+"""
+Distributed work queue: several workers (on one or many hosts) pull wallet ranges from one SQLite file
+
+`init` splits a batch of the wallet file into ranges of --range-size
+wallets. Each `worker` repeatedly takes a lease on the next free range and
+fetches it with the direct fetcher's async engine. While working it renews
+the lease. Its results are written into the queue file, and the range is
+marked done. A range whose lease expires (its worker died or lost the
+network) is handed out again. `status` shows progress, and `export` writes
+all collected results, in wallet order, to a normal output file.
+
+The queue file must be on storage every worker can reach with working SQLite
+locking (a local disk, or a network filesystem with reliable locks). Leases
+use wall-clock time, so hosts need roughly synchronized clocks.
+
+Usage:
+    python3.11 work_queue.py init <queue_file> <wallet_file> [start_index] [batch_size] [--range-size N]
+    python3.11 work_queue.py worker <queue_file> [options]
+    python3.11 work_queue.py status <queue_file>
+    python3.11 work_queue.py export <queue_file> <output_file> [--format json|jsonl|csv|columnar]
+
+Worker options:
+    --concurrency N     Requests in flight (default: 10)
+    --rate R            Starting request rate for this worker (default: 10/s)
+    --max-rate R        Ceiling for this worker (default: 50/s)
+    --lease-timeout S   Seconds before an unrenewed lease is reclaimed (default: 300)
+    --wallet-file PATH  Wallet file location on this host (default: the path given to init)
+    --worker-id ID      Name recorded on leases (default: <hostname>:<pid>)
+    --stats-url URL     Statistics URL template, e.g. a stub server for testing
+
+Example:
+    python3.11 work_queue.py init sweep.sqlite wallets.json --range-size 1000
+    python3.11 work_queue.py worker sweep.sqlite --concurrency 20   # on every host
+    python3.11 work_queue.py export sweep.sqlite results.jsonl --format jsonl
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import sqlite3
+import threading
+from cli_options import split_options
+from wallet_reader import count_wallets, iter_wallet_addresses
+from result_writers import open_writer
+from rate_limiter import AdaptiveRateLimiter
+from retry_queue import RetryQueue
+from fetch_wallet_stats_direct import (create_client, _fetch_batch, STATS_URL, DEFAULT_CONCURRENCY,
+                                       DEFAULT_RATE, DEFAULT_MAX_RATE)
+
+DEFAULT_RANGE_SIZE = 1000
+DEFAULT_LEASE_TIMEOUT = 300  # seconds
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of wallet ranges with expiring leases, plus the collected results
+    """
+
+    def __init__(self, path, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+        """
+        Open (or create) a queue file
+        Args:
+            path: SQLite queue file, shared by every worker
+            lease_timeout: Seconds a lease stays valid without renewal
+        """
+        self.path = path
+        self.lease_timeout = lease_timeout
+
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE.
+        # Lease renewals run in a helper thread, so the worker calls share the
+        # connection under a lock.
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS ranges (
+                id INTEGER PRIMARY KEY,
+                start_index INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                worker TEXT,
+                lease_expires REAL,
+                leases INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS ranges_status ON ranges (status, lease_expires);
+            CREATE TABLE IF NOT EXISTS results (
+                range_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                address TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (range_id, position)
+            );
+        ''')
+
+    def initialize(self, wallet_file, start_index, end_index, range_size=DEFAULT_RANGE_SIZE):
+        """Fill an empty queue with the ranges covering wallets [start_index, end_index)"""
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            (existing,) = self.db.execute('SELECT COUNT(*) FROM ranges').fetchone()
+            if existing:
+                raise ValueError(f"queue {self.path} already holds {existing} ranges")
+
+            self.db.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', [
+                ('wallet_file', os.path.abspath(wallet_file)),
+                ('start_index', str(start_index)),
+                ('end_index', str(end_index)),
+            ])
+            self.db.executemany(
+                'INSERT INTO ranges (start_index, size, status) VALUES (?, ?, ?)',
+                ((start, min(range_size, end_index - start), PENDING)
+                 for start in range(start_index, end_index, range_size)),
+            )
+            self.db.execute('COMMIT')
+        except Exception:
+            self.db.execute('ROLLBACK')
+            raise
+
+    def meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def lease(self, worker):
+        """
+        Lease the next pending range, or one whose lease has expired
+        Returns: (range_id, start_index, size), or None when nothing is left to lease
+        """
+        with self.lock:
+            now = time.time()
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.db.execute(
+                    'SELECT id, start_index, size FROM ranges '
+                    'WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY id LIMIT 1',
+                    (PENDING, LEASED, now),
+                ).fetchone()
+                if row is not None:
+                    self.db.execute(
+                        'UPDATE ranges SET status = ?, worker = ?, lease_expires = ?, leases = leases + 1 WHERE id = ?',
+                        (LEASED, worker, now + self.lease_timeout, row[0]),
+                    )
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+            return row
+
+    def renew(self, range_id, worker):
+        """Extend a lease this worker still holds. Returns False if it was reclaimed."""
+        with self.lock:
+            cursor = self.db.execute(
+                'UPDATE ranges SET lease_expires = ? WHERE id = ? AND worker = ? AND status = ?',
+                (time.time() + self.lease_timeout, range_id, worker, LEASED),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, range_id, worker, results):
+        """
+        Store a range's results and mark it done
+        Results from a worker whose lease was reclaimed are still accepted if the range isn't done
+        yet - the fetch work is valid. Whichever worker completes a range first wins; later
+        results for it are dropped.
+        Returns: True if the range was marked done by this call
+        """
+        with self.lock:
+            self.db.execute('BEGIN IMMEDIATE')
+            try:
+                (status,) = self.db.execute('SELECT status FROM ranges WHERE id = ?', (range_id,)).fetchone()
+                if status == DONE:
+                    self.db.execute('COMMIT')
+                    return False
+
+                self.db.executemany(
+                    'INSERT OR REPLACE INTO results (range_id, position, address, result) VALUES (?, ?, ?, ?)',
+                    ((range_id, position, stats['address'], json.dumps(stats, separators=(',', ':')))
+                     for position, stats in enumerate(results)),
+                )
+                self.db.execute('UPDATE ranges SET status = ?, worker = ?, lease_expires = NULL WHERE id = ?',
+                                (DONE, worker, range_id))
+                self.db.execute('COMMIT')
+            except Exception:
+                self.db.execute('ROLLBACK')
+                raise
+            return True
+
+    def progress(self):
+        """Range counts by state, plus collected results"""
+        now = time.time()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, 'expired': 0}
+        for status, expired, count in self.db.execute(
+            'SELECT status, lease_expires < ?, COUNT(*) FROM ranges GROUP BY status, lease_expires < ?', (now, now)
+        ):
+            counts['expired' if status == LEASED and expired else status] += count
+        (counts['results'],) = self.db.execute('SELECT COUNT(*) FROM results').fetchone()
+        (counts['reclaimed'],) = self.db.execute('SELECT COALESCE(SUM(leases - 1), 0) FROM ranges WHERE leases > 1').fetchone()
+        return counts
+
+    def iter_results(self):
+        """Yield every collected result in wallet order"""
+        rows = self.db.execute(
+            'SELECT results.result FROM results JOIN ranges ON ranges.id = results.range_id '
+            'ORDER BY ranges.start_index, results.position'
+        )
+        for (result,) in rows:
+            yield json.loads(result)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+
+class _ListSink:
+    """Result sink that keeps one range's results in memory until it is completed"""
+
+    def __init__(self):
+        self.results = []
+
+    def write(self, stats):
+        self.results.append(stats)
+
+    def close(self):
+        pass
+
+
+async def _keep_lease(queue, range_id, worker):
+    """Renew a lease at a third of its timeout until cancelled"""
+    while True:
+        await asyncio.sleep(queue.lease_timeout / 3)
+        # Off the event loop: the UPDATE can wait up to 60 s on another host's write lock
+        if not await asyncio.to_thread(queue.renew, range_id, worker):
+            print(f"  [{worker}] Lease on range {range_id} was reclaimed by another worker")
+            return
+
+
+async def _work_range(queue, worker, range_id, addresses, client, concurrency, start_index, total, limiter, stats_url):
+    """Fetch one leased range while renewing its lease"""
+    sink = _ListSink()
+    keeper = asyncio.ensure_future(_keep_lease(queue, range_id, worker))
+    try:
+        totals = await _fetch_batch(addresses, client, concurrency, start_index, total, sink, None, limiter,
+                                    RetryQueue(), quiet=True, stats_url=stats_url)
+    finally:
+        keeper.cancel()
+
+    # Already in range order (the engine yields in input order), which export relies on
+    return totals, sink.results
+
+
+def run_worker(queue, worker, wallet_file, concurrency, limiter, stats_url=STATS_URL):
+    """
+    Lease and fetch ranges until every range is done
+    Returns: totals for this worker
+    """
+    total = int(queue.meta('end_index'))
+    worker_totals = {'ranges': 0, 'processed': 0, 'successful': 0, 'failed': 0}
+
+    while True:
+        lease = queue.lease(worker)
+        if lease is None:
+            counts = queue.progress()
+            if not counts[LEASED] and not counts['expired']:
+                return worker_totals
+            # Other workers still hold leases - stay around to pick up any that expire
+            time.sleep(min(queue.lease_timeout / 3, 5.0))
+            continue
+
+        range_id, start_index, size = lease
+        addresses = list(iter_wallet_addresses(wallet_file, start_index, size))
+        # A fresh client per range: pools are tied to the event loop of asyncio.run
+        client = create_client(pool_size=concurrency)
+        totals, results = asyncio.run(_work_range(
+            queue, worker, range_id, addresses, client, concurrency, start_index, total, limiter, stats_url
+        ))
+        queue.complete(range_id, worker, results)
+
+        worker_totals['ranges'] += 1
+        for key in ('processed', 'successful', 'failed'):
+            worker_totals[key] += totals[key]
+        print(f"  [{worker}] Range {range_id} (wallets {start_index}-{start_index + size}) done: "
+              f"{totals['successful']} with earnings, {totals['failed']} failed")
+
+
+def print_status(queue):
+    counts = queue.progress()
+    total = counts[PENDING] + counts[LEASED] + counts['expired'] + counts[DONE]
+    print(f"Ranges: {counts[DONE]}/{total} done, {counts[LEASED]} leased, {counts['expired']} expired leases, "
+          f"{counts[PENDING]} pending ({counts['reclaimed']} reclaimed)")
+    print(f"Results collected: {counts['results']}")
+
+
+def main():
+    args, options = split_options(sys.argv[1:])
+    if len(args) < 2 or args[0] not in ('init', 'worker', 'status', 'export'):
+        print("Usage: python3.11 work_queue.py init|worker|status|export <queue_file> ...")
+        print("\nExample:")
+        print("  python3.11 work_queue.py init sweep.sqlite wallets.json --range-size 1000")
+        print("  python3.11 work_queue.py worker sweep.sqlite")
+        sys.exit(1)
+
+    command, queue_file = args[0], args[1]
+    queue = WorkQueue(queue_file, lease_timeout=float(options.get('lease_timeout', DEFAULT_LEASE_TIMEOUT)))
+
+    try:
+        if command == 'init':
+            if len(args) < 3 or not os.path.exists(args[2]):
+                print("Error: init needs an existing wallet file")
+                sys.exit(1)
+            wallet_file = args[2]
+            total_wallets = count_wallets(wallet_file)
+            start_index = int(args[3]) if len(args) > 3 else 0
+            end_index = min(start_index + int(args[4]), total_wallets) if len(args) > 4 else total_wallets
+            range_size = int(options.get('range_size', DEFAULT_RANGE_SIZE))
+            try:
+                queue.initialize(wallet_file, start_index, end_index, range_size)
+            except ValueError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            print(f"✓ Queued wallets {start_index} to {end_index} of {wallet_file} in ranges of {range_size}")
+
+        elif command == 'worker':
+            wallet_file = options.get('wallet_file') or queue.meta('wallet_file')
+            if wallet_file is None:
+                print(f"Error: Queue {queue_file} has not been initialized")
+                sys.exit(1)
+            worker = options.get('worker_id') or f'{socket.gethostname()}:{os.getpid()}'
+            concurrency = int(options.get('concurrency', DEFAULT_CONCURRENCY))
+            limiter = AdaptiveRateLimiter(rate=float(options.get('rate', DEFAULT_RATE)),
+                                          max_rate=float(options.get('max_rate', DEFAULT_MAX_RATE)),
+                                          name='statistics')
+
+            print(f"Worker {worker} pulling from {queue_file}...")
+            totals = run_worker(queue, worker, wallet_file, concurrency, limiter, options.get('stats_url', STATS_URL))
+            print(f"\n✓ Worker {worker} finished: {totals['ranges']} ranges, {totals['processed']} wallets "
+                  f"({totals['successful']} with earnings, {totals['failed']} failed)")
+            print_status(queue)
+
+        elif command == 'status':
+            print_status(queue)
+
+        elif command == 'export':
+            if len(args) < 3:
+                print("Error: export needs an output file")
+                sys.exit(1)
+            with open_writer(args[2], options.get('format', 'json')) as writer:
+                for stats in queue.iter_results():
+                    writer.write(stats)
+            print(f"✓ Wrote {writer.count} records to {args[2]}")
+            print_status(queue)
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()